@@ -1,13 +1,31 @@
+from typing import Any, Dict, Optional
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from cache.coherence import coherence
+from cache.read_model import read_model
 from database import db, init_db
+from routes.admin_routes import admin_bp
 from routes.feature_routes import feature_bp
 from routes.health_routes import health_bp
 from config import Config
+from commands import register_commands
+from middleware.admission import admission
+from middleware.idempotency import idempotency
+from middleware.profiling import profiler
+from middleware.rate_limit import rate_limiter
+from warmup import warmup
 
-def create_app():
+def create_app(config: Optional[Dict[str, Any]] = None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Overrides (tests) apply before any extension reads the config, the database URI included
+    if config:
+        app.config.update(config)
+    
+    # Take the client address from the trusted proxies' X-Forwarded-For
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     
     # Initialize database
     db.init_app(app)
@@ -15,9 +33,44 @@ def create_app():
     # Enable CORS
     CORS(app)
     
+    # Share cache invalidations with the other workers
+    coherence.init_app(app)
+    read_model.init_app(app)
+    
+    # Profile allowlisted requests on demand (first, so the other hooks are profiled too)
+    profiler.init_app(app)
+    
+    # Shed writes with a fast 503 before they pile up behind a slow database
+    admission.init_app(app)
+    
+    # Replay retried writes, then throttle the ones that still need to run
+    idempotency.init_app(app)
+    rate_limiter.init_app(app)
+    
     # Register blueprints
     app.register_blueprint(feature_bp, url_prefix='/api')
+    app.register_blueprint(feature_bp, url_prefix='/api/boards/<board_id>', name='board_features')
     app.register_blueprint(health_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api/boards/<board_id>', name='board_admin')
+    
+    # Register CLI commands
+    register_commands(app)
+    
+    # Optionally warm up in the background; /api/ready turns green once done
+    warmup.init_app(app)
+    
+    # Optionally recount upvotes from the votes table in the background
+    if app.config['RECONCILE_INTERVAL_SECONDS']:
+        from services.reconciliation_service import ReconciliationWorker
+        
+        ReconciliationWorker.for_app(app).start()
+    
+    # Optionally archive the votes of quiet features in the background
+    if app.config['VOTE_ARCHIVE_INTERVAL_SECONDS']:
+        from services.archive_service import VoteArchiveWorker
+        
+        VoteArchiveWorker.for_app(app).start()
     
     return app
 
@@ -0,0 +1,156 @@
+"""Read and write latency under write overload while the database is slow, with and without admission control.
+
+Serves the app from a fixed pool of worker threads (like a threaded gunicorn worker), slows the database
+down by holding its write lock most of the time from another connection, then floods it with votes
+while a few clients keep reading the list:
+
+    python benchmarks/admission_benchmark.py --threads 16 --writers 48 --readers 4 --duration 10
+"""
+import argparse
+import http.client
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED_SCRIPT = '''
+from sqlalchemy import insert
+from app import create_app
+from database import db, init_db
+from models.feature import Feature
+app = create_app()
+with app.app_context():
+    init_db()
+    db.session.execute(insert(Feature), [{'title': f'Feature {i}', 'author': 'bench'} for i in range(200)])
+    db.session.commit()
+'''
+
+SERVER_SCRIPT = '''
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer
+from app import create_app
+
+class PooledServer(BaseWSGIServer):
+    """Handles connections on a fixed pool of threads; the rest wait in its queue"""
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.handle, request, client_address)
+
+    def handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+server = PooledServer('127.0.0.1', 0, create_app(), int(sys.argv[1]))
+server.socket.listen(1024)
+print(server.server_port, flush=True)
+server.serve_forever()
+'''
+
+def request(port: int, method: str, path: str, body=None):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    started = time.perf_counter()
+    try:
+        connection.request(method, path, body=json.dumps(body) if body else None,
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        status, retry_after = response.status, float(response.headers.get('Retry-After') or 0)
+    except OSError:
+        status, retry_after = 0, 0.0
+    finally:
+        connection.close()
+    return status, (time.perf_counter() - started) * 1000, retry_after
+
+def hold_write_lock(path: str, stop: threading.Event, held: float, released: float):
+    # Another process writing slowly: votes wait on the lock, reads (shared locks) do not
+    connection = sqlite3.connect(path, isolation_level=None)
+    while not stop.is_set():
+        connection.execute('BEGIN IMMEDIATE')
+        time.sleep(held)
+        connection.execute('COMMIT')
+        time.sleep(released)
+    connection.close()
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))] if values else float('nan')
+
+def run(args, directory: str, enabled: bool):
+    database = os.path.join(directory, f'bench-{enabled}.db')
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', RATELIMIT_ENABLED='false',
+               FRAUD_DETECTION_ENABLED='false', ADMISSION_ENABLED=str(enabled).lower(),
+               ADMISSION_MAX_IN_FLIGHT=str(args.threads), ADMISSION_MAX_WRITERS=str(args.threads // 2),
+               ADMISSION_RESERVED_READS=str(args.threads // 4))
+    subprocess.run([sys.executable, '-c', SEED_SCRIPT], cwd=BACKEND_DIR, env=env, check=True)
+    server = subprocess.Popen([sys.executable, '-c', SERVER_SCRIPT, str(args.threads)], cwd=BACKEND_DIR, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    port = int(server.stdout.readline())
+    request(port, 'GET', '/api/features')
+    results = {'read': [], 'write': [], 'shed': [], 'failed': []}
+    stop = threading.Event()
+
+    def writer(index):
+        count = 0
+        while not stop.is_set():
+            count += 1
+            status, ms, retry_after = request(port, 'POST', f'/api/features/{count % 200 + 1}/upvote',
+                                              {'user_id': f'writer{index}-{count}'})
+            results['write' if status == 200 else 'shed' if status == 503 else 'failed'].append(ms)
+            # Clients back off as told
+            stop.wait(retry_after)
+
+    def reader():
+        while not stop.is_set():
+            status, ms, _ = request(port, 'GET', '/api/features?limit=20')
+            results['read' if status == 200 else 'failed'].append(ms)
+
+    threads = [threading.Thread(target=hold_write_lock, args=(database, stop, args.lock_held, args.lock_released))]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.terminate()
+    server.wait()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16, help='Server worker threads')
+    parser.add_argument('--writers', type=int, default=48, help='Concurrent voting clients')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent list-reading clients')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load per run')
+    parser.add_argument('--lock-held', type=float, default=0.2, help='Seconds the write lock is held each time')
+    parser.add_argument('--lock-released', type=float, default=0.02, help='Seconds it is then free')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'':22} {'reads':>6} {'read p50':>9} {'read p99':>9} {'votes':>6} {'vote p50':>9} {'vote p99':>9} "
+              f"{'shed':>6} {'shed p99':>9} {'failed':>6}")
+        for enabled in (False, True):
+            results = run(args, directory, enabled)
+            read, write, shed = results['read'], results['write'], results['shed']
+            print(f"{'admission ' + ('on' if enabled else 'off'):22} {len(read):>6} {percentile(read, .5):>9.1f} "
+                  f"{percentile(read, .99):>9.1f} {len(write):>6} {percentile(write, .5):>9.1f} "
+                  f"{percentile(write, .99):>9.1f} {len(shed):>6} {percentile(shed, .99):>9.1f} "
+                  f"{len(results['failed']):>6}")
+    print('latencies in ms; failed = errors, timeouts and non-503 rejections')
+
+if __name__ == '__main__':
+    main()
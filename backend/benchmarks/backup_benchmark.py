@@ -0,0 +1,116 @@
+"""Vote latency while an online backup runs: stepped backup versus one-step copy versus no backup.
+
+Seeds a board, then casts votes through the app in one process while another takes a backup, and
+reports vote latency percentiles and what the backup cost:
+
+    python benchmarks/backup_benchmark.py --features 20000 --votes 300000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED_SCRIPT = '''
+import random
+from sqlalchemy import insert
+from app import create_app
+from database import db, init_db
+from models.feature import Feature
+from models.vote import Vote
+random.seed(7)
+app = create_app()
+with app.app_context():
+    init_db()
+    db.session.execute(insert(Feature), [
+        {{'title': f'Feature {{i}}', 'description': 'Seeded description ' * 20, 'author': 'bench',
+          'upvotes': 0}} for i in range({features})
+    ])
+    for start in range(0, {votes}, 50000):
+        db.session.execute(insert(Vote), [
+            {{'feature_id': random.randint(1, {features}), 'user_id': f'user{{i}}'}}
+            for i in range(start, min(start + 50000, {votes}))
+        ])
+    db.session.commit()
+'''
+
+BACKUP_SCRIPT = '''
+import json, sys, time
+from app import create_app
+from services.backup_service import BackupService
+app = create_app()
+app.config['BACKUP_PAGES_PER_STEP'] = {pages}
+time.sleep(0.5)
+with app.app_context():
+    started = time.time()
+    backup = BackupService().backup(sys.argv[1])
+    backup['window'] = [started, time.time()]
+print(json.dumps(backup))
+'''
+
+VOTE_SCRIPT = '''
+import json, subprocess, sys, time
+from app import create_app
+app = create_app()
+client = app.test_client()
+client.post('/api/features/1/upvote', json={{'user_id': 'warm'}})
+backup = subprocess.Popen([sys.executable, '-c', sys.argv[1], sys.argv[2]], stdout=subprocess.PIPE, text=True) \\
+    if sys.argv[1] else None
+run, latencies, started, user = sys.argv[3], [], time.perf_counter(), 0
+while (backup.poll() is None) if backup else time.perf_counter() - started < {duration}:
+    user += 1
+    before = time.perf_counter()
+    response = client.post(f'/api/features/{{user % {features} + 1}}/upvote', json={{'user_id': f'{{run}}-{{user}}'}})
+    latencies.append((time.time(), (time.perf_counter() - before) * 1000))
+    assert response.status_code == 200, response.get_json()
+result = {{}}
+if backup:
+    result['backup'] = json.loads(backup.communicate()[0].strip().splitlines()[-1])
+    # Only votes that overlapped the copy itself, not the backup process starting up
+    first, last = result['backup']['window']
+    latencies = [(at, ms) for at, ms in latencies if at >= first and at - ms / 1000 <= last]
+latencies = sorted(ms for _, ms in latencies)
+result.update({{'votes': len(latencies), 'p50': latencies[len(latencies) // 2],
+                'p99': latencies[int(len(latencies) * 0.99)], 'max': latencies[-1]}})
+print(json.dumps(result))
+'''
+
+def run_python(script: str, env, *args) -> str:
+    result = subprocess.run([sys.executable, '-c', script, *args], cwd=BACKEND_DIR, env=env, capture_output=True,
+                            text=True)
+    if result.returncode:
+        sys.exit(result.stderr)
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--features', type=int, default=20000, help='Features to seed')
+    parser.add_argument('--votes', type=int, default=300000, help='Votes to seed')
+    parser.add_argument('--pages', type=int, default=256, help='Pages copied per backup step')
+    parser.add_argument('--duration', type=float, default=3.0, help='Seconds of voting without a backup')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   RATELIMIT_ENABLED='false', FRAUD_DETECTION_ENABLED='false')
+        run_python(SEED_SCRIPT.format(features=args.features, votes=args.votes), env)
+        vote_script = VOTE_SCRIPT.format(features=args.features, duration=args.duration)
+        results = {'no backup': json.loads(run_python(vote_script, env, '', '', 'idle'))}
+        for label, pages in [(f'stepped backup ({args.pages} pages/step)', args.pages), ('one-step copy', -1)]:
+            destination = os.path.join(directory, f'backup{pages}.db')
+            backup_script = BACKUP_SCRIPT.format(pages=pages)
+            results[label] = json.loads(run_python(vote_script, env, backup_script, destination, str(pages)))
+
+    print(f"{'':36} {'votes':>6} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}   backup")
+    for label, result in results.items():
+        backup = result.get('backup')
+        summary = (f"{backup['size'] / 2 ** 20:.0f} MB in {backup['duration_seconds']:.2f}s, "
+                   f"{backup['steps']} steps, {backup['restarts']} restarts") if backup else ''
+        print(f"{label:36} {result['votes']:>6} {result['p50']:>8.2f} {result['p99']:>8.2f} {result['max']:>8.1f}   "
+              f"{summary}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Peak memory of GET /api/features, buffered versus ?stream=true, as the feature count grows.
+
+Each measurement runs in a fresh interpreter under tracemalloc:
+
+    python benchmarks/list_memory_benchmark.py --sizes 10000 50000 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED_SCRIPT = '''
+from sqlalchemy import insert
+from app import create_app
+from database import db, init_db
+from models.feature import Feature
+app = create_app()
+with app.app_context():
+    init_db()
+    for start in range(0, {count}, 5000):
+        db.session.execute(insert(Feature), [
+            {{'title': f'Feature {{i}}', 'description': 'A description long enough to look like real input ' * 3,
+              'author': 'bench', 'upvotes': i % 97}}
+            for i in range(start, min(start + 5000, {count}))
+        ])
+    db.session.commit()
+'''
+
+MEASURE_SCRIPT = '''
+import json, tracemalloc
+from app import create_app
+app = create_app()
+client = app.test_client()
+client.get('/api/health')
+tracemalloc.start()
+response = client.get('/api/features{query}', buffered=False)
+size = sum(len(chunk) for chunk in response.response)
+response.close()
+current, peak = tracemalloc.get_traced_memory()
+print(json.dumps({{'status': response.status_code, 'bytes': size, 'peak': peak}}))
+'''
+
+def run_python(script: str, env) -> str:
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, capture_output=True,
+                            text=True, check=True)
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000], help='Feature counts')
+    args = parser.parse_args()
+
+    print(f"{'features':>10} {'mode':>9} {'response MB':>12} {'peak MB':>9}")
+    for count in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            # The feature cache would keep the buffered list alive; measure the request path alone
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                       CACHE_TTL_SECONDS='0', RATELIMIT_ENABLED='false')
+            run_python(SEED_SCRIPT.format(count=count), env)
+            for mode, query in (('buffered', ''), ('streamed', '?stream=true')):
+                result = json.loads(run_python(MEASURE_SCRIPT.format(query=query), env))
+                if result['status'] != 200:
+                    sys.exit(f'{mode} request failed with status {result["status"]}')
+                print(f"{count:>10} {mode:>9} {result['bytes'] / 1e6:>12.1f} {result['peak'] / 1e6:>9.1f}")
+
+if __name__ == '__main__':
+    main()
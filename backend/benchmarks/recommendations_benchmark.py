@@ -0,0 +1,98 @@
+"""Related features: the per-request votes self-join versus the precomputed co-vote neighbor lists.
+
+Seeds a synthetic board (1M votes by default, feature popularity Zipf-distributed) and runs in a
+fresh interpreter:
+
+    python benchmarks/recommendations_benchmark.py --votes 1000000 --features 5000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEED_SCRIPT = '''
+import itertools, random
+from sqlalchemy import insert
+from app import create_app
+from database import db, init_db
+from models.feature import Feature
+from models.vote import Vote
+random.seed(7)
+app = create_app()
+with app.app_context():
+    init_db()
+    db.session.execute(insert(Feature), [
+        {{'title': f'Feature {{i}}', 'author': 'bench'}} for i in range({features})
+    ])
+    weights = list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range({features})))
+    rows, user, seeded = [], 0, 0
+    while seeded < {votes}:
+        for feature_id in set(random.choices(range(1, {features} + 1), cum_weights=weights, k={per_user})):
+            rows.append({{'feature_id': feature_id, 'user_id': f'user{{user}}'}})
+        user += 1
+        if len(rows) >= 50000 or seeded + len(rows) >= {votes}:
+            db.session.execute(insert(Vote), rows)
+            seeded += len(rows)
+            rows = []
+    db.session.commit()
+'''
+
+MEASURE_SCRIPT = '''
+import json, statistics, time
+from sqlalchemy import text
+from app import create_app
+from database import db
+app = create_app()
+client = app.test_client()
+SELF_JOIN = text(
+    'SELECT other.feature_id, COUNT(*) AS co_votes FROM votes AS mine '
+    'JOIN votes AS other ON other.user_id = mine.user_id AND other.feature_id != mine.feature_id '
+    'WHERE mine.feature_id = :feature_id GROUP BY other.feature_id ORDER BY co_votes DESC LIMIT 10'
+)
+samples = [1, 10, 100, 1000, {features}]
+
+def timed(call):
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+with app.app_context():
+    self_join = [timed(lambda: db.session.execute(SELF_JOIN, {{'feature_id': f}}).all()) for f in samples]
+build = timed(lambda: client.get('/api/features/1/related'))
+related = [timed(lambda: client.get(f'/api/features/{{f}}/related')) for f in samples * 20]
+upvotes = [timed(lambda: client.post(f'/api/features/{{f}}/upvote', json={{'user_id': 'bench-user'}}))
+           for f in samples]
+print(json.dumps({{'self_join': self_join, 'build': build, 'related': statistics.median(related),
+                   'upvote': statistics.median(upvotes)}}))
+'''
+
+def run_python(script: str, env) -> str:
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, capture_output=True,
+                            text=True, check=True)
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--votes', type=int, default=1000000, help='Votes to seed')
+    parser.add_argument('--features', type=int, default=5000, help='Features to seed')
+    parser.add_argument('--per-user', type=int, default=10, help='Votes cast per synthetic user')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   RATELIMIT_ENABLED='false', FRAUD_DETECTION_ENABLED='false')
+        run_python(SEED_SCRIPT.format(votes=args.votes, features=args.features, per_user=args.per_user), env)
+        result = json.loads(run_python(MEASURE_SCRIPT.format(features=args.features), env))
+
+    print(f"self-join per request (features ranked 1/10/100/1000/{args.features} by popularity), ms:")
+    print('  ' + ' '.join(f'{ms:.1f}' for ms in result['self_join']))
+    print(f"co-vote index build on first request: {result['build']:.0f} ms")
+    print(f"GET /related from neighbor lists, median: {result['related']:.2f} ms")
+    print(f"POST /upvote with incremental index update, median: {result['upvote']:.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Cold-start benchmark: time to a served app, time to ready, and where import time goes.
+
+Every measurement runs in a fresh interpreter, like a scale-to-zero container start:
+
+    python benchmarks/startup_benchmark.py --runs 10 --features 1000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = '''
+import json, time
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+created = time.perf_counter()
+from database import db, init_db
+from models.feature import Feature
+from warmup import warmup
+with app.app_context():
+    init_db()
+    if not Feature.query.count():
+        db.session.add_all([Feature(title=f'Feature {{i}}', description='Seeded for the startup benchmark',
+                                    author='bench') for i in range({features})])
+        db.session.commit()
+seeded = time.perf_counter()
+warmup.run(app)
+ready = time.perf_counter()
+state = app.extensions['warmup_state']
+print(json.dumps({{'create_app': created - started, 'warmup': ready - seeded,
+                   'ready': (created - started) + (ready - seeded), 'steps': state.timings,
+                   'error': state.error}}))
+'''
+
+def run_python(args, env):
+    return subprocess.run([sys.executable] + args, cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+                          check=True)
+
+def measure_startup(runs: int, features: int, env):
+    results = []
+    for _ in range(runs):
+        output = run_python(['-c', STARTUP_SCRIPT.format(features=features)], env).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+def import_breakdown(env, top: int):
+    """Self time per top-level package from python -X importtime, largest first"""
+    stderr = run_python(['-X', 'importtime', '-c', 'import app'], env).stderr
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, module = line[len('import time:'):].split('|')
+        totals[module.strip().split('.')[0]] += int(self_us)
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts to measure')
+    parser.add_argument('--features', type=int, default=1000, help='Features seeded before warming up')
+    parser.add_argument('--top', type=int, default=15, help='Packages shown in the import breakdown')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   RATELIMIT_ENABLED='false', PURGE_IN_BACKGROUND='false')
+        results = measure_startup(args.runs, args.features, env)
+        breakdown = import_breakdown(env, args.top)
+
+    errors = [result['error'] for result in results if result['error']]
+    if errors:
+        sys.exit(f'Warm-up failed: {errors[0]}')
+
+    print(f'{args.runs} cold starts, {args.features} features')
+    for key in ('create_app', 'warmup', 'ready'):
+        values = [result[key] * 1000 for result in results]
+        print(f'  {key:<12} median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms')
+    for step in results[0]['steps']:
+        values = [result['steps'][step] * 1000 for result in results]
+        print(f'    {step:<10} median {statistics.median(values):8.1f} ms')
+
+    print('Import time of `import app` by top-level package (self time)')
+    for package, micros in breakdown:
+        print(f'  {package:<24} {micros / 1000:8.1f} ms')
+
+if __name__ == '__main__':
+    main()
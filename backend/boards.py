@@ -0,0 +1,70 @@
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import sqlalchemy as sa
+from flask import current_app, g, has_app_context, has_request_context
+from flask_sqlalchemy.session import Session
+
+DEFAULT_BOARD = 'default'
+BOARD_ID_RE = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+_board_override: ContextVar[Optional[str]] = ContextVar('board_override', default=None)
+_engines_lock = threading.Lock()
+
+def is_valid_board_id(board_id: str) -> bool:
+    """Check a board ID is a short lowercase slug"""
+    return bool(BOARD_ID_RE.match(board_id or ''))
+
+def current_board() -> str:
+    """The board the current request (or use_board block) is scoped to"""
+    board_id = _board_override.get()
+    if board_id:
+        return board_id
+    if has_request_context():
+        return g.get('board_id', DEFAULT_BOARD)
+    return DEFAULT_BOARD
+
+@contextmanager
+def use_board(board_id: str):
+    """Scope repositories to a board outside of a request (CLI commands, background jobs)"""
+    token = _board_override.set(board_id)
+    try:
+        yield board_id
+    finally:
+        _board_override.reset(token)
+
+def is_served_board(board_id: str) -> bool:
+    """Check whether this process serves a board (SERVED_BOARDS empty means all boards)"""
+    served = current_app.config.get('SERVED_BOARDS')
+    return not served or board_id in served
+
+def board_engine(board_id: str) -> Optional[sa.engine.Engine]:
+    """The dedicated engine of a board configured in BOARD_DATABASES, or None for the shared database"""
+    uri = current_app.config.get('BOARD_DATABASES', {}).get(board_id)
+    if uri is None:
+        return None
+    engines = current_app.extensions.setdefault('board_engines', {})
+    engine = engines.get(board_id)
+    if engine is None:
+        with _engines_lock:
+            engine = engines.get(board_id)
+            if engine is None:
+                from migrations import upgrade_schema
+                
+                options = dict(current_app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+                engine = sa.create_engine(uri, **options)
+                upgrade_schema(engine)
+                engines[board_id] = engine
+    return engine
+
+class BoardRoutingSession(Session):
+    """Session that sends every statement of a board with its own database file to that database"""
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            engine = board_engine(current_board())
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,8 @@
+from .bus import EventBus, LocalEventBus, UnixSocketEventBus, create_bus
+from .coherence import coherence, CacheCoherence
+from .feature_cache import FeatureCache
+from .read_model import read_model, ReadModelFile, SharedReadModel
+from .single_flight import SingleFlight
+
+__all__ = ['coherence', 'CacheCoherence', 'create_bus', 'EventBus', 'FeatureCache', 'LocalEventBus', 'read_model',
+           'ReadModelFile', 'SharedReadModel', 'SingleFlight', 'UnixSocketEventBus']
@@ -0,0 +1,119 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+Event = Dict[str, Any]
+Handler = Callable[[Event], None]
+
+class EventBus:
+    """Publish/subscribe of change events between the app processes sharing a database"""
+    
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self._handlers: List[Handler] = []
+    
+    def subscribe(self, handler: Handler):
+        """Call handler for every event, whichever process published it"""
+        self._handlers.append(handler)
+    
+    def publish(self, event_type: str, **payload):
+        """Deliver an event to local subscribers at once and to other processes asynchronously"""
+        event = dict(payload, type=event_type, origin=self.origin)
+        self._dispatch(event)
+        self._send(event)
+    
+    def _dispatch(self, event: Event):
+        for handler in list(self._handlers):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Event handler failed for %s", event.get('type'))
+    
+    def _send(self, event: Event):
+        """Forward an event to other processes"""
+    
+    def close(self):
+        """Stop receiving events"""
+
+class LocalEventBus(EventBus):
+    """Single-process bus; also the test double for the cross-process buses"""
+
+class UnixSocketEventBus(EventBus):
+    """Bus between processes on one host: every process binds a datagram socket in a shared directory"""
+    
+    MAX_EVENT_BYTES = 65536
+    
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{os.getpid()}-{self.origin[:12]}.sock')
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self.path)
+        self._socket.settimeout(0.5)
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._receive, name='event-bus', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def _send(self, event: Event):
+        data = json.dumps(event).encode()
+        if len(data) > self.MAX_EVENT_BYTES:
+            logger.warning("Dropping oversized %s event", event.get('type'))
+            return
+        for peer in glob.glob(os.path.join(self.directory, '*.sock')):
+            if peer == self.path:
+                continue
+            try:
+                self._socket.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The peer process exited without cleaning up its socket
+                self._unlink(peer)
+            except OSError:
+                logger.exception("Could not deliver %s event to %s", event.get('type'), peer)
+    
+    def _receive(self):
+        while not self._closed.is_set():
+            try:
+                data = self._socket.recv(self.MAX_EVENT_BYTES)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            try:
+                event = json.loads(data)
+            except ValueError:
+                logger.warning("Ignoring malformed event")
+                continue
+            self._dispatch(event)
+    
+    @staticmethod
+    def _unlink(path: str):
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+    
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join(timeout=2)
+        self._socket.close()
+        self._unlink(self.path)
+
+def create_bus(url: str) -> EventBus:
+    """Create an event bus from a URL: local:// or unix:///path/to/socket/directory"""
+    if url == 'local://':
+        return LocalEventBus()
+    if url.startswith('unix://'):
+        return UnixSocketEventBus(url[len('unix://'):])
+    raise ValueError(f"Unsupported event bus: {url}")
@@ -0,0 +1,135 @@
+import os
+import threading
+from typing import Any, Callable, Hashable, Tuple
+from flask import current_app
+from boards import current_board, use_board
+from cache.bus import Event, EventBus, create_bus
+from cache.feature_cache import FeatureCache
+from cache.read_model import read_model
+from transactions import after_commit
+
+FEATURE_CREATED = 'feature.created'
+FEATURE_DELETED = 'feature.deleted'
+FEATURES_RESCORED = 'features.rescored'
+FEATURES_RECOUNTED = 'features.recounted'
+VOTE_CREATED = 'vote.created'
+VOTE_REMOVED = 'vote.removed'
+VOTE_QUARANTINED = 'vote.quarantined'
+DATABASE_RESTORED = 'database.restored'
+
+class CacheCoherence:
+    """Keeps every worker's in-process caches and indexes coherent by publishing change events"""
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['cache_coherence'] = self
+        # Join the bus before serving, so invalidations from other workers are not missed
+        app.before_request(self.connect)
+    
+    def connect(self):
+        """Make sure this process is subscribed to the bus"""
+        self.bus
+    
+    @property
+    def bus(self) -> EventBus:
+        """The event bus of the current app and process, created on first use"""
+        app = current_app._get_current_object()
+        entry = app.extensions.get('event_bus')
+        # A forked worker must not share its parent's socket
+        if entry is None or entry[0] != os.getpid():
+            with self._lock:
+                entry = app.extensions.get('event_bus')
+                if entry is None or entry[0] != os.getpid():
+                    bus = create_bus(app.config['EVENT_BUS_URL'])
+                    bus.subscribe(lambda event: self._handle(app, bus, event))
+                    entry = (os.getpid(), bus)
+                    app.extensions['event_bus'] = entry
+        return entry[1]
+    
+    @property
+    def cache(self) -> FeatureCache:
+        """The feature cache of the current app, created on first use"""
+        cache = current_app.extensions.get('feature_cache')
+        if cache is None:
+            with self._lock:
+                cache = current_app.extensions.setdefault(
+                    'feature_cache', FeatureCache(ttl=current_app.config['CACHE_TTL_SECONDS'],
+                                                  load_timeout=current_app.config['SINGLE_FLIGHT_TIMEOUT_SECONDS'])
+                )
+        return cache
+    
+    def cached(self, kind: str, scope: Tuple[Hashable, ...], loader: Callable[[], Any]) -> Any:
+        """Read through the cache for the current board"""
+        return self.cache.get_or_load((kind, current_board()) + scope, loader)
+    
+    def coalesced(self, kind: str, scope: Tuple[Hashable, ...], loader: Callable[[], Any]) -> Any:
+        """Read without caching, sharing one load between identical concurrent reads on the current board"""
+        return self.cache.load_once((kind, current_board()) + scope, loader)
+    
+    def publish(self, event_type: str, **payload):
+        """Announce a change on the current board to every worker, this one included, once committed"""
+        payload.setdefault('board_id', current_board())
+        app = current_app._get_current_object()
+        bus = self.bus
+        
+        def announce():
+            # The shared read model is marked stale before this request returns, for read-your-writes
+            read_model.mark_changed(app, payload['board_id'])
+            bus.publish(event_type, **payload)
+        
+        after_commit(announce)
+    
+    def close(self, app):
+        """Leave the bus (used on shutdown and by tests)"""
+        entry = app.extensions.pop('event_bus', None)
+        if entry is not None:
+            entry[1].close()
+    
+    def _handle(self, app, bus: EventBus, event: Event):
+        board_id = event.get('board_id')
+        event_type = event.get('type')
+        cache = app.extensions.get('feature_cache')
+        if event_type == DATABASE_RESTORED:
+            # Every cache and index was derived from the replaced contents, this worker's included
+            from database import reset_engine_state
+            
+            if cache is not None:
+                cache.clear()
+            reset_engine_state()
+            return
+        if cache is not None:
+            cache.invalidate('features', board_id)
+            if event_type in (VOTE_CREATED, VOTE_REMOVED):
+                cache.invalidate('votes', board_id, event.get('user_id'))
+            elif event_type == FEATURE_DELETED:
+                cache.invalidate('votes', board_id)
+        
+        # Local changes were already applied to this process's indexes by the service
+        if event.get('origin') == bus.origin:
+            return
+        if event_type in (VOTE_CREATED, VOTE_REMOVED, VOTE_QUARANTINED):
+            from repositories.recommendation_repository import RecommendationRepository
+            
+            with app.app_context(), use_board(board_id):
+                if event_type == VOTE_CREATED:
+                    RecommendationRepository().add_vote(event['feature_id'], event['user_id'], event.get('vote_id'))
+                elif not event.get('quarantined'):
+                    RecommendationRepository().remove_vote(event['feature_id'], event['user_id'])
+            return
+        if event_type not in (FEATURE_CREATED, FEATURE_DELETED):
+            return
+        from repositories.duplicate_repository import DuplicateRepository
+        from repositories.search_repository import SearchRepository
+        
+        with app.app_context(), use_board(board_id):
+            for repo in (SearchRepository(), DuplicateRepository()):
+                if event_type == FEATURE_CREATED:
+                    repo.apply_remote_add(event['feature_id'], event['title'], event.get('description'))
+                else:
+                    repo.apply_remote_remove(event['feature_id'])
+
+coherence = CacheCoherence()
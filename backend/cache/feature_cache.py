@@ -0,0 +1,60 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from cache.single_flight import SingleFlight
+
+class FeatureCache:
+    """In-process TTL cache of feature lists and user votes, invalidated by bus events.
+    
+    Events keep workers coherent; the TTL only bounds staleness if an event is lost. Concurrent
+    misses for the same key share one load instead of each querying the database.
+    """
+    
+    def __init__(self, ttl: float = 30.0, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic,
+                 load_timeout: Optional[float] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries: Dict[Tuple[Hashable, ...], Tuple[float, Any]] = {}
+        # Bumped on every invalidation, so a load that raced one is not stored
+        self.generation = 0
+        self.flights = SingleFlight(load_timeout)
+        self._lock = threading.Lock()
+    
+    def get_or_load(self, key: Tuple[Hashable, ...], loader: Callable[[], Any]) -> Any:
+        """Return the cached value for a key, loading and caching it when missing or expired"""
+        if self.ttl <= 0:
+            return self.load_once(key, loader)
+        now = self.clock()
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        generation = self.generation
+        value = self.flights.do((key, generation), loader)
+        with self._lock:
+            if self.generation == generation:
+                self.entries.pop(key, None)
+                self.entries[key] = (now + self.ttl, value)
+                # Entries are kept in insertion order, so the oldest are evicted first
+                while len(self.entries) > self.max_entries:
+                    del self.entries[next(iter(self.entries))]
+        return value
+    
+    def load_once(self, key: Tuple[Hashable, ...], loader: Callable[[], Any]) -> Any:
+        """Run a loader without caching its result, sharing it with identical concurrent loads"""
+        # Keyed by generation too, so a read that follows a change never joins a load that predates it
+        return self.flights.do((key, self.generation), loader)
+    
+    def invalidate(self, kind: str, board_id: Optional[str], *scope: Hashable):
+        """Drop the entries of one kind on a board (every board if None), optionally narrowed to a key prefix"""
+        prefix = (kind,) if board_id is None else (kind, board_id) + scope
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self.entries if key[:len(prefix)] == prefix]:
+                del self.entries[key]
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self.entries.clear()
@@ -0,0 +1,271 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from flask import current_app
+
+MAGIC = b'FRM1'
+# magic, seq, changes, built_changes, record count, string table size, bytes in use
+HEADER = struct.Struct('<4s4xQQQQQQ8x')
+SEQ_OFFSET = 8
+CHANGES_OFFSET = 16
+# id, upvotes, votes_count, trending_score, created_at and updated_at in microseconds since the epoch,
+# then (offset, length) in characters of title, description and author in the UTF-8 string table
+RECORD = struct.Struct('<qqqdqqIIIIII')
+ORDER = struct.Struct('<I')
+NULL_STRING = 0xFFFFFFFF
+NEVER_BUILT = 2 ** 64 - 1
+EPOCH = datetime(1970, 1, 1)
+READ_ATTEMPTS = 100
+# Header plus room for ~1000 features before the first resize
+INITIAL_SIZE = 128 * 1024
+
+def _micros(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+class ReadModelFile:
+    """A board's feature list as fixed-size records plus a string table, in a file mapped by every worker.
+    
+    Readers decode records straight from the shared mapping and never lock. The one writer bumps
+    a sequence number to odd before changing anything and back to even after, so a reader that saw
+    the number change (or odd) retries instead of returning a torn list (a seqlock). The file only
+    ever grows, so mappings held by other processes stay valid.
+    """
+    
+    def __init__(self, path: str, board_id: str):
+        self.path = path
+        self.board_id = board_id
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._write_lock = threading.Lock()
+        self._changes_lock = threading.Lock()
+        with self._file_lock(self._write_lock, 0, SEQ_OFFSET):
+            if os.fstat(self.fd).st_size < HEADER.size:
+                os.ftruncate(self.fd, INITIAL_SIZE)
+                os.pwrite(self.fd, HEADER.pack(MAGIC, 0, 0, NEVER_BUILT, 0, 0, HEADER.size), 0)
+        self.map = mmap.mmap(self.fd, 0)
+    
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+    
+    @contextmanager
+    def _file_lock(self, thread_lock: threading.Lock, start: int, length: int, blocking: bool = True):
+        # POSIX record locks are per process, so threads of one process are serialised separately
+        if not thread_lock.acquire(blocking):
+            yield False
+            return
+        try:
+            try:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB, length, start)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.lockf(self.fd, fcntl.LOCK_UN, length, start)
+        finally:
+            thread_lock.release()
+    
+    def _header(self):
+        magic, seq, changes, built_changes, count, strings_size, used = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a feature read model")
+        return seq, changes, built_changes, count, strings_size, used
+    
+    def changes(self) -> int:
+        """Number of changes announced on the board so far"""
+        return struct.unpack_from('<Q', self.map, CHANGES_OFFSET)[0]
+    
+    def is_stale(self) -> bool:
+        """Check whether a change was announced after the current records were read from the database"""
+        _, changes, built_changes, _, _, _ = self._header()
+        return changes != built_changes
+    
+    def mark_changed(self):
+        """Announce a committed change, so every worker stops serving the current records"""
+        with self._file_lock(self._changes_lock, CHANGES_OFFSET, 8):
+            struct.pack_into('<Q', self.map, CHANGES_OFFSET, self.changes() + 1)
+    
+    def read(self, sort: str, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Decode the list in the given order, or None if it is stale or kept changing under the reader"""
+        for _ in range(READ_ATTEMPTS):
+            seq, changes, built_changes, count, strings_size, used = self._header()
+            if changes != built_changes:
+                return None
+            if seq % 2:
+                time.sleep(0)
+                continue
+            if used != HEADER.size + count * (RECORD.size + ORDER.size) + strings_size:
+                # Header caught mid-update
+                continue
+            if used > len(self.map):
+                # Grown by the writer in another process since it was mapped here
+                self.map = mmap.mmap(self.fd, 0)
+                continue
+            try:
+                features = self._decode(sort, limit, count, strings_size)
+            except (ValueError, IndexError, OverflowError, struct.error, UnicodeDecodeError):
+                # Torn read of records being rewritten; the sequence check below fails as well
+                features = None
+            if HEADER.unpack_from(self.map, 0)[1] == seq and features is not None:
+                return features
+        return None
+    
+    def _decode(self, sort: str, limit: Optional[int], count: int, strings_size: int) -> List[Dict[str, Any]]:
+        buffer = self.map
+        records_start = HEADER.size
+        order_start = records_start + count * RECORD.size
+        strings_start = order_start + count * ORDER.size
+        size = count if limit is None else min(limit, count)
+        # One decode of the whole table; fields are then slices of it
+        table = str(buffer[strings_start:strings_start + strings_size], 'utf-8')
+        table_size = len(table)
+        
+        if sort == 'votes':
+            # Records are stored in vote order: unpack them straight from the mapping
+            with memoryview(buffer) as view, view[records_start:records_start + size * RECORD.size] as records:
+                rows = list(RECORD.iter_unpack(records))
+        else:
+            order = struct.unpack_from(f'<{size}I', buffer, order_start)
+            rows = [RECORD.unpack_from(buffer, records_start + index * RECORD.size) for index in order]
+        
+        board_id = self.board_id
+        # Exact to the microsecond for any date a float of seconds can hold to better than half of one
+        timestamp = datetime.utcfromtimestamp
+        features = []
+        for (feature_id, upvotes, votes_count, trending_score, created_at, updated_at,
+             title_at, title_len, description_at, description_len, author_at, author_len) in rows:
+            if max(title_at + title_len, author_at + author_len) > table_size or (
+                    description_len != NULL_STRING and description_at + description_len > table_size):
+                raise ValueError("String outside the string table")
+            features.append({
+                'board_id': board_id, 'title': table[title_at:title_at + title_len],
+                'description': None if description_len == NULL_STRING else
+                table[description_at:description_at + description_len],
+                'author': table[author_at:author_at + author_len], 'upvotes': upvotes,
+                'trending_score': trending_score, 'deleted_at': None, 'id': feature_id,
+                'created_at': timestamp(created_at / 1e6), 'updated_at': timestamp(updated_at / 1e6),
+                'votes_count': votes_count
+            })
+        return features
+    
+    def rebuild(self, loader: Callable[[], Iterable[Dict[str, Any]]]) -> bool:
+        """Reload the records if no other worker is doing so; returns False when another one is"""
+        with self._file_lock(self._write_lock, 0, SEQ_OFFSET, blocking=False) as acquired:
+            if not acquired:
+                return False
+            # Read before the database, so a change committed during the load leaves the result stale
+            changes = self.changes()
+            self._write(list(loader()), changes)
+            return True
+    
+    def _write(self, features: List[Dict[str, Any]], changes: int):
+        parts, size = [], 0
+        
+        def intern(value: Optional[str]):
+            nonlocal size
+            if value is None:
+                return 0, NULL_STRING
+            parts.append(value)
+            size += len(value)
+            return size - len(value), len(value)
+        
+        # Features arrive in vote order; the trending order is kept as an index array
+        records = bytearray(len(features) * RECORD.size)
+        for index, feature in enumerate(features):
+            RECORD.pack_into(
+                records, index * RECORD.size, feature['id'], feature['upvotes'], feature['votes_count'],
+                feature['trending_score'], _micros(feature['created_at']), _micros(feature['updated_at']),
+                *intern(feature['title']), *intern(feature['description']), *intern(feature['author'])
+            )
+        trending = sorted(range(len(features)), key=lambda i: (-features[i]['trending_score'],
+                                                                 -_micros(features[i]['created_at'])))
+        strings = ''.join(parts).encode('utf-8')
+        body = bytes(records) + struct.pack(f'<{len(trending)}I', *trending) + strings
+        used = HEADER.size + len(body)
+        if used > len(self.map):
+            os.ftruncate(self.fd, max(used, len(self.map) * 2))
+            self.map = mmap.mmap(self.fd, 0)
+        
+        seq = self._header()[0]
+        struct.pack_into('<Q', self.map, SEQ_OFFSET, seq + 1)
+        self.map[HEADER.size:used] = body
+        struct.pack_into('<QQQQ', self.map, CHANGES_OFFSET + 8, changes, len(features), len(strings), used)
+        struct.pack_into('<Q', self.map, SEQ_OFFSET, seq + 2)
+
+class SharedReadModel:
+    """Serves feature lists from per-board read model files shared by the workers on one host"""
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['read_model'] = self
+    
+    def file(self, app, board_id: str) -> Optional[ReadModelFile]:
+        """The read model file of a board in this process, or None when the read model is disabled"""
+        directory = app.config['READ_MODEL_DIR']
+        if not directory:
+            return None
+        files = app.extensions.get('read_model_files')
+        # A forked worker maps the files again rather than sharing its parent's descriptors and locks
+        if files is None or files[0] != os.getpid():
+            with self._lock:
+                files = app.extensions.get('read_model_files')
+                if files is None or files[0] != os.getpid():
+                    files = app.extensions['read_model_files'] = (os.getpid(), {})
+        model = files[1].get(board_id)
+        if model is None:
+            with self._lock:
+                model = files[1].get(board_id)
+                if model is None:
+                    os.makedirs(directory, exist_ok=True)
+                    model = ReadModelFile(os.path.join(directory, f'features-{board_id}.bin'), board_id)
+                    files[1][board_id] = model
+        return model
+    
+    def features(self, board_id: str, sort: str, limit: Optional[int],
+                 loader: Callable[[], Iterable[Dict[str, Any]]]) -> Optional[List[Dict[str, Any]]]:
+        """Read a board's list, rebuilding it from loader first if stale and no other worker is.
+        
+        Returns None when the read model is disabled or being rebuilt elsewhere, so the caller falls
+        back to the database.
+        """
+        model = self.file(current_app._get_current_object(), board_id)
+        if model is None:
+            return None
+        features = model.read(sort, limit)
+        if features is None and model.is_stale() and model.rebuild(loader):
+            features = model.read(sort, limit)
+        return features
+    
+    def mark_changed(self, app, board_id: Optional[str]):
+        """Announce a committed change on a board (every board if None) to every worker's read model"""
+        directory = app.config['READ_MODEL_DIR']
+        if not directory:
+            return
+        if board_id is None:
+            names = os.listdir(directory) if os.path.isdir(directory) else []
+            board_ids = [name[len('features-'):-len('.bin')] for name in names
+                         if name.startswith('features-') and name.endswith('.bin')]
+        else:
+            board_ids = [board_id]
+        for board_id in board_ids:
+            self.file(app, board_id).mark_changed()
+    
+    def close(self, app):
+        """Unmap every file (used on shutdown and by tests)"""
+        files = app.extensions.pop('read_model_files', None)
+        if files is not None and files[0] == os.getpid():
+            for model in files[1].values():
+                model.close()
+
+read_model = SharedReadModel()
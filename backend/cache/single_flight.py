@@ -0,0 +1,53 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class _Flight:
+    """One in-flight computation and its outcome"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution whose result they all share.
+    
+    The first caller runs the function; callers arriving while it runs wait for it and get its
+    value, or its exception re-raised. Nothing is kept once the call completes.
+    """
+    
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, func: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Run func, or wait up to timeout seconds for the identical call already running"""
+        with self._lock:
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+        
+        if leader:
+            try:
+                flight.value = func()
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self.flights[key]
+                flight.done.set()
+            return flight.value
+        
+        if not flight.done.wait(self.timeout if timeout is None else timeout):
+            raise TimeoutError("Timed out waiting for an identical request in progress")
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+    
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        with self._lock:
+            return len(self.flights)
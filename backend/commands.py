@@ -0,0 +1,206 @@
+import functools
+import os
+import click
+from flask.cli import with_appcontext
+from boards import DEFAULT_BOARD, board_engine, current_board, use_board
+
+def board_option(command):
+    """Add a --board option that scopes the command (and the database it uses) to one board"""
+    @click.option('--board', 'board_id', default=DEFAULT_BOARD, show_default=True, help='Board to operate on')
+    @functools.wraps(command)
+    def wrapper(*args, board_id, **kwargs):
+        with use_board(board_id):
+            return command(*args, **kwargs)
+    return wrapper
+
+@click.command('cluster-duplicates')
+@click.option('--threshold', type=float, default=None, help='Minimum estimated similarity')
+@with_appcontext
+@board_option
+def cluster_duplicates_command(threshold):
+    """Group existing features into clusters of near-duplicates"""
+    from services.feature_service import FeatureService
+    
+    clusters = FeatureService().cluster_duplicates(threshold)
+    for cluster in clusters:
+        click.echo(' '.join(str(feature_id) for feature_id in cluster))
+    click.echo(f'{len(clusters)} duplicate clusters found', err=True)
+
+@click.command('upgrade-db')
+@with_appcontext
+@board_option
+def upgrade_db_command():
+    """Create missing tables, columns and indexes in a database made by an older version"""
+    from database import db
+    from migrations import upgrade_schema
+    import models
+    
+    changes = upgrade_schema(board_engine(current_board()) or db.engine)
+    for change in changes:
+        click.echo(change)
+    if any(change.endswith('.trending_score') for change in changes):
+        click.echo('Run `flask trending rebuild` to score the existing votes', err=True)
+    click.echo(f'{len(changes)} schema changes', err=True)
+
+@click.group('trending')
+def trending_group():
+    """Maintain time-decayed trending scores"""
+
+@trending_group.command('rebase')
+@with_appcontext
+@board_option
+def trending_rebase_command():
+    """Re-decay every trending score to the current time (run periodically)"""
+    from services.trending_service import TrendingService
+    
+    factor = TrendingService().rebase()
+    click.echo(f'Trending scores re-decayed by a factor of {factor:.6g}')
+
+@trending_group.command('rebuild')
+@click.option('--chunk-size', type=int, default=1000, help='Votes fetched per round trip')
+@with_appcontext
+@board_option
+def trending_rebuild_command(chunk_size):
+    """Recompute every trending score from vote timestamps"""
+    from services.trending_service import TrendingService
+    
+    count = TrendingService().rebuild(chunk_size=chunk_size)
+    click.echo(f'Trending scores rebuilt for {count} features')
+
+@click.command('purge-deleted')
+@click.option('--chunk-size', type=int, default=None, help='Votes deleted per transaction')
+@with_appcontext
+@board_option
+def purge_deleted_command(chunk_size):
+    """Remove soft-deleted features and their votes"""
+    from services.purge_service import PurgeService
+    
+    count = PurgeService().purge_deleted(chunk_size=chunk_size)
+    click.echo(f'Purged {count} deleted features')
+
+@click.group('analytics')
+def analytics_group():
+    """Maintain vote analytics rollups"""
+
+@analytics_group.command('backfill')
+@click.option('--chunk-size', type=int, default=5000, help='Votes read per round trip')
+@with_appcontext
+@board_option
+def analytics_backfill_command(chunk_size):
+    """Rebuild hourly and daily vote rollups from the votes table"""
+    from services.analytics_service import AnalyticsService
+    
+    count = AnalyticsService().backfill(chunk_size=chunk_size)
+    click.echo(f'Rolled up {count} votes')
+
+@click.group('fraud')
+def fraud_group():
+    """Inspect votes for fraud"""
+
+@fraud_group.command('replay')
+@click.option('--chunk-size', type=int, default=5000, help='Votes read per round trip')
+@click.option('--apply', is_flag=True, help='Quarantine flagged votes instead of only reporting them')
+@with_appcontext
+@board_option
+def fraud_replay_command(chunk_size, apply):
+    """Run the vote anomaly detector over historical votes"""
+    from services.fraud_service import FraudService
+    
+    flagged = FraudService().replay(chunk_size=chunk_size, apply=apply)
+    for reason, count in sorted(flagged.items()):
+        click.echo(f'{reason} {count}')
+    action = 'quarantined' if apply else 'flagged (dry run)'
+    click.echo(f'{sum(flagged.values())} votes {action}', err=True)
+
+@click.command('reconcile-votes')
+@click.option('--chunk-size', type=int, default=None, help='Features recounted per round trip')
+@click.option('--dry-run', is_flag=True, help='Only report drift, without repairing it')
+@with_appcontext
+@board_option
+def reconcile_votes_command(chunk_size, dry_run):
+    """Recount upvotes from the votes table and repair counters that drifted"""
+    from services.reconciliation_service import ReconciliationService
+    
+    report = ReconciliationService().reconcile(chunk_size=chunk_size, apply=not dry_run)
+    click.echo(f'checked {report.checked}')
+    click.echo(f'drifted {report.drifted}')
+    click.echo(f'total_drift {report.total_drift}')
+    click.echo(f'max_drift {report.max_drift}')
+    click.echo(f'fixed {report.fixed}')
+    click.echo(f'conflicts {report.conflicts}')
+    click.echo(f'Reconciled in {report.duration_seconds:.3f}s' + (' (dry run)' if dry_run else ''), err=True)
+
+@click.command('archive-votes')
+@click.option('--older-than-days', type=float, default=None,
+              help='Archive features without votes for this many days (default: VOTE_ARCHIVE_AFTER_DAYS)')
+@click.option('--chunk-size', type=int, default=None, help='Votes moved per transaction')
+@click.option('--dry-run', is_flag=True, help='Only report what would be archived')
+@with_appcontext
+@board_option
+def archive_votes_command(older_than_days, chunk_size, dry_run):
+    """Move the votes of quiet features out of the votes table into the archive"""
+    from services.archive_service import VoteArchiveService
+    
+    report = VoteArchiveService().archive(older_than_days=older_than_days, chunk_size=chunk_size, apply=not dry_run)
+    click.echo(f"features {report['features']}")
+    click.echo(f"votes {report['votes']}")
+    if report['deferred']:
+        click.echo('Stopped early: a rollup backfill is running', err=True)
+    click.echo(f"Archived in {report['duration_seconds']:.3f}s" + (' (dry run)' if dry_run else ''), err=True)
+
+@click.group('backup')
+def backup_group():
+    """Take and restore online snapshots of the SQLite database"""
+
+@backup_group.command('create')
+@click.option('--output', type=click.Path(dir_okay=False), default=None,
+              help='File to write (default: a new file in BACKUP_DIR)')
+@with_appcontext
+@board_option
+def backup_create_command(output):
+    """Snapshot the database without blocking writers"""
+    from services.backup_service import BackupService
+    
+    backup = BackupService().backup(output)
+    click.echo(backup['path'])
+    click.echo(f"{backup['size']} bytes in {backup['steps']} steps, {backup['restarts']} restarts, "
+               f"{backup['duration_seconds']:.3f}s", err=True)
+
+@backup_group.command('list')
+@with_appcontext
+@board_option
+def backup_list_command():
+    """List backups in BACKUP_DIR, newest first"""
+    from services.backup_service import BackupService
+    
+    for backup in BackupService().list_backups():
+        click.echo(f"{backup['name']} {backup['size']}")
+
+@backup_group.command('restore')
+@click.argument('source')
+@click.confirmation_option(prompt='Replace the database with this backup?')
+@with_appcontext
+@board_option
+def backup_restore_command(source):
+    """Replace the database with a backup (a name in BACKUP_DIR or a path)"""
+    from services.backup_service import BackupService
+    
+    service = BackupService()
+    try:
+        path = source if os.path.sep in source else service.backup_path(source)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='SOURCE')
+    result = service.restore(path)
+    click.echo(f"Restored {path} in {result['duration_seconds']:.3f}s")
+
+def register_commands(app):
+    """Register CLI commands on the app"""
+    app.cli.add_command(upgrade_db_command)
+    app.cli.add_command(cluster_duplicates_command)
+    app.cli.add_command(trending_group)
+    app.cli.add_command(purge_deleted_command)
+    app.cli.add_command(analytics_group)
+    app.cli.add_command(fraud_group)
+    app.cli.add_command(reconcile_votes_command)
+    app.cli.add_command(archive_votes_command)
+    app.cli.add_command(backup_group)
@@ -1,3 +1,4 @@
+import json
 import os
 
 class Config:
@@ -8,6 +9,99 @@ class Config:
         'pool_pre_ping': True,
         'pool_recycle': 300,
     }
+    # Boards this process serves (empty serves all) and boards kept in their own database
+    SERVED_BOARDS = [b for b in (os.environ.get('SERVED_BOARDS') or '').split(',') if b]
+    BOARD_DATABASES = json.loads(os.environ.get('BOARD_DATABASES') or '{}')
+    # 'auto' uses SQLite FTS5 when available, otherwise an in-process index
+    SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND') or 'auto'
+    # Estimated Jaccard similarity of title/description shingles
+    DUPLICATE_CANDIDATE_THRESHOLD = float(os.environ.get('DUPLICATE_CANDIDATE_THRESHOLD') or 0.5)
+    # Creating a feature this similar to an existing one is rejected; 0 turns the check off
+    DUPLICATE_REJECT_THRESHOLD = float(os.environ.get('DUPLICATE_REJECT_THRESHOLD') or 0)
+    TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS') or 24)
+    # Number of reverse proxies in front of the app whose X-Forwarded-For is trusted for the client address
+    # (rate limits, fraud detection); 0 uses the connecting address
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR') or 0)
+    # Token buckets on write endpoints: refill rate in requests/second and burst size
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL') or 'memory://'
+    RATELIMIT_IP_RATE = float(os.environ.get('RATELIMIT_IP_RATE') or 1.0)
+    RATELIMIT_IP_BURST = int(os.environ.get('RATELIMIT_IP_BURST') or 20)
+    RATELIMIT_USER_RATE = float(os.environ.get('RATELIMIT_USER_RATE') or 0.5)
+    RATELIMIT_USER_BURST = int(os.environ.get('RATELIMIT_USER_BURST') or 10)
+    # Rows fetched per round trip when streaming the feature list (?stream=true)
+    STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE') or 1000)
+    # "Also voted for": neighbors kept per feature, and co-votes needed before a pair is related
+    RECOMMENDATIONS_NEIGHBORS = int(os.environ.get('RECOMMENDATIONS_NEIGHBORS') or 20)
+    RECOMMENDATIONS_MIN_CO_VOTES = int(os.environ.get('RECOMMENDATIONS_MIN_CO_VOTES') or 2)
+    # Hard cap on IDs accepted by one bulk feature lookup
+    BULK_LOOKUP_MAX_IDS = int(os.environ.get('BULK_LOOKUP_MAX_IDS') or 1000)
+    # Deleted features are hidden at once; their votes are removed later in chunks
+    PURGE_IN_BACKGROUND = os.environ.get('PURGE_IN_BACKGROUND', 'true').lower() == 'true'
+    PURGE_CHUNK_SIZE = int(os.environ.get('PURGE_CHUNK_SIZE') or 500)
+    # Admission control per worker: requests run at once (reads are shed beyond it), writers among them (never
+    # in the last ADMISSION_RESERVED_READS slots), shrunk in proportion as write latency exceeds its target
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'true').lower() == 'true'
+    ADMISSION_MAX_IN_FLIGHT = int(os.environ.get('ADMISSION_MAX_IN_FLIGHT') or 32)
+    ADMISSION_MAX_WRITERS = int(os.environ.get('ADMISSION_MAX_WRITERS') or 8)
+    ADMISSION_MIN_WRITERS = int(os.environ.get('ADMISSION_MIN_WRITERS') or 1)
+    ADMISSION_RESERVED_READS = int(os.environ.get('ADMISSION_RESERVED_READS') or 4)
+    ADMISSION_LATENCY_TARGET_MS = float(os.environ.get('ADMISSION_LATENCY_TARGET_MS') or 250)
+    # Responses kept for replaying retried requests that carry an Idempotency-Key. 'database://' keeps them in
+    # the shared database, so a retry reaching another worker is replayed too; 'memory://' suits one worker only
+    IDEMPOTENCY_STORAGE_URL = os.environ.get('IDEMPOTENCY_STORAGE_URL') or 'database://'
+    IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS') or 86400)
+    # Bounds the in-process store only
+    IDEMPOTENCY_MAX_KEYS = int(os.environ.get('IDEMPOTENCY_MAX_KEYS') or 10000)
+
+    # Service calls retried when SQLite is locked or a serializable transaction conflicts
+    TRANSACTION_RETRIES = int(os.environ.get('TRANSACTION_RETRIES') or 3)
+    TRANSACTION_RETRY_BASE_DELAY = float(os.environ.get('TRANSACTION_RETRY_BASE_DELAY') or 0.02)
+    TRANSACTION_RETRY_MAX_DELAY = float(os.environ.get('TRANSACTION_RETRY_MAX_DELAY') or 0.5)
+    # Import services, open pooled connections and fill caches before /api/ready reports ready
+    WARMUP_ON_STARTUP = os.environ.get('WARMUP_ON_STARTUP', 'false').lower() == 'true'
+    WARMUP_CONNECTIONS = int(os.environ.get('WARMUP_CONNECTIONS') or 5)
+    # Vote fraud detection: sliding-window bursts per IP, user-ID prefix and feature are quarantined. Off by
+    # default: behind a proxy every vote comes from one address unless PROXY_FIX_X_FOR is set. Each worker
+    # keeps its own windows, so with N workers a burst can reach N times a threshold before it is flagged
+    FRAUD_DETECTION_ENABLED = os.environ.get('FRAUD_DETECTION_ENABLED', 'false').lower() == 'true'
+    FRAUD_IN_BACKGROUND = os.environ.get('FRAUD_IN_BACKGROUND', 'true').lower() == 'true'
+    FRAUD_QUEUE_SIZE = int(os.environ.get('FRAUD_QUEUE_SIZE') or 10000)
+    FRAUD_WINDOW_SECONDS = float(os.environ.get('FRAUD_WINDOW_SECONDS') or 300)
+    FRAUD_IP_THRESHOLD = int(os.environ.get('FRAUD_IP_THRESHOLD') or 30)
+    FRAUD_PREFIX_THRESHOLD = int(os.environ.get('FRAUD_PREFIX_THRESHOLD') or 100)
+    FRAUD_FEATURE_THRESHOLD = int(os.environ.get('FRAUD_FEATURE_THRESHOLD') or 50)
+    # A feature burst is only flagged when distinct IPs are below this share of its votes
+    FRAUD_MIN_IP_DIVERSITY = float(os.environ.get('FRAUD_MIN_IP_DIVERSITY') or 0.2)
+    # Recount upvotes from the votes table every this many seconds (0 leaves it to `flask reconcile-votes`)
+    RECONCILE_INTERVAL_SECONDS = float(os.environ.get('RECONCILE_INTERVAL_SECONDS') or 0)
+    RECONCILE_CHUNK_SIZE = int(os.environ.get('RECONCILE_CHUNK_SIZE') or 1000)
+    # Move the votes of features nobody voted for in VOTE_ARCHIVE_AFTER_DAYS out of the votes table, every
+    # this many seconds (0 leaves it to `flask archive-votes`)
+    VOTE_ARCHIVE_INTERVAL_SECONDS = float(os.environ.get('VOTE_ARCHIVE_INTERVAL_SECONDS') or 0)
+    VOTE_ARCHIVE_AFTER_DAYS = float(os.environ.get('VOTE_ARCHIVE_AFTER_DAYS') or 180)
+    VOTE_ARCHIVE_CHUNK_SIZE = int(os.environ.get('VOTE_ARCHIVE_CHUNK_SIZE') or 500)
+    # Online backups: pages copied per step of the SQLite backup API, pause between steps for writers,
+    # and restarts caused by concurrent writes before the rest is copied in one step
+    BACKUP_DIR = os.environ.get('BACKUP_DIR') or 'backups'
+    BACKUP_PAGES_PER_STEP = int(os.environ.get('BACKUP_PAGES_PER_STEP') or 256)
+    BACKUP_STEP_SLEEP_SECONDS = float(os.environ.get('BACKUP_STEP_SLEEP_SECONDS') or 0.005)
+    BACKUP_MAX_RESTARTS = int(os.environ.get('BACKUP_MAX_RESTARTS') or 5)
+    # Bearer token for the /api/admin endpoints ('' disables them)
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN') or ''
+    # On-demand profiling of requests to these endpoints (view names, '*' for all; empty, at startup, installs
+    # no hooks) that send an X-Profile header carrying ADMIN_TOKEN; the newest profiles are kept in PROFILE_DIR
+    PROFILE_ENDPOINTS = [e for e in (os.environ.get('PROFILE_ENDPOINTS') or '').split(',') if e]
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or 'profiles'
+    PROFILE_MAX_STORED = int(os.environ.get('PROFILE_MAX_STORED') or 100)
+    # Change events between workers: local:// for one process, unix:///dir for processes on one host
+    EVENT_BUS_URL = os.environ.get('EVENT_BUS_URL') or 'local://'
+    # Upper bound on staleness of cached feature lists and user votes if an event is lost (0 disables)
+    CACHE_TTL_SECONDS = float(os.environ.get('CACHE_TTL_SECONDS') or 30)
+    # Directory of the feature-list read model shared by the workers on one host ('' to query per worker)
+    READ_MODEL_DIR = os.environ.get('READ_MODEL_DIR') or ''
+    # How long a read waits on an identical read already querying the database before giving up
+    SINGLE_FLIGHT_TIMEOUT_SECONDS = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT_SECONDS') or 10)
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -1,7 +1,38 @@
+import threading
+import weakref
 from flask_sqlalchemy import SQLAlchemy
+from boards import BoardRoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': BoardRoutingSession})
+
+_engine_state = weakref.WeakKeyDictionary()
+_engine_state_lock = threading.Lock()
 
 def init_db():
-    """Initialize database tables"""
-    db.create_all()
\ No newline at end of file
+    """Initialize database tables, upgrading those an older version created"""
+    # Models are otherwise only imported on first use of the services
+    import models
+    from migrations import upgrade_schema
+    
+    return upgrade_schema(db.engine)
+
+def get_engine_state(name, factory):
+    """Get (or lazily create) a per-engine object such as an in-process index"""
+    engine = db.session.get_bind()
+    with _engine_state_lock:
+        state = _engine_state.setdefault(engine, {})
+        if name not in state:
+            state[name] = factory()
+        return state[name]
+
+def peek_engine_state(name):
+    """Get a per-engine object only if it was already created"""
+    engine = db.session.get_bind()
+    with _engine_state_lock:
+        return _engine_state.get(engine, {}).get(name)
+
+
+def reset_engine_state():
+    """Drop every per-engine object, so each is rebuilt from the database on next use"""
+    with _engine_state_lock:
+        _engine_state.clear()
\ No newline at end of file
@@ -0,0 +1,5 @@
+from .detector import VoteAnomalyDetector, VoteEvent, user_prefix
+from .sketches import CountMinSketch, HyperLogLog, WindowedCountMinSketch, WindowedHyperLogLog
+
+__all__ = ['CountMinSketch', 'HyperLogLog', 'user_prefix', 'VoteAnomalyDetector', 'VoteEvent',
+           'WindowedCountMinSketch', 'WindowedHyperLogLog']
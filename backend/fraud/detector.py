@@ -0,0 +1,95 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from typing import NamedTuple, Optional
+from fraud.sketches import WindowedCountMinSketch, WindowedHyperLogLog
+
+# Minted IDs such as bot-0001, bot-0002 ... share the part before their trailing number
+TRAILING_NUMBER_RE = re.compile(r'[\W_]*\d+$')
+PREFIX_LENGTH = 16
+
+IP_BURST = 'ip_burst'
+USER_PREFIX_BURST = 'user_prefix_burst'
+FEATURE_BURST = 'feature_burst'
+
+def user_prefix(user_id: str) -> str:
+    """Group user IDs that differ only by a trailing counter"""
+    return TRAILING_NUMBER_RE.sub('', user_id.lower())[:PREFIX_LENGTH]
+
+class VoteEvent(NamedTuple):
+    vote_id: int
+    feature_id: int
+    user_id: str
+    client_ip: Optional[str]
+    at: float
+    board_id: str
+    
+    @classmethod
+    def from_vote(cls, vote, board_id: str) -> 'VoteEvent':
+        """Build an event from a vote row (created_at is naive UTC)"""
+        return cls(vote.id, vote.feature_id, vote.user_id, vote.client_ip,
+                   vote.created_at.replace(tzinfo=timezone.utc).timestamp(), board_id)
+
+class VoteAnomalyDetector:
+    """Flags bursts of votes using sliding-window sketches, in memory independent of traffic.
+    
+    A vote is flagged once its IP, its user-ID prefix or its feature has exceeded the
+    threshold within the window; votes below a threshold are the allowance and are kept.
+    Feature bursts only count when few distinct IPs are behind them.
+    """
+    
+    def __init__(self, window_seconds: float = 300, buckets: int = 5, ip_threshold: int = 30,
+                 prefix_threshold: int = 100, feature_threshold: int = 50, min_ip_diversity: float = 0.2,
+                 max_tracked_features: int = 5000):
+        self.ip_threshold = ip_threshold
+        self.prefix_threshold = prefix_threshold
+        self.feature_threshold = feature_threshold
+        self.min_ip_diversity = min_ip_diversity
+        self.max_tracked_features = max_tracked_features
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.votes_by_ip = WindowedCountMinSketch(window_seconds, buckets)
+        self.votes_by_prefix = WindowedCountMinSketch(window_seconds, buckets)
+        self.votes_by_feature = WindowedCountMinSketch(window_seconds, buckets)
+        # Distinct IPs per recently voted feature, least recently voted evicted first
+        self.ips_by_feature: 'OrderedDict[int, WindowedHyperLogLog]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config) -> 'VoteAnomalyDetector':
+        return cls(
+            window_seconds=config['FRAUD_WINDOW_SECONDS'],
+            ip_threshold=config['FRAUD_IP_THRESHOLD'],
+            prefix_threshold=config['FRAUD_PREFIX_THRESHOLD'],
+            feature_threshold=config['FRAUD_FEATURE_THRESHOLD'],
+            min_ip_diversity=config['FRAUD_MIN_IP_DIVERSITY']
+        )
+    
+    def _feature_ips(self, feature_id: int) -> WindowedHyperLogLog:
+        ips = self.ips_by_feature.pop(feature_id, None)
+        if ips is None:
+            ips = WindowedHyperLogLog(self.window_seconds, self.buckets)
+            if len(self.ips_by_feature) >= self.max_tracked_features:
+                self.ips_by_feature.popitem(last=False)
+        self.ips_by_feature[feature_id] = ips
+        return ips
+    
+    def observe(self, vote: VoteEvent) -> Optional[str]:
+        """Count a vote and return why it looks fraudulent, or None"""
+        with self._lock:
+            ip_votes = self.votes_by_ip.add(vote.client_ip, vote.at) if vote.client_ip else 0
+            prefix = user_prefix(vote.user_id)
+            prefix_votes = self.votes_by_prefix.add(prefix, vote.at) if prefix else 0
+            feature_votes = self.votes_by_feature.add(str(vote.feature_id), vote.at)
+            ips = self._feature_ips(vote.feature_id)
+            if vote.client_ip:
+                ips.add(vote.client_ip, vote.at)
+            
+            if ip_votes > self.ip_threshold:
+                return IP_BURST
+            if prefix_votes > self.prefix_threshold:
+                return USER_PREFIX_BURST
+            if feature_votes > self.feature_threshold and ips.count(vote.at) < self.min_ip_diversity * feature_votes:
+                return FEATURE_BURST
+            return None
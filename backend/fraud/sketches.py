@@ -0,0 +1,129 @@
+import hashlib
+import math
+from array import array
+from collections import deque
+from typing import Callable, Deque, Generic, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+def hash64(key: str) -> int:
+    """Stable 64-bit hash of a string (the same in every process, unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'big')
+
+class CountMinSketch:
+    """Approximate counts in fixed memory; estimates never undercount"""
+    
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.counters = array('I', bytes(4 * width * depth))
+    
+    def indexes(self, key: str) -> List[int]:
+        """Counter index of the key in each row (double hashing from one 64-bit hash)"""
+        value = hash64(key)
+        first, second = value >> 32, (value & 0xFFFFFFFF) | 1
+        return [row * self.width + (first + row * second) % self.width for row in range(self.depth)]
+    
+    def add(self, key: str, count: int = 1):
+        """Count occurrences of a key"""
+        for index in self.indexes(key):
+            self.counters[index] += count
+    
+    def estimate(self, key: str) -> int:
+        """Estimated count of a key (at least the true count)"""
+        return min(self.counters[index] for index in self.indexes(key))
+
+class HyperLogLog:
+    """Approximate distinct count in 2 ** precision bytes (standard error about 1.04 / sqrt(2 ** precision))"""
+    
+    def __init__(self, precision: int = 8):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+    
+    def add(self, key: str):
+        """Record a value"""
+        value = hash64(key)
+        index = value >> (64 - self.precision)
+        remainder = value & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+    
+    @staticmethod
+    def estimate_registers(registers: bytearray) -> float:
+        """Estimate the distinct count held by a set of registers"""
+        size = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / sum(2.0 ** -register for register in registers)
+        zeros = registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # Linear counting is more accurate while most registers are still empty
+            return size * math.log(size / zeros)
+        return estimate
+    
+    def count(self) -> float:
+        """Estimated number of distinct values added"""
+        return self.estimate_registers(self.registers)
+
+class SlidingWindow(Generic[T]):
+    """A window of `buckets` sub-sketches covering `window_seconds`; the oldest is dropped as time moves on"""
+    
+    def __init__(self, factory: Callable[[], T], window_seconds: float, buckets: int):
+        self.factory = factory
+        self.bucket_seconds = window_seconds / buckets
+        self.buckets = buckets
+        self.entries: Deque[Tuple[int, T]] = deque()
+    
+    def current(self, at: float) -> T:
+        """The sketch of the bucket containing `at` (late events go to the newest bucket)"""
+        index = int(at // self.bucket_seconds)
+        self.expire(at)
+        if not self.entries or self.entries[-1][0] < index:
+            self.entries.append((index, self.factory()))
+        return self.entries[-1][1]
+    
+    def expire(self, at: float):
+        """Drop buckets that fell out of the window"""
+        oldest = int(at // self.bucket_seconds) - self.buckets
+        while self.entries and self.entries[0][0] <= oldest:
+            self.entries.popleft()
+    
+    def live(self, at: float) -> List[T]:
+        """The sketches of every bucket still in the window"""
+        self.expire(at)
+        return [sketch for _, sketch in self.entries]
+
+class WindowedCountMinSketch:
+    """Count-min sketch over a sliding time window"""
+    
+    def __init__(self, window_seconds: float, buckets: int = 5, width: int = 2048, depth: int = 4):
+        self.window = SlidingWindow(lambda: CountMinSketch(width, depth), window_seconds, buckets)
+    
+    def add(self, key: str, at: float) -> int:
+        """Count one occurrence and return the key's estimated count over the window"""
+        sketch = self.window.current(at)
+        indexes = sketch.indexes(key)
+        for index in indexes:
+            sketch.counters[index] += 1
+        sketches = self.window.live(at)
+        # Sum each row across buckets before taking the minimum: tighter than summing per-bucket minima
+        return min(sum(bucket.counters[index] for bucket in sketches) for index in indexes)
+
+class WindowedHyperLogLog:
+    """Distinct count over a sliding time window (registers are merged by max)"""
+    
+    def __init__(self, window_seconds: float, buckets: int = 5, precision: int = 8):
+        self.window = SlidingWindow(lambda: HyperLogLog(precision), window_seconds, buckets)
+    
+    def add(self, key: str, at: float):
+        """Record a value seen at the given time"""
+        self.window.current(at).add(key)
+    
+    def count(self, at: float) -> float:
+        """Estimated distinct values over the window ending at the given time"""
+        sketches = self.window.live(at)
+        if not sketches:
+            return 0.0
+        merged = bytearray(max(values) for values in zip(*(sketch.registers for sketch in sketches)))
+        return HyperLogLog.estimate_registers(merged)
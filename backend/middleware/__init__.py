@@ -0,0 +1,6 @@
+from .admission import admission, AdmissionController
+from .idempotency import idempotency, Idempotency
+from .profiling import profiler, RequestProfiler
+from .rate_limit import rate_limiter, RateLimiter
+
+__all__ = ['admission', 'AdmissionController', 'idempotency', 'Idempotency', 'profiler', 'RequestProfiler', 'rate_limiter', 'RateLimiter']
@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from flask import current_app, jsonify, request
+
+# Endpoints (view function names) whose concurrency is capped; every other request counts as a read
+WRITE_ENDPOINTS = {'create_feature', 'delete_feature', 'upvote_feature', 'remove_vote'}
+# Blueprints never shed: probes must answer under overload, and operators must reach an overloaded worker
+EXEMPT_BLUEPRINTS = {'health', 'admin', 'board_admin'}
+# Weight of the newest write in the latency average
+LATENCY_SMOOTHING = 0.2
+
+class AdmissionState:
+    """In-flight requests of one worker process and the recent latency of its writes"""
+    
+    def __init__(self, max_in_flight: int, max_writers: int, min_writers: int, reserved_reads: int,
+                 latency_target: float, clock: Callable[[], float] = time.monotonic):
+        self.max_in_flight = max_in_flight
+        self.max_writers = max_writers
+        self.min_writers = min_writers
+        self.reserved_reads = reserved_reads
+        self.latency_target = latency_target
+        self.clock = clock
+        self.in_flight = 0
+        self.writers = 0
+        self.write_latency = 0.0
+        self.shed = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def writer_limit(self) -> int:
+        """Writers admitted at once: the cap, scaled down as write latency exceeds its target"""
+        if self.write_latency <= self.latency_target:
+            return self.max_writers
+        scaled = int(self.max_writers * self.latency_target / self.write_latency)
+        return max(self.min_writers, scaled)
+    
+    def admit(self, write: bool) -> Optional[float]:
+        """Take a slot for a request; returns its start time, or None if it must be shed"""
+        with self._lock:
+            if write:
+                # Writers never take the slots kept for reads
+                admitted = (self.writers < self.writer_limit
+                            and self.in_flight < self.max_in_flight - self.reserved_reads)
+            else:
+                admitted = self.in_flight < self.max_in_flight
+            if not admitted:
+                self.shed += 1
+                return None
+            self.in_flight += 1
+            if write:
+                self.writers += 1
+            return self.clock()
+    
+    def release(self, write: bool, started: float):
+        """Give a slot back, counting a write's duration in the recent write latency"""
+        with self._lock:
+            self.in_flight -= 1
+            if write:
+                self.writers -= 1
+                latency = self.clock() - started
+                self.write_latency += LATENCY_SMOOTHING * (latency - self.write_latency)
+    
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: about the time the admitted writes take to drain"""
+        return max(1, math.ceil(self.write_latency))
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'in_flight': self.in_flight, 'writers': self.writers, 'writer_limit': self.writer_limit,
+                    'write_latency_ms': round(self.write_latency * 1000, 3), 'shed': self.shed}
+
+class AdmissionController:
+    """Sheds writes with a fast 503 when too many are running or the database is slow, keeping reads served"""
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['admission_controller'] = self
+        app.before_request(self.admit)
+        app.teardown_request(self.release)
+    
+    @property
+    def state(self) -> AdmissionState:
+        """The admission state of the current app, created on first use"""
+        state = current_app.extensions.get('admission_state')
+        if state is None:
+            config = current_app.config
+            with self._lock:
+                state = current_app.extensions.setdefault('admission_state', AdmissionState(
+                    max_in_flight=config['ADMISSION_MAX_IN_FLIGHT'],
+                    max_writers=config['ADMISSION_MAX_WRITERS'],
+                    min_writers=config['ADMISSION_MIN_WRITERS'],
+                    reserved_reads=config['ADMISSION_RESERVED_READS'],
+                    latency_target=config['ADMISSION_LATENCY_TARGET_MS'] / 1000
+                ))
+        return state
+    
+    def admit(self):
+        """Admit the request or answer 503 with Retry-After before any work is done"""
+        if not current_app.config['ADMISSION_ENABLED'] or request.blueprint in EXEMPT_BLUEPRINTS:
+            return None
+        write = (request.endpoint or '').rsplit('.', 1)[-1] in WRITE_ENDPOINTS
+        state = self.state
+        started = state.admit(write)
+        if started is None:
+            response = jsonify({'error': 'Service overloaded, retry later'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(state.retry_after())
+            return response
+        request.environ['admission.slot'] = (state, write, started)
+        return None
+    
+    def release(self, exc=None):
+        """Free the request's slot once it is done, whatever the outcome"""
+        slot = request.environ.pop('admission.slot', None)
+        if slot is not None:
+            state, write, started = slot
+            state.release(write, started)
+
+admission = AdmissionController()
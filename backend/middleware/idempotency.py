@@ -0,0 +1,202 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, NamedTuple, Optional
+from flask import current_app, g, jsonify, request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from database import db
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+# Endpoints (view function names) whose responses are replayed for a repeated key
+IDEMPOTENT_ENDPOINTS = {'create_feature', 'delete_feature', 'upvote_feature', 'remove_vote'}
+# Throttled and failed responses are not final, so a retry must run the request again
+UNSTORED_STATUSES = {429}
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status: Optional[int]
+    body: bytes
+    content_type: Optional[str]
+    
+    @property
+    def in_flight(self) -> bool:
+        return self.status is None
+
+class IdempotencyStore:
+    """Bounded in-process store of responses by key, expiring after a TTL (only for a single worker)"""
+    
+    def __init__(self, max_keys: int = 10000, ttl: float = 86400.0, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self.clock = clock
+        self.entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _expire(self, now: float):
+        # Entries are kept in insertion order, so the oldest expire (or overflow) first
+        while self.entries:
+            key, (expires_at, _) = next(iter(self.entries.items()))
+            if len(self.entries) <= self.max_keys and expires_at > now:
+                break
+            del self.entries[key]
+    
+    def reserve(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Return the stored entry for a key, or reserve the key for this request and return None"""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            entry = self.entries.get(key)
+            if entry is not None:
+                return entry[1]
+            self.entries[key] = (now + self.ttl, StoredResponse(fingerprint, None, b'', None))
+            self._expire(now)
+            return None
+    
+    def complete(self, key: str, response: StoredResponse):
+        """Store the final response for a reserved key"""
+        with self._lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (self.clock() + self.ttl, response)
+    
+    def release(self, key: str):
+        """Forget a reserved key so the request can be retried"""
+        with self._lock:
+            self.entries.pop(key, None)
+
+class DatabaseIdempotencyStore:
+    """Responses by key in the shared database, so every worker replays them; a unique key reserves it once"""
+    
+    def __init__(self, engine, ttl: float = 86400.0, clock: Callable[[], datetime] = datetime.utcnow):
+        self.engine = engine
+        self.ttl = timedelta(seconds=ttl)
+        self.clock = clock
+    
+    @property
+    def table(self):
+        # Imported on first use, like the models behind the services
+        from models.idempotency_key import IdempotencyKey
+        
+        return IdempotencyKey.__table__
+    
+    def reserve(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Return the stored entry for a key, or reserve the key for this request and return None"""
+        table = self.table
+        for attempt in range(2):
+            now = self.clock()
+            try:
+                with self.engine.begin() as connection:
+                    connection.execute(delete(table).where(table.c.expires_at <= now))
+                    row = connection.execute(select(
+                        table.c.fingerprint, table.c.status, table.c.body, table.c.content_type
+                    ).where(table.c.key == key)).first()
+                    if row is not None:
+                        return StoredResponse(*row)
+                    connection.execute(insert(table).values(
+                        key=key, fingerprint=fingerprint, expires_at=now + self.ttl
+                    ))
+                    return None
+            except IntegrityError:
+                # Another worker reserved the key between the read and the insert: read its entry
+                if attempt:
+                    raise
+    
+    def complete(self, key: str, response: StoredResponse):
+        """Store the final response for a reserved key"""
+        table = self.table
+        with self.engine.begin() as connection:
+            connection.execute(update(table).where(table.c.key == key).values(
+                fingerprint=response.fingerprint, status=response.status, body=response.body,
+                content_type=response.content_type, expires_at=self.clock() + self.ttl
+            ))
+    
+    def release(self, key: str):
+        """Forget a reserved key so the request can be retried"""
+        table = self.table
+        with self.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.key == key))
+
+def create_store(url: str, config):
+    """Create an idempotency store from a storage URL"""
+    if url == 'database://':
+        return DatabaseIdempotencyStore(db.engine, ttl=config['IDEMPOTENCY_TTL_SECONDS'])
+    if url == 'memory://':
+        return IdempotencyStore(max_keys=config['IDEMPOTENCY_MAX_KEYS'], ttl=config['IDEMPOTENCY_TTL_SECONDS'])
+    raise ValueError(f"Unsupported idempotency storage: {url}")
+
+class Idempotency:
+    """Replays the stored response of mutating requests retried with the same Idempotency-Key"""
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['idempotency'] = self
+        app.before_request(self.replay)
+        app.after_request(self.remember)
+        app.teardown_request(self.teardown)
+    
+    @property
+    def store(self):
+        """The response store for the current app, created on first use"""
+        store = current_app.extensions.get('idempotency_store')
+        if store is None:
+            store = create_store(current_app.config['IDEMPOTENCY_STORAGE_URL'], current_app.config)
+            current_app.extensions['idempotency_store'] = store
+        return store
+    
+    @staticmethod
+    def _error(message: str, status: int):
+        response = jsonify({'error': message})
+        response.status_code = status
+        return response
+    
+    def replay(self):
+        """Answer a repeated key from the store before the view runs"""
+        key = request.headers.get(HEADER)
+        endpoint = (request.endpoint or '').rsplit('.', 1)[-1]
+        if not key or endpoint not in IDEMPOTENT_ENDPOINTS:
+            return None
+        if len(key) > MAX_KEY_LENGTH:
+            return self._error(f"{HEADER} must be at most {MAX_KEY_LENGTH} characters", 400)
+        
+        scoped_key = f'{request.method} {request.path} {key}'
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        stored = self.store.reserve(scoped_key, fingerprint)
+        if stored is None:
+            g.idempotency_key = scoped_key
+            g.idempotency_fingerprint = fingerprint
+            return None
+        if stored.fingerprint != fingerprint:
+            return self._error(f"{HEADER} was already used with a different request", 422)
+        if stored.in_flight:
+            return self._error(f"A request with this {HEADER} is still in progress", 409)
+        
+        response = current_app.response_class(stored.body, status=stored.status, content_type=stored.content_type)
+        response.headers['Idempotent-Replayed'] = 'true'
+        return response
+    
+    def remember(self, response):
+        """Store the response of a request that reserved a key"""
+        key = g.pop('idempotency_key', None)
+        if key is None:
+            return response
+        if response.status_code >= 500 or response.status_code in UNSTORED_STATUSES:
+            self.store.release(key)
+        else:
+            self.store.complete(key, StoredResponse(
+                g.pop('idempotency_fingerprint'), response.status_code, response.get_data(), response.content_type
+            ))
+        return response
+    
+    def teardown(self, exc=None):
+        """Release a key whose request never produced a response"""
+        key = g.pop('idempotency_key', None)
+        if key is not None:
+            self.store.release(key)
+
+idempotency = Idempotency()
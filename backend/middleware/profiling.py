@@ -0,0 +1,253 @@
+import cProfile
+import hmac
+import json
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from flask import current_app, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+HEADER = 'X-Profile'
+HEADER_ENVIRON_KEY = 'HTTP_X_PROFILE'
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+TOP_FUNCTIONS = 15
+TOP_STATEMENTS = 10
+# Application functions reported in the Server-Timing header
+TIMING_FUNCTIONS = 5
+
+class RequestProfile:
+    """cProfile run of one request, with the time spent in SQL statements tallied separately"""
+    
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.profiler = cProfile.Profile()
+        self.statements: Dict[str, List[float]] = {}
+        self.sql_seconds = 0.0
+        self.sql_queries = 0
+        self.started = time.perf_counter()
+        self.wall_seconds = 0.0
+    
+    def record_query(self, statement: str, seconds: float):
+        self.sql_seconds += seconds
+        self.sql_queries += 1
+        tally = self.statements.setdefault(statement, [0, 0.0])
+        tally[0] += 1
+        tally[1] += seconds
+    
+    def summary(self) -> Dict[str, Any]:
+        """Top functions by time (application code and overall) and SQL statements"""
+        stats = pstats.Stats(self.profiler).stats
+        rows, app_rows = [], []
+        for key, (_, calls, own, cumulative, _) in stats.items():
+            row = (self._name(key), calls, own, cumulative)
+            rows.append(row)
+            if self._is_app_code(key[0]):
+                app_rows.append(row)
+        
+        def top(candidates, index, limit=TOP_FUNCTIONS):
+            return [{'function': name, 'calls': calls, 'own_ms': round(own * 1000, 3),
+                     'cumulative_ms': round(cumulative * 1000, 3)}
+                    for name, calls, own, cumulative in sorted(candidates, key=lambda row: -row[index])[:limit]]
+        
+        statements = sorted(self.statements.items(), key=lambda item: -item[1][1])[:TOP_STATEMENTS]
+        return {
+            'wall_ms': round(self.wall_seconds * 1000, 3),
+            'sql_ms': round(self.sql_seconds * 1000, 3),
+            'sql_queries': self.sql_queries,
+            'python_ms': round((self.wall_seconds - self.sql_seconds) * 1000, 3),
+            'app_functions': top(app_rows, 3),
+            'own_time': top(rows, 2),
+            'statements': [{'statement': statement[:500], 'count': count, 'total_ms': round(seconds * 1000, 3)}
+                           for statement, (count, seconds) in statements]
+        }
+    
+    @staticmethod
+    def _is_app_code(filename: str) -> bool:
+        # The backend's own modules, not a virtualenv inside it or this middleware
+        return (filename.startswith(BACKEND_DIR + os.sep) and 'site-packages' not in filename
+                and filename != os.path.abspath(__file__))
+    
+    @staticmethod
+    def _name(key) -> str:
+        filename, line, function = key
+        if filename.startswith(BACKEND_DIR + os.sep):
+            filename = os.path.relpath(filename, BACKEND_DIR)
+        elif filename != '~':
+            filename = os.path.basename(filename)
+        return f'{filename}:{line}({function})' if filename != '~' else function
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar('active_profile', default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile.get() is not None:
+        conn.info.setdefault('profile_query_started', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    started = conn.info.get('profile_query_started')
+    if profile is not None and started:
+        profile.record_query(statement, time.perf_counter() - started.pop())
+
+class ProfileStore:
+    """Full profiles (pstats dumps) and their summaries in a directory, keeping the newest max_profiles"""
+    
+    def __init__(self, directory: str, max_profiles: int = 100):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+    
+    def save(self, profile: RequestProfile, summary: Dict[str, Any]):
+        os.makedirs(self.directory, exist_ok=True)
+        profile.profiler.dump_stats(os.path.join(self.directory, f'{profile.id}.prof'))
+        with open(os.path.join(self.directory, f'{profile.id}.json'), 'w') as f:
+            json.dump(summary, f)
+        with self._lock:
+            for stale in self._ids()[self.max_profiles:]:
+                for extension in ('json', 'prof'):
+                    try:
+                        os.remove(os.path.join(self.directory, f'{stale}.{extension}'))
+                    except FileNotFoundError:
+                        pass
+    
+    def _ids(self) -> List[str]:
+        # Newest first
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        paths.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        return [entry.name[:-len('.json')] for entry in paths]
+    
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the stored profiles without their function tables, newest first"""
+        profiles = []
+        for profile_id in self._ids():
+            summary = self.summary(profile_id)
+            if summary is not None:
+                profiles.append({key: value for key, value in summary.items()
+                                 if key not in ('app_functions', 'own_time', 'statements')})
+        return profiles
+    
+    def summary(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """The summary of a stored profile, or None"""
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        try:
+            with open(os.path.join(self.directory, f'{profile_id}.json')) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+    
+    def path(self, profile_id: str) -> Optional[str]:
+        """The pstats file of a stored profile, or None"""
+        if not PROFILE_ID_RE.match(profile_id):
+            return None
+        path = os.path.join(self.directory, f'{profile_id}.prof')
+        return path if os.path.isfile(path) else None
+
+class RequestProfiler:
+    """Profiles requests to allowlisted endpoints that carry X-Profile: <ADMIN_TOKEN>.
+    
+    Without PROFILE_ENDPOINTS no hook is registered at all, and SQL execution is only hooked from
+    the first profiled request on.
+    """
+    
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['request_profiler'] = self
+        if not app.config['PROFILE_ENDPOINTS']:
+            return
+        app.before_request(self.start)
+        app.after_request(self.finish)
+        app.teardown_request(self.teardown)
+    
+    @property
+    def store(self) -> ProfileStore:
+        """The profile store of the current app, created on first use"""
+        store = current_app.extensions.get('profile_store')
+        if store is None:
+            store = current_app.extensions.setdefault('profile_store', ProfileStore(
+                current_app.config['PROFILE_DIR'], current_app.config['PROFILE_MAX_STORED']
+            ))
+        return store
+    
+    def _requested(self) -> bool:
+        config = current_app.config
+        endpoints, token = config['PROFILE_ENDPOINTS'], config['ADMIN_TOKEN']
+        if not endpoints or not token:
+            return False
+        endpoint = (request.endpoint or '').rsplit('.', 1)[-1]
+        if '*' not in endpoints and endpoint not in endpoints:
+            return False
+        return hmac.compare_digest(request.headers.get(HEADER, '').encode(), token.encode())
+    
+    def _listen(self):
+        # Registered once, on the first profiled request, for every engine (board databases included)
+        with self._lock:
+            if not self._listening:
+                event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+                self._listening = True
+    
+    def start(self):
+        """Start profiling the request if it asked to be and is allowed to"""
+        if HEADER_ENVIRON_KEY not in request.environ or not self._requested():
+            return None
+        self._listen()
+        profile = RequestProfile()
+        try:
+            profile.profiler.enable()
+        except ValueError:
+            # Another profiler is already running in this thread
+            return None
+        request.environ['profiling.token'] = _active_profile.set(profile)
+        return None
+    
+    def finish(self, response):
+        """Stop profiling, store the profile and attach its summary as Server-Timing"""
+        profile = self._stop()
+        if profile is None:
+            return response
+        summary = profile.summary()
+        summary.update({'id': profile.id, 'method': request.method, 'path': request.full_path.rstrip('?'),
+                        'endpoint': request.endpoint, 'status': response.status_code,
+                        'created_at': datetime.utcnow().isoformat()})
+        self.store.save(profile, summary)
+        
+        timings = [f"total;dur={summary['wall_ms']}",
+                   f"sql;dur={summary['sql_ms']};desc=\"{summary['sql_queries']} queries\"",
+                   f"python;dur={summary['python_ms']}"]
+        for index, function in enumerate(summary['app_functions'][:TIMING_FUNCTIONS]):
+            timings.append(f"fn{index};dur={function['cumulative_ms']};desc=\"{function['function']}\"")
+        response.headers['Server-Timing'] = ', '.join(timings)
+        response.headers['X-Profile-Id'] = profile.id
+        return response
+    
+    def teardown(self, exc=None):
+        """Stop a profile whose request never produced a response"""
+        self._stop()
+    
+    @staticmethod
+    def _stop() -> Optional[RequestProfile]:
+        token = request.environ.pop('profiling.token', None)
+        if token is None:
+            return None
+        profile = _active_profile.get()
+        profile.profiler.disable()
+        profile.wall_seconds = time.perf_counter() - profile.started
+        _active_profile.reset(token)
+        return profile
+
+profiler = RequestProfiler()
@@ -0,0 +1,162 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+from flask import current_app, jsonify, request
+
+# Endpoints (view function names) that cost a write and are throttled
+LIMITED_ENDPOINTS = {'create_feature', 'upvote_feature', 'remove_vote'}
+USER_KEYED_ENDPOINTS = {'upvote_feature', 'remove_vote'}
+
+class MemoryRateLimitStore:
+    """In-process token buckets: O(1) state per active key, idle keys evicted in LRU order"""
+    
+    def __init__(self, max_keys: int = 100000, idle_timeout: float = 600.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self.buckets: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take tokens from a bucket; returns (allowed, seconds until enough tokens)"""
+        with self._lock:
+            now = self.clock()
+            tokens, updated = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self.buckets[key] = (tokens, now)
+            self._evict(now)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+    
+    def refund(self, key: str, rate: float, capacity: float, cost: float = 1.0):
+        """Give back tokens taken by consume(), up to the bucket's capacity"""
+        with self._lock:
+            if key in self.buckets:
+                tokens, updated = self.buckets[key]
+                self.buckets[key] = (min(capacity, tokens + cost), updated)
+    
+    def _evict(self, now: float):
+        # Least recently used keys sit at the front; an idle bucket has refilled, so dropping it is lossless
+        while self.buckets:
+            key, (tokens, updated) = next(iter(self.buckets.items()))
+            if len(self.buckets) <= self.max_keys and now - updated < self.idle_timeout:
+                break
+            del self.buckets[key]
+
+class RedisRateLimitStore:
+    """Token buckets shared by every worker through Redis (requires the optional redis package)"""
+    
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return {allowed, tostring(tokens)}
+    """
+    REFUND_SCRIPT = """
+    local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+    if tokens then
+        redis.call('HSET', KEYS[1], 'tokens', math.min(tonumber(ARGV[1]), tokens + tonumber(ARGV[2])))
+    end
+    """
+    
+    def __init__(self, client, prefix: str = 'ratelimit:', clock: Callable[[], float] = time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+        self._script = client.register_script(self.SCRIPT)
+        self._refund_script = client.register_script(self.REFUND_SCRIPT)
+    
+    @classmethod
+    def from_url(cls, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis package is required for a redis:// rate limit store")
+        return cls(redis.Redis.from_url(url))
+    
+    def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take tokens from a bucket; returns (allowed, seconds until enough tokens)"""
+        allowed, tokens = self._script(keys=[self.prefix + key], args=[rate, capacity, self.clock(), cost])
+        tokens = float(tokens)
+        return bool(allowed), 0.0 if allowed else (cost - tokens) / rate
+    
+    def refund(self, key: str, rate: float, capacity: float, cost: float = 1.0):
+        """Give back tokens taken by consume(), up to the bucket's capacity"""
+        self._refund_script(keys=[self.prefix + key], args=[capacity, cost])
+
+def create_store(url: str):
+    """Create a rate limit store from a storage URL"""
+    if url.startswith('redis://') or url.startswith('rediss://'):
+        return RedisRateLimitStore.from_url(url)
+    if url == 'memory://':
+        return MemoryRateLimitStore()
+    raise ValueError(f"Unsupported rate limit storage: {url}")
+
+class RateLimiter:
+    """Token-bucket throttling of write endpoints, keyed by client IP and voting user"""
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['rate_limiter'] = self
+        app.before_request(self.check)
+    
+    @property
+    def store(self):
+        """The bucket store for the current app, created on first use"""
+        store = current_app.extensions.get('rate_limit_store')
+        if store is None:
+            store = create_store(current_app.config['RATELIMIT_STORAGE_URL'])
+            current_app.extensions['rate_limit_store'] = store
+        return store
+    
+    def _keys(self, endpoint: str):
+        config = current_app.config
+        yield f'ip:{request.remote_addr}', config['RATELIMIT_IP_RATE'], config['RATELIMIT_IP_BURST']
+        if endpoint in USER_KEYED_ENDPOINTS:
+            # Runs before the view validates the body, so anything but a string user_id is keyed by IP only
+            data = request.get_json(silent=True)
+            user_id = data.get('user_id') if isinstance(data, dict) else None
+            if isinstance(user_id, str) and user_id.strip():
+                user_id = user_id.strip()
+                yield f'user:{user_id}', config['RATELIMIT_USER_RATE'], config['RATELIMIT_USER_BURST']
+    
+    def check(self):
+        """Reject the request with 429 when one of its buckets is empty; a rejected request costs no tokens"""
+        endpoint = (request.endpoint or '').rsplit('.', 1)[-1]
+        if endpoint not in LIMITED_ENDPOINTS or not current_app.config['RATELIMIT_ENABLED']:
+            return None
+        
+        consumed = []
+        for key, rate, capacity in self._keys(endpoint):
+            allowed, retry_after = self.store.consume(key, rate, capacity)
+            if not allowed:
+                for taken in consumed:
+                    self.store.refund(*taken)
+                response = jsonify({'error': 'Too many requests'})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                return response
+            consumed.append((key, rate, capacity))
+        return None
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,76 @@
+import logging
+from datetime import datetime
+from typing import List
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+# The search index table is created on first use; one without these columns predates boards,
+# one without the option predates its prefix indexes
+FTS_TABLE = 'features_fts'
+FTS_COLUMNS = {'title', 'description', 'board_id'}
+FTS_OPTION = 'prefix='
+
+def _column_ddl(column: sa.Column, dialect) -> str:
+    ddl = f'{dialect.identifier_preparer.quote(column.name)} {column.type.compile(dialect=dialect)}'
+    default = column.default.arg if column.default is not None and column.default.is_scalar else None
+    if default is not None:
+        literal = sa.literal(default, column.type).compile(dialect=dialect, compile_kwargs={'literal_binds': True})
+        ddl += f' DEFAULT {literal}'
+    if not column.nullable:
+        if default is None:
+            raise RuntimeError(f"Cannot add {column.table.name}.{column.name}: NOT NULL without a default")
+        ddl += ' NOT NULL'
+    return ddl
+
+def upgrade_schema(engine: sa.engine.Engine) -> List[str]:
+    """Bring a database created by an older version up to the current models; returns the changes made.
+    
+    Idempotent: missing tables are created, missing columns added (existing rows get the column's
+    default), missing indexes and settings created, and an outdated search index table dropped to be rebuilt.
+    """
+    from database import db
+    
+    changes = []
+    with engine.begin() as connection:
+        inspector = sa.inspect(connection)
+        existing = set(inspector.get_table_names())
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing:
+                table.create(connection)
+                changes.append(f'created table {table.name}')
+                continue
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns:
+                    connection.execute(sa.text(
+                        f'ALTER TABLE {table.name} ADD COLUMN {_column_ddl(column, connection.dialect)}'
+                    ))
+                    changes.append(f'added column {table.name}.{column.name}')
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(connection)
+                    changes.append(f'created index {index.name}')
+        
+        # The trending epoch, created here rather than by the first (concurrent) votes
+        from services.trending_service import EPOCH_KEY
+        
+        settings = db.metadata.tables['settings']
+        if connection.execute(sa.select(settings.c.id).where(settings.c.key == EPOCH_KEY)).first() is None:
+            now = datetime.utcnow()
+            connection.execute(settings.insert().values(key=EPOCH_KEY, value=now.isoformat(), created_at=now,
+                                                        updated_at=now))
+            changes.append(f'created setting {EPOCH_KEY}')
+        
+        if connection.dialect.name == 'sqlite' and FTS_TABLE in existing:
+            columns = {row[1] for row in connection.execute(sa.text(f'PRAGMA table_info({FTS_TABLE})'))}
+            definition = connection.execute(
+                sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': FTS_TABLE}
+            ).scalar()
+            if not FTS_COLUMNS <= columns or FTS_OPTION not in definition:
+                connection.execute(sa.text(f'DROP TABLE {FTS_TABLE}'))
+                changes.append(f'dropped outdated {FTS_TABLE} (rebuilt on first search)')
+    for change in changes:
+        logger.info("Schema upgrade of %s: %s", engine.url, change)
+    return changes
@@ -1,4 +1,8 @@
+from .archived_vote import ArchivedVote
 from .feature import Feature
+from .idempotency_key import IdempotencyKey
+from .setting import Setting
 from .vote import Vote
+from .vote_rollup import VoteRollup
 
-__all__ = ['Feature', 'Vote']
\ No newline at end of file
+__all__ = ['ArchivedVote', 'Feature', 'IdempotencyKey', 'Setting', 'Vote', 'VoteRollup']
\ No newline at end of file
@@ -0,0 +1,24 @@
+from database import db
+from models.base import BaseModel
+
+# A vote moved out of the votes table once its feature went quiet, keeping the vote's own timestamps
+class ArchivedVote(BaseModel):
+    __tablename__ = 'archived_votes'
+    
+    # ID of the row in votes (IDs of deleted votes can be reused, so this is not the key)
+    vote_id = db.Column(db.Integer, nullable=False)
+    feature_id = db.Column(db.Integer, db.ForeignKey('features.id', ondelete='CASCADE'), nullable=False)
+    user_id = db.Column(db.String(100), nullable=False)
+    client_ip = db.Column(db.String(45))
+    quarantined_at = db.Column(db.DateTime)
+    quarantine_reason = db.Column(db.String(50))
+    archived_at = db.Column(db.DateTime, nullable=False)
+    
+    # Looked up by user (voted IDs, duplicate checks) and walked by feature (counts, purges)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'feature_id', name='unique_user_feature_archived_vote'),
+        db.Index('ix_archived_votes_feature', 'feature_id', 'quarantined_at'),
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedVote user:{self.user_id} feature:{self.feature_id}>'
@@ -1,21 +1,55 @@
 from database import db
+from boards import DEFAULT_BOARD
+from models.archived_vote import ArchivedVote
 from models.base import BaseModel
 
 class Feature(BaseModel):
     __tablename__ = 'features'
     
+    board_id = db.Column(db.String(64), default=DEFAULT_BOARD, nullable=False)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
     author = db.Column(db.String(100), nullable=False)
     upvotes = db.Column(db.Integer, default=0, nullable=False)
+    # Sum of exponentially decayed vote weights relative to the trending epoch
+    trending_score = db.Column(db.Float, default=0.0, nullable=False)
+    # Set when the feature is deleted; its votes and row are purged later in the background
+    deleted_at = db.Column(db.DateTime, index=True)
+    # Set once some of its votes were moved to archived_votes, the only features whose votes are looked up there
+    votes_archived_at = db.Column(db.DateTime)
+    # Storage bookkeeping left out of the API representation (and of the shared list read model)
+    INTERNAL_COLUMNS = frozenset({'votes_archived_at'})
     
-    # Relationship with votes
-    votes = db.relationship('Vote', backref='feature', lazy='dynamic', cascade='all, delete-orphan')
+    # List queries are always scoped to one board, so every ordering index leads with board_id
+    __table_args__ = (
+        db.Index('ix_features_board_upvotes', 'board_id', 'upvotes', 'created_at'),
+        db.Index('ix_features_board_trending', 'board_id', 'trending_score', 'created_at'),
+        # Date ranges and newest/oldest, then one author's features by date or by votes
+        db.Index('ix_features_board_created', 'board_id', 'created_at'),
+        db.Index('ix_features_board_author_created', 'board_id', 'author', 'created_at'),
+        db.Index('ix_features_board_author_upvotes', 'board_id', 'author', 'upvotes', 'created_at'),
+    )
+    
+    # Relationship with votes (the database cascades deletes, so votes are never loaded to delete them)
+    votes = db.relationship('Vote', backref='feature', lazy='dynamic', cascade='all, delete-orphan',
+                            passive_deletes=True)
+    
+    @classmethod
+    def public_columns(cls):
+        """The table columns that make up a feature's API representation"""
+        return [column for column in cls.__table__.columns if column.name not in cls.INTERNAL_COLUMNS]
     
     def __repr__(self):
         return f'<Feature {self.title}>'
     
-    def to_dict(self):
+    def to_dict(self, votes_count=None):
         data = super().to_dict()
-        data['votes_count'] = self.votes.count()
+        for column in self.INTERNAL_COLUMNS:
+            del data[column]
+        # Callers that already aggregated the count pass it in to avoid a COUNT query per feature
+        if votes_count is None:
+            votes_count = self.votes.filter_by(quarantined_at=None).count()
+            if self.votes_archived_at is not None:
+                votes_count += ArchivedVote.query.filter_by(feature_id=self.id, quarantined_at=None).count()
+        data['votes_count'] = votes_count
         return data
\ No newline at end of file
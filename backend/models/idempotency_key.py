@@ -0,0 +1,18 @@
+from database import db
+from models.base import BaseModel
+
+class IdempotencyKey(BaseModel):
+    """A request reserved under an Idempotency-Key, and its response once complete"""
+    __tablename__ = 'idempotency_keys'
+    
+    # Method, path and the client's key
+    key = db.Column(db.String(1024), unique=True, nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # Null while the request is in flight
+    status = db.Column(db.Integer)
+    body = db.Column(db.LargeBinary, nullable=False, default=b'')
+    content_type = db.Column(db.String(255))
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key}>'
@@ -0,0 +1,11 @@
+from database import db
+from models.base import BaseModel
+
+class Setting(BaseModel):
+    __tablename__ = 'settings'
+    
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    value = db.Column(db.String(255), nullable=False)
+    
+    def __repr__(self):
+        return f'<Setting {self.key}={self.value}>'
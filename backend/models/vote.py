@@ -4,8 +4,12 @@ from models.base import BaseModel
 class Vote(BaseModel):
     __tablename__ = 'votes'
     
-    feature_id = db.Column(db.Integer, db.ForeignKey('features.id'), nullable=False)
+    feature_id = db.Column(db.Integer, db.ForeignKey('features.id', ondelete='CASCADE'), nullable=False)
     user_id = db.Column(db.String(100), nullable=False)
+    client_ip = db.Column(db.String(45))
+    # Set when the fraud detector pulls the vote out of the feature's counts; the row is kept for review
+    quarantined_at = db.Column(db.DateTime)
+    quarantine_reason = db.Column(db.String(50))
     
     # Unique constraint to prevent duplicate votes
     __table_args__ = (db.UniqueConstraint('feature_id', 'user_id', name='unique_user_feature_vote'),)
@@ -0,0 +1,19 @@
+from database import db
+from models.base import BaseModel
+
+class VoteRollup(BaseModel):
+    __tablename__ = 'vote_rollups'
+    
+    feature_id = db.Column(db.Integer, db.ForeignKey('features.id', ondelete='CASCADE'), nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)
+    bucket = db.Column(db.DateTime, nullable=False)
+    # Net votes added during the bucket (removals count as -1)
+    delta = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('feature_id', 'granularity', 'bucket', name='unique_feature_rollup_bucket'),
+        db.Index('ix_vote_rollups_granularity_bucket', 'granularity', 'bucket'),
+    )
+    
+    def __repr__(self):
+        return f'<VoteRollup feature:{self.feature_id} {self.granularity}:{self.bucket} {self.delta:+d}>'
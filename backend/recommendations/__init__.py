@@ -0,0 +1,3 @@
+from .covote import CoVoteMatrix
+
+__all__ = ['CoVoteMatrix']
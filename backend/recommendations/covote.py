@@ -0,0 +1,151 @@
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+
+class CoVoteMatrix:
+    """Sparse feature x feature co-vote counts with precomputed top-K neighbor lists.
+    
+    The bulk of the counts lives in a CSR matrix built in one sparse product; votes cast since then
+    are kept as per-row deltas and folded into the matrix once there are enough of them.
+    """
+    
+    def __init__(self, neighbors: int = 20, min_co_votes: int = 2, compact_threshold: int = 50000):
+        self.k = neighbors
+        self.min_co_votes = min_co_votes
+        self.compact_threshold = compact_threshold
+        self.feature_ids = np.zeros(0, dtype=np.int64)
+        self.positions: Dict[int, int] = {}
+        self.vote_counts = np.zeros(0, dtype=np.int64)
+        self.base = sparse.csr_matrix((0, 0), dtype=np.int64)
+        self.delta: Dict[int, Dict[int, int]] = {}
+        self.delta_size = 0
+        self.neighbors: Dict[int, List[Tuple[int, int, float]]] = {}
+        self._lock = threading.RLock()
+    
+    def build(self, feature_ids: Sequence[int], user_codes: Sequence[int]):
+        """Replace the counts with those of the given votes (parallel arrays, users as dense integer codes)"""
+        feature_ids = np.asarray(feature_ids, dtype=np.int64)
+        user_codes = np.asarray(user_codes, dtype=np.int64)
+        features, columns = np.unique(feature_ids, return_inverse=True)
+        users = int(user_codes.max()) + 1 if len(user_codes) else 0
+        # users x features incidence matrix; its Gram matrix holds the co-vote counts
+        votes = sparse.csr_matrix((np.ones(len(columns), dtype=np.int64), (user_codes, columns)),
+                                  shape=(users, len(features)))
+        votes.data[:] = 1
+        co_votes = (votes.T @ votes).tocsr()
+        co_votes.setdiag(0)
+        co_votes.eliminate_zeros()
+        
+        with self._lock:
+            self.feature_ids = features
+            self.positions = {int(feature_id): i for i, feature_id in enumerate(features)}
+            self.vote_counts = np.asarray(votes.sum(axis=0), dtype=np.int64).ravel()
+            self.base = co_votes
+            self.delta = {}
+            self.delta_size = 0
+            self.neighbors = {i: self._top(i) for i in range(len(features))}
+    
+    def add_vote(self, feature_id: int, other_feature_ids: Iterable[int]):
+        """Count a new vote on a feature by a user who also voted for the other features"""
+        self._apply(feature_id, other_feature_ids, 1)
+    
+    def remove_vote(self, feature_id: int, other_feature_ids: Iterable[int]):
+        """Uncount a vote on a feature by a user who still votes for the other features"""
+        self._apply(feature_id, other_feature_ids, -1)
+    
+    def related(self, feature_id: int, limit: int) -> List[Tuple[int, int, float]]:
+        """Return up to `limit` (feature_id, co_votes, score) neighbors, best first"""
+        with self._lock:
+            position = self.positions.get(feature_id)
+            if position is None:
+                return []
+            neighbors = self.neighbors.get(position)
+            if neighbors is None:
+                neighbors = self.neighbors[position] = self._top(position)
+            return neighbors[:limit]
+    
+    def vote_count(self, feature_id: int) -> int:
+        """The number of counted votes on a feature"""
+        with self._lock:
+            position = self.positions.get(feature_id)
+            return 0 if position is None else int(self.vote_counts[position])
+    
+    def _apply(self, feature_id: int, other_feature_ids: Iterable[int], delta: int):
+        with self._lock:
+            position = self._position(feature_id)
+            self.vote_counts[position] = max(0, self.vote_counts[position] + delta)
+            # The feature's popularity changed, so its score in every co-voted feature's list did too
+            for other in self._row(position)[0].tolist():
+                self.neighbors.pop(other, None)
+            self.neighbors.pop(position, None)
+            for other_id in other_feature_ids:
+                if other_id == feature_id:
+                    continue
+                other = self._position(other_id)
+                self._bump(position, other, delta)
+                self._bump(other, position, delta)
+                # Neighbor lists are recomputed from the updated row on their next read
+                self.neighbors.pop(other, None)
+            if self.delta_size >= self.compact_threshold:
+                self._compact()
+    
+    def _position(self, feature_id: int) -> int:
+        position = self.positions.get(feature_id)
+        if position is None:
+            position = self.positions[feature_id] = len(self.feature_ids)
+            self.feature_ids = np.append(self.feature_ids, feature_id)
+            self.vote_counts = np.append(self.vote_counts, 0)
+        return position
+    
+    def _bump(self, row: int, column: int, delta: int):
+        cells = self.delta.setdefault(row, {})
+        if column not in cells:
+            self.delta_size += 1
+        cells[column] = cells.get(column, 0) + delta
+    
+    def _compact(self):
+        # Fold the deltas into the CSR matrix in one vectorised sparse addition
+        size = len(self.feature_ids)
+        rows, columns, values = [], [], []
+        for row, cells in self.delta.items():
+            rows.extend([row] * len(cells))
+            columns.extend(cells.keys())
+            values.extend(cells.values())
+        changes = sparse.csr_matrix((np.asarray(values, dtype=np.int64), (rows, columns)), shape=(size, size))
+        base = self.base.copy()
+        base.resize((size, size))
+        self.base = (base + changes).tocsr()
+        self.base.eliminate_zeros()
+        self.delta = {}
+        self.delta_size = 0
+    
+    def _row(self, position: int) -> Tuple[np.ndarray, np.ndarray]:
+        if position < self.base.shape[0]:
+            start, end = self.base.indptr[position], self.base.indptr[position + 1]
+            columns, counts = self.base.indices[start:end], self.base.data[start:end]
+        else:
+            columns, counts = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        cells = self.delta.get(position)
+        if cells:
+            columns = np.concatenate([columns, np.fromiter(cells.keys(), dtype=np.int64, count=len(cells))])
+            counts = np.concatenate([counts, np.fromiter(cells.values(), dtype=np.int64, count=len(cells))])
+            columns, inverse = np.unique(columns, return_inverse=True)
+            counts = np.bincount(inverse, weights=counts).astype(np.int64)
+        return columns, counts
+    
+    def _top(self, position: int) -> List[Tuple[int, int, float]]:
+        columns, counts = self._row(position)
+        keep = counts >= self.min_co_votes
+        columns, counts = columns[keep], counts[keep]
+        if not len(columns):
+            return []
+        
+        # Cosine similarity of the two features' voter sets, so popular features don't top every list
+        totals = np.maximum(self.vote_counts[columns], 1) * max(int(self.vote_counts[position]), 1)
+        scores = counts / np.sqrt(totals)
+        if len(columns) > self.k:
+            best = np.argpartition(-scores, self.k - 1)[:self.k]
+            columns, counts, scores = columns[best], counts[best], scores[best]
+        order = np.lexsort((self.feature_ids[columns], -counts, -scores))
+        return [(int(self.feature_ids[columns[i]]), int(counts[i]), round(float(scores[i]), 4)) for i in order]
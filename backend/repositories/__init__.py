@@ -1,4 +1,9 @@
+from .analytics_repository import AnalyticsRepository
+from .duplicate_repository import DuplicateRepository
 from .feature_repository import FeatureRepository
+from .recommendation_repository import RecommendationRepository
+from .search_repository import SearchRepository
+from .setting_repository import SettingRepository
 from .vote_repository import VoteRepository
 
-__all__ = ['FeatureRepository', 'VoteRepository']
\ No newline at end of file
+__all__ = ['AnalyticsRepository', 'DuplicateRepository', 'FeatureRepository', 'RecommendationRepository', 'SearchRepository', 'SettingRepository', 'VoteRepository']
\ No newline at end of file
@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, update
+from repositories.base import BaseRepository
+from models.archived_vote import ArchivedVote
+from models.feature import Feature
+from models.vote import Vote
+from models.vote_rollup import VoteRollup
+from database import db
+from transactions import save_changes
+from boards import current_board
+
+# Rows per multi-VALUES upsert
+UPSERT_CHUNK_SIZE = 100
+
+RollupKey = Tuple[int, str, datetime]
+
+# Tables a backfill counts votes from; each is paginated by its own IDs
+VOTE_MODELS = (ArchivedVote, Vote)
+VOTE_MODELS_BY_TABLE = {model.__tablename__: model for model in VOTE_MODELS}
+
+class AnalyticsRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(VoteRollup)
+    
+    def add_deltas(self, deltas: Dict[RollupKey, int], commit: bool = True):
+        """Add deltas to (feature_id, granularity, bucket) rollups, creating missing rows"""
+        rows = [
+            {'feature_id': feature_id, 'granularity': granularity, 'bucket': bucket, 'delta': delta}
+            for (feature_id, granularity, bucket), delta in deltas.items() if delta
+        ]
+        dialect = db.session.get_bind().dialect.name
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start:start + UPSERT_CHUNK_SIZE]
+            if dialect in ('sqlite', 'postgresql'):
+                self._upsert(chunk, dialect)
+            else:
+                self._update_or_insert(chunk)
+        if commit:
+            save_changes()
+    
+    def _upsert(self, rows: List[dict], dialect: str):
+        # Dialect modules are imported on first use; the postgresql one is slow to import
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        now = datetime.utcnow()
+        statement = insert(VoteRollup).values([dict(row, created_at=now, updated_at=now) for row in rows])
+        statement = statement.on_conflict_do_update(
+            index_elements=['feature_id', 'granularity', 'bucket'],
+            set_={'delta': VoteRollup.delta + statement.excluded.delta, 'updated_at': now}
+        )
+        db.session.execute(statement)
+    
+    def _update_or_insert(self, rows: List[dict]):
+        for row in rows:
+            result = db.session.execute(update(VoteRollup).where(
+                VoteRollup.feature_id == row['feature_id'],
+                VoteRollup.granularity == row['granularity'],
+                VoteRollup.bucket == row['bucket']
+            ).values(delta=VoteRollup.delta + row['delta']))
+            if result.rowcount == 0:
+                db.session.add(VoteRollup(**row))
+    
+    def get_series(self, feature_id: int, granularity: str, since: datetime,
+                   until: Optional[datetime] = None) -> List[VoteRollup]:
+        """Get a feature's rollups in a time range, oldest first"""
+        query = VoteRollup.query.filter(
+            VoteRollup.feature_id == feature_id,
+            VoteRollup.granularity == granularity,
+            VoteRollup.bucket >= since
+        )
+        if until is not None:
+            query = query.filter(VoteRollup.bucket < until)
+        return query.order_by(VoteRollup.bucket).all()
+    
+    def get_top_movers(self, granularity: str, since: datetime, limit: int) -> List[Tuple[int, int]]:
+        """Get (feature_id, net votes) for the features that gained the most since a time"""
+        total = func.sum(VoteRollup.delta).label('total')
+        rows = db.session.query(VoteRollup.feature_id, total).join(
+            Feature, Feature.id == VoteRollup.feature_id
+        ).filter(
+            Feature.board_id == current_board(),
+            VoteRollup.granularity == granularity,
+            VoteRollup.bucket >= since
+        ).group_by(VoteRollup.feature_id).order_by(total.desc()).limit(limit)
+        return [(row.feature_id, row.total) for row in rows]
+    
+    def delete_all(self, commit: bool = True):
+        """Remove every rollup (before a backfill)"""
+        db.session.execute(delete(VoteRollup))
+        if commit:
+            save_changes()
+    
+    def delete_for_feature(self, feature_id: int):
+        """Remove a feature's rollups"""
+        db.session.execute(delete(VoteRollup).where(VoteRollup.feature_id == feature_id))
+        save_changes()
+    
+    def get_vote_high_water_marks(self) -> Dict[str, int]:
+        """Highest vote ID of each table the backfill reads, archived votes first"""
+        return {model.__tablename__: db.session.query(func.max(model.id)).scalar() or 0
+                for model in VOTE_MODELS}
+    
+    def get_vote_chunk(self, table: str, after_id: int, max_id: int, chunk_size: int) -> List[Tuple]:
+        """Get (id, feature_id, created_at, quarantined_at) of a table's votes in an ID range, in ID order"""
+        model = VOTE_MODELS_BY_TABLE[table]
+        return db.session.query(model.id, model.feature_id, model.created_at, model.quarantined_at).filter(
+            model.id > after_id, model.id <= max_id
+        ).order_by(model.id).limit(chunk_size).all()
@@ -1,4 +1,5 @@
 from database import db
+from transactions import save_changes
 from typing import List, Optional, Type, TypeVar
 
 T = TypeVar('T')
@@ -11,7 +12,7 @@ class BaseRepository:
         """Create a new instance"""
         instance = self.model(**kwargs)
         db.session.add(instance)
-        db.session.commit()
+        save_changes()
         return instance
     
     def get_by_id(self, id: int) -> Optional[T]:
@@ -26,17 +27,17 @@ class BaseRepository:
         """Update an instance"""
         for key, value in kwargs.items():
             setattr(instance, key, value)
-        db.session.commit()
+        save_changes()
         return instance
     
     def delete(self, instance: T) -> bool:
         """Delete an instance"""
         db.session.delete(instance)
-        db.session.commit()
+        save_changes()
         return True
     
     def save(self, instance: T) -> T:
         """Save an instance"""
         db.session.add(instance)
-        db.session.commit()
+        save_changes()
         return instance
\ No newline at end of file
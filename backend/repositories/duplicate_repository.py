@@ -0,0 +1,244 @@
+import logging
+import random
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from flask import current_app
+from database import db, get_engine_state, peek_engine_state
+from boards import current_board, use_board
+from models.feature import Feature
+from repositories.search_repository import tokenize
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 3
+# Only the start of long descriptions is shingled, keeping signatures cheap to compute
+MAX_DESCRIPTION_CHARS = 300
+
+def shingles(title: str, description: Optional[str] = None) -> Set[int]:
+    """Hash the character 3-grams of a normalised title and description"""
+    value = ' '.join(tokenize(title) + tokenize(description[:MAX_DESCRIPTION_CHARS] if description else None))
+    if len(value) <= SHINGLE_SIZE:
+        return {zlib.crc32(value.encode())} if value else set()
+    return {zlib.crc32(value[i:i + SHINGLE_SIZE].encode()) for i in range(len(value) - SHINGLE_SIZE + 1)}
+
+class MinHashLSHIndex:
+    """MinHash signatures bucketed by LSH bands for sub-linear similarity lookups"""
+    persistent = False
+
+    def __init__(self, board_id: str, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        self.board_id = board_id
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        rng = random.Random(seed)
+        self.permutations = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                             for _ in range(num_perm)]
+        self.signatures: Dict[int, Tuple[int, ...]] = {}
+        self.buckets: List[Dict[Tuple[int, ...], Set[int]]] = [defaultdict(set) for _ in range(bands)]
+        self._loaded = False
+        # Guards the index, only briefly held: reads and changes never wait for a build
+        self._lock = threading.RLock()
+        # Changes made while the index is being built, replayed on the built index: (feature_id, signature,
+        # or None for a removal); None when no build is running
+        self._pending: Optional[List[Tuple[int, Optional[Tuple[int, ...]]]]] = None
+        self._build_lock = threading.Lock()
+        self._builder: Optional[threading.Thread] = None
+        self._builder_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def signature(self, title: str, description: Optional[str] = None) -> Tuple[int, ...]:
+        """Compute the MinHash signature of a feature's text"""
+        hashes = shingles(title, description)
+        if not hashes:
+            return tuple([MERSENNE_PRIME] * self.num_perm)
+        return tuple(min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in self.permutations)
+
+    def _bands(self, signature: Tuple[int, ...]) -> Iterable[Tuple[int, Tuple[int, ...]]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def ensure(self):
+        """Build the index from the features table on first use"""
+        if self._loaded:
+            return
+        with self._build_lock:
+            if self._loaded:
+                return
+            with self._lock:
+                self._pending = []
+            try:
+                # Built apart from this index, so nothing waits on the signatures being computed
+                built = MinHashLSHIndex(self.board_id, self.num_perm, self.bands, self.seed)
+                rows = db.session.query(Feature.id, Feature.title, Feature.description).filter(
+                    Feature.board_id == self.board_id, Feature.deleted_at.is_(None)
+                ).yield_per(1000)
+                for feature_id, title, description in rows:
+                    built._add(feature_id, built.signature(title, description))
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                self.signatures, self.buckets = built.signatures, built.buckets
+                for feature_id, signature in self._pending:
+                    if signature is None:
+                        self._remove(feature_id)
+                    else:
+                        self._add(feature_id, signature)
+                self._pending = None
+                self._loaded = True
+
+    def build_in_background(self, app) -> threading.Thread:
+        """Start building the index on a background thread, unless it is already built or being built"""
+        with self._builder_lock:
+            if self._builder is None or (not self._loaded and not self._builder.is_alive()):
+                self._builder = threading.Thread(target=self._build, args=(app,),
+                                                 name=f'duplicate-index-{self.board_id}', daemon=True)
+                self._builder.start()
+            return self._builder
+
+    def _build(self, app):
+        with app.app_context(), use_board(self.board_id):
+            try:
+                self.ensure()
+            except Exception:
+                logger.exception("Building the duplicate index of board %s failed", self.board_id)
+
+    def _add(self, feature_id: int, signature: Tuple[int, ...]):
+        self._remove(feature_id)
+        self.signatures[feature_id] = signature
+        for band, key in self._bands(signature):
+            self.buckets[band][key].add(feature_id)
+
+    def _remove(self, feature_id: int):
+        signature = self.signatures.pop(feature_id, None)
+        if signature is None:
+            return
+        for band, key in self._bands(signature):
+            bucket = self.buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(feature_id)
+                if not bucket:
+                    del self.buckets[band][key]
+
+    def add(self, feature_id: int, title: str, description: Optional[str]):
+        """Index a feature, if the index is built (or being built)"""
+        if not self._loaded and self._pending is None:
+            return
+        self._change(feature_id, self.signature(title, description))
+
+    def remove(self, feature_id: int):
+        """Remove a feature from the index, if it is built (or being built)"""
+        self._change(feature_id, None)
+
+    def _change(self, feature_id: int, signature: Optional[Tuple[int, ...]]):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((feature_id, signature))
+            elif not self._loaded:
+                return
+            elif signature is None:
+                self._remove(feature_id)
+            else:
+                self._add(feature_id, signature)
+
+    def similarity(self, left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+        """Estimate the Jaccard similarity of two signatures"""
+        return sum(1 for a, b in zip(left, right) if a == b) / self.num_perm
+
+    def query(self, title: str, description: Optional[str], threshold: float) -> List[Tuple[int, float]]:
+        """Return (feature_id, similarity) pairs at or above the threshold, most similar first"""
+        self.ensure()
+        signature = self.signature(title, description)
+        with self._lock:
+            candidates = set()
+            for band, key in self._bands(signature):
+                candidates.update(self.buckets[band].get(key, ()))
+            matches = [(feature_id, self.similarity(signature, self.signatures[feature_id]))
+                       for feature_id in candidates]
+        matches = [match for match in matches if match[1] >= threshold]
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches
+
+    def clusters(self, threshold: float) -> List[List[int]]:
+        """Group every indexed feature with its near-duplicates (union-find over LSH buckets)"""
+        self.ensure()
+        parent: Dict[int, int] = {}
+
+        def find(node: int) -> int:
+            while parent.setdefault(node, node) != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        with self._lock:
+            checked = set()
+            for buckets in self.buckets:
+                for members in buckets.values():
+                    if len(members) < 2:
+                        continue
+                    ordered = sorted(members)
+                    for i, left in enumerate(ordered):
+                        for right in ordered[i + 1:]:
+                            if (left, right) in checked:
+                                continue
+                            checked.add((left, right))
+                            if self.similarity(self.signatures[left], self.signatures[right]) >= threshold:
+                                parent[find(right)] = find(left)
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for node in parent:
+            groups[find(node)].append(node)
+        return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=lambda g: g[0])
+
+class DuplicateRepository:
+    @property
+    def index(self) -> MinHashLSHIndex:
+        """The near-duplicate index of the current board"""
+        board_id = current_board()
+        return get_engine_state(f'duplicate_index:{board_id}', lambda: MinHashLSHIndex(board_id))
+
+    def add(self, feature: Feature):
+        """Add a feature to the near-duplicate index"""
+        self.index.add(feature.id, feature.title, feature.description)
+
+    def remove(self, feature_id: int):
+        """Remove a feature from the near-duplicate index"""
+        self.index.remove(feature_id)
+
+    def apply_remote_add(self, feature_id: int, title: str, description: Optional[str]):
+        """Mirror a feature created by another process into this process's index, if built"""
+        index = peek_engine_state(f'duplicate_index:{current_board()}')
+        if index is not None:
+            index.add(feature_id, title, description)
+    
+    def apply_remote_remove(self, feature_id: int):
+        """Mirror a feature deleted by another process out of this process's index, if built"""
+        index = peek_engine_state(f'duplicate_index:{current_board()}')
+        if index is not None:
+            index.remove(feature_id)
+    
+    def find_similar(self, title: str, description: Optional[str], threshold: float) -> List[Tuple[int, float]]:
+        """Find indexed features whose text is similar to the given text.
+        
+        Signatures are computed in pure Python, so a request never builds the index: until warm-up or the
+        background build started here has finished, nothing is similar.
+        """
+        index = self.index
+        if not index.loaded:
+            index.build_in_background(current_app._get_current_object())
+            return []
+        return index.query(title, description, threshold)
+
+    def clusters(self, threshold: float) -> List[List[int]]:
+        """Cluster all indexed features into groups of near-duplicates"""
+        return self.index.clusters(threshold)
@@ -1,25 +1,238 @@
-from typing import List
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import bindparam, case, delete, func, literal, select, tuple_, update
 from repositories.base import BaseRepository
+from models.archived_vote import ArchivedVote
 from models.feature import Feature
+from models.vote import Vote
 from database import db
+from transactions import save_changes
+from boards import current_board
+
+# Keeps each IN list well below SQLite's bound-parameter limit
+IN_CHUNK_SIZE = 500
+
+# List orderings by name: sort columns and direction. Each is served by one of the board-leading indexes
+# on features; those end in the row id, so the id tie-breaker is free and gives every row a unique position
+LIST_ORDERS = {
+    'votes': ((Feature.upvotes, Feature.created_at, Feature.id), 'desc'),
+    'trending': ((Feature.trending_score, Feature.created_at, Feature.id), 'desc'),
+    'newest': ((Feature.created_at, Feature.id), 'desc'),
+    'oldest': ((Feature.created_at, Feature.id), 'asc'),
+}
+
+# List filters by name, each turning its value into a bound condition (created_* make a half-open range)
+LIST_FILTERS = {
+    'author': lambda value: Feature.author == value,
+    'created_after': lambda value: Feature.created_at >= value,
+    'created_before': lambda value: Feature.created_at < value,
+    'min_upvotes': lambda value: Feature.upvotes >= value,
+}
+
+def _archived_votes_count(feature_id, votes_archived_at):
+    # Only evaluated for features that had votes archived, so other rows never touch the archive
+    count = select(func.count(ArchivedVote.id)).where(
+        ArchivedVote.feature_id == feature_id, ArchivedVote.quarantined_at.is_(None)
+    ).scalar_subquery()
+    return case((votes_archived_at.isnot(None), count), else_=0)
 
 class FeatureRepository(BaseRepository):
     def __init__(self):
         super().__init__(Feature)
     
-    def get_all_ordered_by_votes(self) -> List[Feature]:
+    def active(self):
+        """Query for the current board's features that have not been soft-deleted"""
+        return Feature.query.filter(Feature.board_id == current_board(), Feature.deleted_at.is_(None))
+    
+    def create(self, **kwargs) -> Feature:
+        """Create a feature on the current board"""
+        kwargs.setdefault('board_id', current_board())
+        return super().create(**kwargs)
+    
+    def get_by_id(self, id: int) -> Optional[Feature]:
+        """Get a feature of the current board by ID, unless it has been deleted"""
+        feature = Feature.query.get(id)
+        if feature is None or feature.deleted_at is not None or feature.board_id != current_board():
+            return None
+        return feature
+    
+    def get_all(self) -> List[Feature]:
+        """Get all features that have not been deleted"""
+        return self.active().all()
+    
+    def get_all_ordered_by_votes(self, limit: Optional[int] = None) -> List[Feature]:
         """Get all features ordered by upvotes (descending) and creation date"""
-        return Feature.query.order_by(Feature.upvotes.desc(), Feature.created_at.desc()).all()
+        return self.active().order_by(Feature.upvotes.desc(), Feature.created_at.desc()).limit(limit).all()
+    
+    def get_all_ordered_by_trending(self, limit: Optional[int] = None) -> List[Feature]:
+        """Get all features ordered by decayed trending score (descending) and creation date"""
+        return self.active().order_by(Feature.trending_score.desc(), Feature.created_at.desc()).limit(limit).all()
+    
+    def list_statement(self, *columns, sort: str = 'votes', filters: Optional[Dict[str, Any]] = None):
+        """Select columns of the board's features in a named order, narrowed by named filters.
+        
+        Only orders in LIST_ORDERS and filters in LIST_FILTERS are accepted, and filter values are
+        always bound parameters.
+        """
+        if sort not in LIST_ORDERS:
+            raise ValueError(f"Unknown sort: {sort}")
+        unknown = set(filters or ()) - set(LIST_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+        conditions = [LIST_FILTERS[name](value) for name, value in (filters or {}).items() if value is not None]
+        order_columns, direction = LIST_ORDERS[sort]
+        return select(*columns).where(
+            Feature.board_id == current_board(), Feature.deleted_at.is_(None), *conditions
+        ).order_by(*(getattr(column, direction)() for column in order_columns))
+    
+    def iter_ordered_with_vote_counts(self, sort: str = 'votes', limit: Optional[int] = None,
+                                      chunk_size: Optional[int] = None,
+                                      filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Stream filtered features as plain rows with their vote counts, in one read or chunk_size rows per read.
+        
+        Each chunk is its own short read that resumes after the last row of the previous one (keyset
+        pagination), so no cursor, and none of SQLite's read lock, is held while the caller consumes rows.
+        """
+        # Correlated count served by the (feature_id, user_id) unique index, so no per-row query or big aggregate
+        votes_count = select(func.count(Vote.id)).where(
+            Vote.feature_id == Feature.id, Vote.quarantined_at.is_(None)
+        ).scalar_subquery() + _archived_votes_count(Feature.id, Feature.votes_archived_at)
+        statement = self.list_statement(
+            *Feature.public_columns(), votes_count.label('votes_count'), sort=sort, filters=filters
+        )
+        order_columns, direction = LIST_ORDERS[sort]
+        position = tuple_(*order_columns)
+        remaining = limit
+        last = None
+        while remaining is None or remaining > 0:
+            size = remaining if chunk_size is None else min(chunk_size, remaining or chunk_size)
+            chunk = statement
+            if last is not None:
+                after = tuple_(*(literal(value, column.type) for column, value in zip(order_columns, last)))
+                chunk = chunk.where(position < after if direction == 'desc' else position > after)
+            rows = db.session.execute(chunk.limit(size)).mappings().all()
+            yield from (dict(row) for row in rows)
+            if size is None or len(rows) < size:
+                return
+            if remaining is not None:
+                remaining -= len(rows)
+            last = tuple(rows[-1][column.key] for column in order_columns)
     
-    def increment_upvotes(self, feature: Feature) -> Feature:
+    def get_by_ids(self, ids: List[int]) -> List[Feature]:
+        """Get features whose IDs are in the given list"""
+        if not ids:
+            return []
+        return self.active().filter(Feature.id.in_(ids)).all()
+    
+    def get_by_ids_with_vote_counts(self, ids: List[int]) -> List[Tuple[Feature, int]]:
+        """Get features by ID together with their vote counts, one query per chunk of IDs"""
+        results = []
+        for start in range(0, len(ids), IN_CHUNK_SIZE):
+            chunk = ids[start:start + IN_CHUNK_SIZE]
+            counts = db.session.query(Vote.feature_id, func.count(Vote.id).label('votes_count')).filter(
+                Vote.feature_id.in_(chunk), Vote.quarantined_at.is_(None)
+            ).group_by(Vote.feature_id).subquery()
+            votes_count = func.coalesce(counts.c.votes_count, 0) + _archived_votes_count(
+                Feature.id, Feature.votes_archived_at
+            )
+            rows = db.session.query(Feature, votes_count).outerjoin(
+                counts, counts.c.feature_id == Feature.id
+            ).filter(Feature.id.in_(chunk), Feature.board_id == current_board(), Feature.deleted_at.is_(None))
+            results.extend((feature, votes_count) for feature, votes_count in rows)
+        return results
+    
+    def soft_delete(self, feature: Feature) -> Feature:
+        """Mark a feature as deleted so reads no longer return it"""
+        feature.deleted_at = datetime.utcnow()
+        save_changes()
+        return feature
+    
+    def mark_votes_archived(self, feature_ids: List[int]):
+        """Record that these features' votes are (partly) in the archive (without committing)"""
+        db.session.execute(update(Feature).where(
+            Feature.id.in_(feature_ids), Feature.votes_archived_at.is_(None)
+        ).values(votes_archived_at=datetime.utcnow(), updated_at=Feature.updated_at))
+    
+    def get_deleted_ids(self, limit: int) -> List[int]:
+        """Get IDs of soft-deleted features waiting to be purged"""
+        rows = db.session.query(Feature.id).filter(
+            Feature.board_id == current_board(), Feature.deleted_at.isnot(None)
+        ).order_by(Feature.id).limit(limit)
+        return [row.id for row in rows]
+    
+    def purge(self, feature_id: int) -> bool:
+        """Remove a soft-deleted feature row with a bulk delete (its votes must already be gone)"""
+        result = db.session.execute(
+            delete(Feature).where(Feature.id == feature_id, Feature.deleted_at.isnot(None))
+        )
+        save_changes()
+        return result.rowcount > 0
+    
+    def increment_upvotes(self, feature: Feature, trending_weight: float = 0.0) -> Feature:
         """Increment upvotes for a feature"""
         feature.upvotes += 1
-        db.session.commit()
+        if trending_weight:
+            feature.trending_score = Feature.trending_score + trending_weight
+        save_changes()
         return feature
     
-    def decrement_upvotes(self, feature: Feature) -> Feature:
+    def decrement_upvotes(self, feature: Feature, trending_weight: float = 0.0) -> Feature:
         """Decrement upvotes for a feature"""
         if feature.upvotes > 0:
             feature.upvotes -= 1
-            db.session.commit()
-        return feature
\ No newline at end of file
+            if trending_weight:
+                feature.trending_score = case(
+                    (Feature.trending_score > trending_weight, Feature.trending_score - trending_weight),
+                    else_=0.0
+                )
+            save_changes()
+        return feature
+    
+    def get_upvote_drift_chunk(self, after_id: int, limit: int) -> List[Tuple[int, int, int]]:
+        """Get (id, upvotes, counted votes) of the next `limit` board features after after_id, in id order"""
+        # One statement, so the stored counter and the aggregate come from the same snapshot
+        features = select(Feature.id, Feature.upvotes, Feature.votes_archived_at).where(
+            Feature.board_id == current_board(), Feature.deleted_at.is_(None), Feature.id > after_id
+        ).order_by(Feature.id).limit(limit).subquery()
+        counts = select(Vote.feature_id, func.count(Vote.id).label('votes_count')).join(
+            features, features.c.id == Vote.feature_id
+        ).where(Vote.quarantined_at.is_(None)).group_by(Vote.feature_id).subquery()
+        rows = db.session.execute(
+            select(features.c.id, features.c.upvotes, func.coalesce(counts.c.votes_count, 0) + _archived_votes_count(
+                features.c.id, features.c.votes_archived_at
+            )).outerjoin(
+                counts, counts.c.feature_id == features.c.id
+            ).order_by(features.c.id)
+        )
+        return [tuple(row) for row in rows]
+    
+    def compare_and_set_upvotes(self, changes: List[Tuple[int, int, int]]) -> int:
+        """Apply (id, expected, upvotes) changes to rows whose upvotes still equal expected (without committing).
+        
+        Returns the number of rows changed; the others were changed by someone else in the meantime.
+        """
+        if not changes:
+            return 0
+        statement = update(Feature.__table__).where(
+            Feature.id == bindparam('feature_id'), Feature.upvotes == bindparam('expected')
+        ).values(upvotes=bindparam('actual'), updated_at=Feature.updated_at)
+        result = db.session.connection().execute(statement, [
+            {'feature_id': feature_id, 'expected': expected, 'actual': upvotes}
+            for feature_id, expected, upvotes in changes
+        ])
+        return result.rowcount
+    
+    def scale_trending_scores(self, factor: float):
+        """Multiply every trending score by a decay factor (without committing)"""
+        db.session.execute(update(Feature).values(
+            trending_score=Feature.trending_score * factor, updated_at=Feature.updated_at
+        ))
+    
+    def replace_trending_scores(self, scores: Dict[int, float]):
+        """Reset all trending scores to zero, then set the given ones (without committing)"""
+        db.session.execute(update(Feature).values(trending_score=0.0, updated_at=Feature.updated_at))
+        if scores:
+            db.session.execute(
+                update(Feature),
+                [{'id': feature_id, 'trending_score': score} for feature_id, score in scores.items()]
+            )
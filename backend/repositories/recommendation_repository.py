@@ -0,0 +1,160 @@
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import literal, select, union_all
+from database import db, get_engine_state, peek_engine_state
+from boards import current_board
+from models.archived_vote import ArchivedVote
+from models.feature import Feature
+from models.vote import Vote
+
+class CoVoteIndex:
+    """The co-vote matrix of one board, loaded from the votes table on first use"""
+    
+    def __init__(self, board_id: str, neighbors: int, min_co_votes: int, chunk_size: int):
+        self.board_id = board_id
+        self.neighbors = neighbors
+        self.min_co_votes = min_co_votes
+        self.chunk_size = chunk_size
+        self.matrix = None
+        # Votes up to this ID are already in the loaded counts
+        self.loaded_vote_id = 0
+        # Changes committed while the matrix is being read, applied once it is built: (vote_id, feature_id,
+        # the user's voted features right after the change, added); None when no build is running
+        self._pending: Optional[List[Tuple[Optional[int], int, List[int], bool]]] = None
+        self._pending_lock = threading.Lock()
+        self._lock = threading.RLock()
+    
+    def ensure(self):
+        """Build the matrix from the votes table on first use"""
+        if self.matrix is not None:
+            return
+        with self._lock:
+            if self.matrix is not None:
+                return
+            # numpy/scipy are only imported once recommendations are actually used
+            from recommendations.covote import CoVoteMatrix
+            
+            with self._pending_lock:
+                self._pending = []
+            try:
+                loaded_vote_id, matrix = self._build(CoVoteMatrix)
+            except BaseException:
+                with self._pending_lock:
+                    self._pending = None
+                raise
+            with self._pending_lock:
+                pending, self._pending = self._pending, None
+                self.loaded_vote_id = loaded_vote_id
+                self.matrix = matrix
+            for vote_id, feature_id, voted_feature_ids, added in pending:
+                self._apply(vote_id, feature_id, voted_feature_ids, added)
+    
+    def _build(self, matrix_class):
+        feature_ids, user_codes, users = array('q'), array('q'), {}
+        votes = select(Vote.id, Vote.feature_id, Vote.user_id).join(
+            Feature, Feature.id == Vote.feature_id
+        ).where(
+            Feature.board_id == self.board_id, Feature.deleted_at.is_(None), Vote.quarantined_at.is_(None)
+        )
+        # Archived votes count too; they never arrive through add_vote, so their IDs are not tracked
+        archived = select(literal(0), ArchivedVote.feature_id, ArchivedVote.user_id).join(
+            Feature, Feature.id == ArchivedVote.feature_id
+        ).where(
+            Feature.board_id == self.board_id, Feature.deleted_at.is_(None),
+            ArchivedVote.quarantined_at.is_(None)
+        )
+        statement = union_all(votes, archived).execution_options(yield_per=self.chunk_size)
+        loaded_vote_id = 0
+        # Core rows on the session's connection, a chunk at a time, skip the ORM's per-row work
+        for chunk in db.session.connection().execute(statement).partitions():
+            vote_ids, chunk_feature_ids, user_ids = zip(*chunk)
+            feature_ids.extend(chunk_feature_ids)
+            user_codes.extend([users.setdefault(user_id, len(users)) for user_id in user_ids])
+            loaded_vote_id = max(loaded_vote_id, max(vote_ids))
+        
+        matrix = matrix_class(neighbors=self.neighbors, min_co_votes=self.min_co_votes)
+        matrix.build(feature_ids, user_codes)
+        return loaded_vote_id, matrix
+    
+    def add_vote(self, vote_id: Optional[int], feature_id: int, user_id: str):
+        """Count a committed vote, if the matrix is built (or being built) and does not include it yet"""
+        self._change(vote_id, feature_id, user_id, True)
+    
+    def remove_vote(self, feature_id: int, user_id: str):
+        """Uncount a vote that was deleted or quarantined, if the matrix is built (or being built)"""
+        self._change(None, feature_id, user_id, False)
+    
+    def _change(self, vote_id: Optional[int], feature_id: int, user_id: str, added: bool):
+        if self._pending is None and self.matrix is None:
+            return
+        # Read now, so a queued change pairs with the user's votes as they were when it was committed
+        voted_feature_ids = self._voted_feature_ids(user_id)
+        # Queued without waiting while a build runs; the build applies it once done
+        with self._pending_lock:
+            if self._pending is not None:
+                self._pending.append((vote_id, feature_id, voted_feature_ids, added))
+                return
+        with self._lock:
+            if self.matrix is not None:
+                self._apply(vote_id, feature_id, voted_feature_ids, added)
+    
+    def _apply(self, vote_id: Optional[int], feature_id: int, voted_feature_ids: List[int], added: bool):
+        if not added:
+            self.matrix.remove_vote(feature_id, voted_feature_ids)
+        elif vote_id is None or vote_id > self.loaded_vote_id:
+            self.matrix.add_vote(feature_id, voted_feature_ids)
+    
+    def related(self, feature_id: int, limit: int) -> List[Tuple[int, int, float]]:
+        """Return (feature_id, co_votes, score) neighbors of a feature, best first"""
+        self.ensure()
+        return self.matrix.related(feature_id, limit)
+    
+    def vote_counts(self, feature_ids: List[int]) -> Dict[int, int]:
+        """Counted votes of the given features, as tracked by the matrix"""
+        self.ensure()
+        return {feature_id: self.matrix.vote_count(feature_id) for feature_id in feature_ids}
+    
+    def _voted_feature_ids(self, user_id: str) -> List[int]:
+        voted = select(Vote.feature_id).join(Feature, Feature.id == Vote.feature_id).where(
+            Vote.user_id == user_id, Feature.board_id == self.board_id, Feature.deleted_at.is_(None),
+            Vote.quarantined_at.is_(None)
+        )
+        archived = select(ArchivedVote.feature_id).join(Feature, Feature.id == ArchivedVote.feature_id).where(
+            ArchivedVote.user_id == user_id, Feature.board_id == self.board_id, Feature.deleted_at.is_(None),
+            ArchivedVote.quarantined_at.is_(None)
+        )
+        statement = union_all(voted, archived)
+        return [row.feature_id for row in db.session.execute(statement)]
+
+class RecommendationRepository:
+    @property
+    def index(self) -> CoVoteIndex:
+        """The co-vote index of the current board"""
+        board_id = current_board()
+        config = current_app.config
+        return get_engine_state(f'covote_index:{board_id}', lambda: CoVoteIndex(
+            board_id, config['RECOMMENDATIONS_NEIGHBORS'], config['RECOMMENDATIONS_MIN_CO_VOTES'],
+            config['STREAM_CHUNK_SIZE']
+        ))
+    
+    def related(self, feature_id: int, limit: int) -> List[Tuple[int, int, float]]:
+        """Get the features most often voted for together with the given one"""
+        return self.index.related(feature_id, limit)
+    
+    def vote_counts(self, feature_ids: List[int]) -> Dict[int, int]:
+        """Get the vote counts the index holds for features, without counting vote rows"""
+        return self.index.vote_counts(feature_ids)
+    
+    def add_vote(self, feature_id: int, user_id: str, vote_id: Optional[int] = None):
+        """Count a committed vote in this process's index, if built"""
+        index = peek_engine_state(f'covote_index:{current_board()}')
+        if index is not None:
+            index.add_vote(vote_id, feature_id, user_id)
+    
+    def remove_vote(self, feature_id: int, user_id: str):
+        """Uncount a removed or quarantined vote in this process's index, if built"""
+        index = peek_engine_state(f'covote_index:{current_board()}')
+        if index is not None:
+            index.remove_vote(feature_id, user_id)
@@ -0,0 +1,305 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from flask import current_app
+from sqlalchemy import DDL, event, text
+from sqlalchemy.exc import OperationalError
+from database import db, get_engine_state, peek_engine_state
+from transactions import after_commit, save_changes, savepoint
+from boards import current_board
+from models.feature import Feature
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+# A shorter last word is matched whole: a one-letter prefix matches most of the vocabulary
+MIN_PREFIX_LENGTH = 2
+# Prefix lengths FTS5 keeps extra index entries for, so short prefix queries need not scan every term
+FTS_PREFIX_INDEXES = '2 3'
+
+def tokenize(value: Optional[str]) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+class FTS5SearchIndex:
+    """Search index stored in a SQLite FTS5 virtual table keyed by feature id"""
+    name = 'fts5'
+    table = 'features_fts'
+    # Stored in the database, so it is already shared by every process
+    persistent = True
+
+    def __init__(self, board_id: str):
+        self.board_id = board_id
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Check whether the bound SQLite build ships the FTS5 extension"""
+        if db.engine.dialect.name != 'sqlite':
+            return False
+        try:
+            # A savepoint keeps a failed probe from rolling back the caller's unit of work
+            with savepoint():
+                db.session.execute(text('CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)'))
+                db.session.execute(text('DROP TABLE temp.fts5_probe'))
+            save_changes()
+            return True
+        except OperationalError:
+            return False
+
+    def ensure(self):
+        """Create the virtual table and backfill it from existing features"""
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            exists = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': self.table}
+            ).first()
+            if not exists:
+                db.session.execute(text(
+                    f'CREATE VIRTUAL TABLE {self.table} USING fts5(title, description, board_id UNINDEXED, '
+                    f"prefix='{FTS_PREFIX_INDEXES}')"
+                ))
+                db.session.execute(text(
+                    f'INSERT INTO {self.table} (rowid, title, description, board_id) '
+                    "SELECT id, title, COALESCE(description, ''), board_id FROM features WHERE deleted_at IS NULL"
+                ))
+                save_changes()
+            self._ready = True
+
+    def add(self, feature_id: int, title: str, description: Optional[str]):
+        """Index a feature"""
+        self.ensure()
+        # The first ensure() may already have backfilled this feature
+        self.remove(feature_id)
+        db.session.execute(
+            text(f'INSERT INTO {self.table} (rowid, title, description, board_id) '
+                 'VALUES (:id, :title, :description, :board_id)'),
+            {'id': feature_id, 'title': title, 'description': description or '', 'board_id': self.board_id}
+        )
+
+    def remove(self, feature_id: int):
+        """Remove a feature from the index"""
+        self.ensure()
+        db.session.execute(text(f'DELETE FROM {self.table} WHERE rowid = :id'), {'id': feature_id})
+
+    def search(self, tokens: List[str], limit: int) -> List[Tuple[int, float]]:
+        """Return (feature_id, relevance) pairs, best match first"""
+        self.ensure()
+        # Quote every token so user input can never inject FTS5 query syntax
+        terms = [f'"{token}"' for token in tokens]
+        if len(tokens[-1]) >= MIN_PREFIX_LENGTH:
+            terms[-1] += '*'
+        rank = f'bm25({self.table}, {TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})'
+        rows = db.session.execute(
+            text(f'SELECT rowid, {rank} AS rank FROM {self.table} '
+                 f'WHERE {self.table} MATCH :query AND board_id = :board_id ORDER BY rank LIMIT :limit'),
+            {'query': ' OR '.join(terms), 'board_id': self.board_id, 'limit': limit}
+        )
+        # SQLite's bm25() is negated so that better matches sort first
+        return [(row.rowid, -row.rank) for row in rows]
+
+class InvertedIndex:
+    """In-process BM25 inverted index, used when FTS5 is not available.
+
+    Matches queries like the FTS5 index: any token, the last one
+    (of at least MIN_PREFIX_LENGTH letters) as a prefix, so results update as the user types.
+    """
+    name = 'memory'
+    persistent = False
+
+    def __init__(self, board_id: str, k1: float = 1.2, b: float = 0.75):
+        self.board_id = board_id
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        # Sorted indexed tokens, for prefix lookups
+        self.vocabulary: List[str] = []
+        self.doc_lengths: Dict[int, float] = {}
+        self.doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self.total_length = 0.0
+        self._loaded = False
+        # Guards the index, only briefly held: searches and changes never wait for a build
+        self._lock = threading.RLock()
+        # Changes made while the index is being built, replayed on the built index: (feature_id, title,
+        # description), title None for a removal; None when no build is running
+        self._pending: Optional[List[Tuple[int, Optional[str], Optional[str]]]] = None
+        self._build_lock = threading.Lock()
+
+    def ensure(self):
+        """Build the index from the features table on first use"""
+        if self._loaded:
+            return
+        with self._build_lock:
+            if self._loaded:
+                return
+            with self._lock:
+                self._pending = []
+            try:
+                built = InvertedIndex(self.board_id, self.k1, self.b)
+                rows = db.session.query(Feature.id, Feature.title, Feature.description).filter(
+                    Feature.board_id == self.board_id, Feature.deleted_at.is_(None)
+                ).yield_per(1000)
+                for feature_id, title, description in rows:
+                    built._add(feature_id, title, description)
+            except BaseException:
+                with self._lock:
+                    self._pending = None
+                raise
+            with self._lock:
+                self.postings, self.vocabulary = built.postings, built.vocabulary
+                self.doc_lengths, self.doc_terms, self.total_length = (built.doc_lengths, built.doc_terms,
+                                                                       built.total_length)
+                for feature_id, title, description in self._pending:
+                    if title is None:
+                        self._remove(feature_id)
+                    else:
+                        self._add(feature_id, title, description)
+                self._pending = None
+                self._loaded = True
+
+    def _add(self, feature_id: int, title: str, description: Optional[str]):
+        if feature_id in self.doc_lengths:
+            self._remove(feature_id)
+        frequencies: Dict[str, float] = defaultdict(float)
+        for token in tokenize(title):
+            frequencies[token] += TITLE_WEIGHT
+        for token in tokenize(description):
+            frequencies[token] += DESCRIPTION_WEIGHT
+        for token, frequency in frequencies.items():
+            if token not in self.postings:
+                bisect.insort(self.vocabulary, token)
+            self.postings[token][feature_id] = frequency
+        length = sum(frequencies.values())
+        self.doc_lengths[feature_id] = length
+        self.doc_terms[feature_id] = tuple(frequencies)
+        self.total_length += length
+
+    def _remove(self, feature_id: int):
+        length = self.doc_lengths.pop(feature_id, None)
+        if length is None:
+            return
+        self.total_length -= length
+        for token in self.doc_terms.pop(feature_id):
+            del self.postings[token][feature_id]
+            if not self.postings[token]:
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def add(self, feature_id: int, title: str, description: Optional[str]):
+        """Index a feature, if the index is built (or being built)"""
+        self._change(feature_id, title, description)
+
+    def remove(self, feature_id: int):
+        """Remove a feature from the index, if it is built (or being built)"""
+        self._change(feature_id, None, None)
+
+    def _change(self, feature_id: int, title: Optional[str], description: Optional[str]):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((feature_id, title, description))
+            elif not self._loaded:
+                return
+            elif title is None:
+                self._remove(feature_id)
+            else:
+                self._add(feature_id, title, description)
+
+    def search(self, tokens: List[str], limit: int) -> List[Tuple[int, float]]:
+        """Return (feature_id, relevance) pairs, best match first"""
+        self.ensure()
+        with self._lock:
+            doc_count = len(self.doc_lengths)
+            if not doc_count:
+                return []
+            average_length = self.total_length / doc_count
+            scores: Dict[int, float] = defaultdict(float)
+            terms = [self.postings.get(token) for token in set(tokens[:-1]) - {tokens[-1]}]
+            for docs in terms + [self._prefix_postings(tokens[-1])]:
+                if not docs:
+                    continue
+                idf = math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+                for feature_id, frequency in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[feature_id] / average_length)
+                    scores[feature_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def _prefix_postings(self, prefix: str) -> Dict[int, float]:
+        # Like an FTS5 prefix query, every token starting with the prefix counts as one term
+        if len(prefix) < MIN_PREFIX_LENGTH:
+            return self.postings.get(prefix, {})
+        merged: Dict[int, float] = defaultdict(float)
+        for position in range(bisect.bisect_left(self.vocabulary, prefix), len(self.vocabulary)):
+            token = self.vocabulary[position]
+            if not token.startswith(prefix):
+                break
+            for feature_id, frequency in self.postings[token].items():
+                merged[feature_id] += frequency
+        return merged
+
+# drop_all() does not know about the virtual table, so drop it along with features
+event.listen(Feature.__table__, 'after_drop',
+             DDL(f'DROP TABLE IF EXISTS {FTS5SearchIndex.table}').execute_if(dialect='sqlite'))
+
+def _create_index(board_id: str):
+    backend = current_app.config.get('SEARCH_BACKEND', 'auto')
+    if backend == 'fts5' or (backend == 'auto' and FTS5SearchIndex.is_available()):
+        return FTS5SearchIndex(board_id)
+    return InvertedIndex(board_id)
+
+class SearchRepository:
+    @property
+    def index(self):
+        """The search index of the current board's database"""
+        board_id = current_board()
+        return get_engine_state(f'search_index:{board_id}', lambda: _create_index(board_id))
+    
+    def _loaded_memory_index(self) -> Optional[InvertedIndex]:
+        index = peek_engine_state(f'search_index:{current_board()}')
+        return index if index is not None and not index.persistent else None
+
+    def add(self, feature: Feature):
+        """Add a feature to the search index (an in-memory index only once the feature is committed)"""
+        index = self.index
+        feature_id, title, description = feature.id, feature.title, feature.description
+        if index.persistent:
+            index.add(feature_id, title, description)
+            save_changes()
+        else:
+            after_commit(lambda: index.add(feature_id, title, description))
+
+    def remove(self, feature_id: int):
+        """Remove a feature from the search index (an in-memory index only once the removal is committed)"""
+        index = self.index
+        if index.persistent:
+            index.remove(feature_id)
+            save_changes()
+        else:
+            after_commit(lambda: index.remove(feature_id))
+
+    def apply_remote_add(self, feature_id: int, title: str, description: Optional[str]):
+        """Mirror a feature created by another process into this process's in-memory index"""
+        index = self._loaded_memory_index()
+        if index is not None:
+            index.add(feature_id, title, description)
+    
+    def apply_remote_remove(self, feature_id: int):
+        """Mirror a feature deleted by another process out of this process's in-memory index"""
+        index = self._loaded_memory_index()
+        if index is not None:
+            index.remove(feature_id)
+    
+    def search(self, query: str, limit: int) -> List[Tuple[int, float]]:
+        """Find feature ids matching a free-text query"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        return self.index.search(tokens, limit)
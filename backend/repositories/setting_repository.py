@@ -0,0 +1,40 @@
+from typing import Optional
+from repositories.base import BaseRepository
+from models.setting import Setting
+from sqlalchemy import delete
+from database import db
+from transactions import save_changes
+
+class SettingRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(Setting)
+    
+    def get_value(self, key: str) -> Optional[str]:
+        """Get a setting value by key"""
+        setting = Setting.query.filter_by(key=key).first()
+        return setting.value if setting else None
+    
+    def set_value(self, key: str, value: str, commit: bool = True) -> Setting:
+        """Create or update a setting"""
+        setting = Setting.query.filter_by(key=key).first()
+        if setting is None:
+            setting = Setting(key=key, value=value)
+            db.session.add(setting)
+        else:
+            setting.value = value
+        if commit:
+            save_changes()
+        return setting
+    
+    def create_value(self, key: str, value: str) -> Setting:
+        """Insert a setting that must not exist yet (flushed, not committed); raises IntegrityError if it does"""
+        setting = Setting(key=key, value=value)
+        db.session.add(setting)
+        db.session.flush()
+        return setting
+    
+    def delete_value(self, key: str, commit: bool = True):
+        """Remove a setting if it exists"""
+        db.session.execute(delete(Setting).where(Setting.key == key))
+        if commit:
+            save_changes()
@@ -1,20 +1,97 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple, Union
+from sqlalchemy import delete, func, insert, literal, select, union_all, update
 from repositories.base import BaseRepository
+from models.archived_vote import ArchivedVote
+from models.feature import Feature
 from models.vote import Vote
+from database import db
+from transactions import save_changes
+from boards import current_board
 
 class VoteRepository(BaseRepository):
     def __init__(self):
         super().__init__(Vote)
     
-    def get_user_votes(self, user_id: str) -> List[Vote]:
-        """Get all votes by a user"""
-        return Vote.query.filter_by(user_id=user_id).all()
+    def get_user_votes(self, user_id: str) -> List[Union[Vote, ArchivedVote]]:
+        """Get all votes by a user, archived ones included"""
+        return Vote.query.filter_by(user_id=user_id).all() + ArchivedVote.query.filter_by(user_id=user_id).all()
     
-    def get_user_feature_vote(self, user_id: str, feature_id: int) -> Optional[Vote]:
-        """Get a specific vote by user and feature"""
-        return Vote.query.filter_by(user_id=user_id, feature_id=feature_id).first()
+    def get_user_feature_vote(self, user_id: str, feature_id: int) -> Optional[Union[Vote, ArchivedVote]]:
+        """Get a specific vote by user and feature, from the archive if the feature has archived votes"""
+        vote = Vote.query.filter_by(user_id=user_id, feature_id=feature_id).first()
+        if vote is None:
+            # Usually already loaded by the caller, so no query unless the archive must be consulted
+            feature = db.session.get(Feature, feature_id)
+            if feature is not None and feature.votes_archived_at is not None:
+                vote = ArchivedVote.query.filter_by(user_id=user_id, feature_id=feature_id).first()
+        return vote
     
     def get_user_voted_feature_ids(self, user_id: str) -> List[int]:
         """Get list of feature IDs that user has voted for"""
-        votes = self.get_user_votes(user_id)
-        return [vote.feature_id for vote in votes]
\ No newline at end of file
+        voted = select(Vote.feature_id).join(Feature, Feature.id == Vote.feature_id).where(
+            Vote.user_id == user_id, Feature.board_id == current_board(), Feature.deleted_at.is_(None)
+        )
+        # A seek on the archive's (user_id, feature_id) index, kept to features that have archived votes
+        archived = select(ArchivedVote.feature_id).join(Feature, Feature.id == ArchivedVote.feature_id).where(
+            ArchivedVote.user_id == user_id, Feature.board_id == current_board(), Feature.deleted_at.is_(None),
+            Feature.votes_archived_at.isnot(None)
+        )
+        statement = union_all(voted, archived)
+        return [row.feature_id for row in db.session.execute(statement)]
+    
+    def delete_feature_votes_chunk(self, feature_id: int, chunk_size: int, archived: bool = False) -> int:
+        """Bulk-delete up to chunk_size votes (or archived votes) of a feature in one short transaction"""
+        model = ArchivedVote if archived else Vote
+        chunk = select(model.id).where(model.feature_id == feature_id).limit(chunk_size)
+        result = db.session.execute(delete(model).where(model.id.in_(chunk)))
+        save_changes()
+        return result.rowcount
+    
+    def get_archivable_features(self, cutoff: datetime, after_id: int, limit: int) -> List[Tuple[int, int]]:
+        """Get (feature_id, votes) of the board's next `limit` features after after_id with no vote since cutoff"""
+        # Grouped in the (feature_id, user_id) index order, so the scan stops after `limit` features
+        rows = db.session.query(Vote.feature_id, func.count(Vote.id)).join(
+            Feature, Feature.id == Vote.feature_id
+        ).filter(
+            Vote.feature_id > after_id, Feature.board_id == current_board(), Feature.deleted_at.is_(None),
+            Feature.created_at < cutoff
+        ).group_by(Vote.feature_id).having(func.max(Vote.created_at) < cutoff).order_by(Vote.feature_id).limit(limit)
+        return [tuple(row) for row in rows]
+    
+    def archive_votes_chunk(self, feature_ids: List[int], chunk_size: int) -> int:
+        """Move up to chunk_size votes of the given features into the archive (without committing)"""
+        ids = [row.id for row in db.session.query(Vote.id).filter(
+            Vote.feature_id.in_(feature_ids)
+        ).order_by(Vote.id).limit(chunk_size)]
+        if not ids:
+            return 0
+        columns = ('feature_id', 'user_id', 'client_ip', 'quarantined_at', 'quarantine_reason', 'created_at',
+                   'updated_at')
+        moved = select(Vote.id, *[getattr(Vote, column) for column in columns], literal(datetime.utcnow())).where(
+            Vote.id.in_(ids)
+        )
+        db.session.execute(insert(ArchivedVote).from_select(['vote_id', *columns, 'archived_at'], moved))
+        db.session.execute(delete(Vote).where(Vote.id.in_(ids)))
+        return len(ids)
+    
+    def quarantine(self, vote_id: int, reason: str) -> bool:
+        """Mark a vote as quarantined unless it already is (compare-and-set, without committing)"""
+        result = db.session.execute(update(Vote).where(Vote.id == vote_id, Vote.quarantined_at.is_(None)).values(
+            quarantined_at=datetime.utcnow(), quarantine_reason=reason
+        ))
+        return result.rowcount > 0
+    
+    def iter_board_vote_chunks(self, chunk_size: int) -> Iterator[list]:
+        """Stream the current board's votes in id order, in keyset-paginated chunks"""
+        last_id = 0
+        while True:
+            chunk = db.session.query(
+                Vote.id, Vote.feature_id, Vote.user_id, Vote.client_ip, Vote.created_at, Vote.quarantined_at
+            ).join(Feature, Feature.id == Vote.feature_id).filter(
+                Vote.id > last_id, Feature.board_id == current_board()
+            ).order_by(Vote.id).limit(chunk_size).all()
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
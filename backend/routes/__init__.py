@@ -1,4 +1,5 @@
+from .admin_routes import admin_bp
 from .feature_routes import feature_bp
 from .health_routes import health_bp
 
-__all__ = ['feature_bp', 'health_bp']
\ No newline at end of file
+__all__ = ['admin_bp', 'feature_bp', 'health_bp']
\ No newline at end of file
@@ -0,0 +1,83 @@
+import functools
+import hmac
+import os
+from flask import Blueprint, current_app, request, jsonify, send_file
+from middleware.profiling import profiler
+from routes.feature_routes import check_board, pull_board_id
+
+admin_bp = Blueprint('admin', __name__)
+
+@functools.lru_cache(maxsize=None)
+def get_backup_service():
+    from services.backup_service import BackupService
+    return BackupService()
+
+@admin_bp.before_request
+def require_admin_token():
+    """Hide the admin endpoints unless ADMIN_TOKEN is set, and require it as a bearer token"""
+    token = current_app.config['ADMIN_TOKEN']
+    if not token:
+        return jsonify({'error': 'Not found'}), 404
+    scheme, _, supplied = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+admin_bp.url_value_preprocessor(pull_board_id)
+admin_bp.before_request(check_board)
+
+@admin_bp.route('/admin/backups', methods=['GET'])
+def list_backups():
+    """List the board's backups, newest first"""
+    try:
+        return jsonify(get_backup_service().list_backups()), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@admin_bp.route('/admin/backups', methods=['POST'])
+def create_backup():
+    """Take a consistent snapshot of the board's database while it keeps serving votes"""
+    try:
+        backup = get_backup_service().backup()
+        backup.pop('path')
+        return jsonify(backup), 201
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_bp.route('/admin/backups/<name>/restore', methods=['POST'])
+def restore_backup(name):
+    """Replace the board's database with one of its backups"""
+    try:
+        service = get_backup_service()
+        result = service.restore(service.backup_path(name))
+        return jsonify({'name': name, 'duration_seconds': result['duration_seconds']}), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_bp.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """List stored request profiles, newest first"""
+    return jsonify(profiler.store.list()), 200
+
+@admin_bp.route('/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Get the summary of a request profile: top functions, SQL time and statements"""
+    summary = profiler.store.summary(profile_id)
+    if summary is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(summary), 200
+
+@admin_bp.route('/admin/profiles/<profile_id>/download', methods=['GET'])
+def download_profile(profile_id):
+    """Download the full profile in pstats format (for pstats, snakeviz or gprof2dot)"""
+    path = profiler.store.path(profile_id)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(os.path.abspath(path), mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{profile_id}.prof')
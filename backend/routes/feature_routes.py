@@ -1,33 +1,124 @@
-from flask import Blueprint, request, jsonify
-from services.feature_service import FeatureService
-from services.vote_service import VoteService
-from schemas.feature_schemas import CreateFeatureRequest, VoteRequest
+import functools
+from flask import Blueprint, Response, current_app, g, request, jsonify, stream_with_context
+from boards import DEFAULT_BOARD, current_board, is_served_board, is_valid_board_id
+from schemas.feature_schemas import (
+    CreateFeatureRequest, VoteRequest, FeatureListRequest, BulkLookupRequest, DuplicateCheckRequest,
+    StatsRequest, TopMoversRequest, SearchRequest, RelatedRequest
+)
 
 feature_bp = Blueprint('features', __name__)
-feature_service = FeatureService()
-vote_service = VoteService()
+
+# Services (and the repository, search and analytics modules behind them) are imported and
+# built on first use rather than at import time, keeping cold starts short
+@functools.lru_cache(maxsize=None)
+def get_feature_service():
+    from services.feature_service import FeatureService
+    return FeatureService()
+
+@functools.lru_cache(maxsize=None)
+def get_vote_service():
+    from services.vote_service import VoteService
+    return VoteService()
+
+@functools.lru_cache(maxsize=None)
+def get_analytics_service():
+    from services.analytics_service import AnalyticsService
+    return AnalyticsService()
+
+@feature_bp.url_value_preprocessor
+def pull_board_id(endpoint, values):
+    """Scope requests on /api/boards/<board_id>/... to that board"""
+    g.board_id = values.pop('board_id', DEFAULT_BOARD) if values else DEFAULT_BOARD
+
+@feature_bp.before_request
+def check_board():
+    """Reject boards that are malformed or not served by this process"""
+    board_id = current_board()
+    if not is_valid_board_id(board_id) or not is_served_board(board_id):
+        return jsonify({'error': 'Board not found'}), 404
 
 @feature_bp.route('/features', methods=['GET'])
 def get_features():
-    """Get all features"""
+    """Get all features, or those matching ?author=, ?created_after=, ?created_before= and ?min_upvotes=.
+    
+    Flagged `voted` for ?user_id=, streamed for ?stream=true; ?ids= looks up only those features.
+    """
     try:
-        features = feature_service.get_all_features()
+        if 'ids' in request.args:
+            return _lookup_features(request.args)
+        
+        list_request = FeatureListRequest.from_dict(request.args)
+        list_request.validate()
+        
+        if list_request.stream:
+            features = get_feature_service().stream_features(
+                sort=list_request.sort, limit=list_request.limit, user_id=list_request.user_id,
+                filters=list_request.filters
+            )
+            return Response(stream_with_context(_json_array(features)), mimetype='application/json')
+        
+        features = get_feature_service().get_all_features(
+            sort=list_request.sort, limit=list_request.limit, user_id=list_request.user_id,
+            filters=list_request.filters
+        )
         return jsonify(features), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@feature_bp.route('/features/batch', methods=['POST'])
+def get_features_batch():
+    """Get many features by ID, for ID lists too long for a query string"""
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
+        
+        return _lookup_features(data)
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+def _json_array(items, buffer_size=64 * 1024):
+    """Encode items as one JSON array, yielded in pieces so the whole document is never in memory"""
+    dumps = functools.partial(current_app.json.dumps, separators=(',', ':'))
+    buffer = ['[']
+    size = 1
+    for index, item in enumerate(items):
+        part = dumps(item) if index == 0 else ',' + dumps(item)
+        buffer.append(part)
+        size += len(part)
+        if size >= buffer_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    buffer.append(']')
+    yield ''.join(buffer)
+
+def _lookup_features(data):
+    lookup_request = BulkLookupRequest.from_dict(data)
+    lookup_request.validate(current_app.config['BULK_LOOKUP_MAX_IDS'])
+    
+    result = get_feature_service().get_features_by_ids(lookup_request.ids)
+    return jsonify(result), 200
+
 @feature_bp.route('/features', methods=['POST'])
 def create_feature():
     """Create a new feature"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
         request_obj = CreateFeatureRequest.from_dict(data)
         request_obj.validate()
         
-        feature = feature_service.create_feature(
+        feature = get_feature_service().create_feature(
             title=request_obj.title,
             author=request_obj.author,
             description=request_obj.description
@@ -40,11 +131,96 @@ def create_feature():
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
+@feature_bp.route('/features/search', methods=['GET'])
+def search_features():
+    """Search features by title and description"""
+    try:
+        search_request = SearchRequest.from_dict(request.args)
+        search_request.validate()
+        
+        features = get_feature_service().search_features(search_request.query, search_request.limit)
+        return jsonify(features), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@feature_bp.route('/features/duplicates', methods=['GET'])
+def find_duplicate_features():
+    """Find existing features similar to a proposed title and description"""
+    try:
+        check_request = DuplicateCheckRequest.from_dict(request.args)
+        check_request.validate()
+        
+        features = get_feature_service().find_duplicates(check_request.title, check_request.description)
+        return jsonify(features), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@feature_bp.route('/features/top-movers', methods=['GET'])
+def get_top_movers():
+    """Get the features that gained the most votes recently"""
+    try:
+        movers_request = TopMoversRequest.from_dict(request.args)
+        movers_request.validate()
+        
+        features = get_analytics_service().get_top_movers(
+            movers_request.granularity, movers_request.window, movers_request.limit
+        )
+        return jsonify(features), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@feature_bp.route('/features/<int:feature_id>/stats', methods=['GET'])
+def get_feature_stats(feature_id):
+    """Get a feature's vote counts over time"""
+    try:
+        stats_request = StatsRequest.from_dict(request.args)
+        stats_request.validate()
+        
+        stats = get_analytics_service().get_feature_stats(
+            feature_id, stats_request.granularity, stats_request.since, stats_request.until
+        )
+        if not stats:
+            return jsonify({'error': 'Feature not found'}), 404
+        
+        return jsonify(stats), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
+@feature_bp.route('/features/<int:feature_id>/related', methods=['GET'])
+def get_related_features(feature_id):
+    """Get the features most often voted for by the users who voted for this one"""
+    try:
+        related_request = RelatedRequest.from_dict(request.args)
+        related_request.validate(current_app.config['RECOMMENDATIONS_NEIGHBORS'])
+        
+        features = get_feature_service().get_related_features(feature_id, related_request.limit)
+        if features is None:
+            return jsonify({'error': 'Feature not found'}), 404
+        
+        return jsonify(features), 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Internal server error'}), 500
+
 @feature_bp.route('/features/<int:feature_id>', methods=['GET'])
 def get_feature(feature_id):
     """Get a specific feature"""
     try:
-        feature = feature_service.get_feature_by_id(feature_id)
+        feature = get_feature_service().get_feature_by_id(feature_id)
         if not feature:
             return jsonify({'error': 'Feature not found'}), 404
         
@@ -57,7 +233,7 @@ def get_feature(feature_id):
 def delete_feature(feature_id):
     """Delete a feature"""
     try:
-        success = feature_service.delete_feature(feature_id)
+        success = get_feature_service().delete_feature(feature_id)
         if not success:
             return jsonify({'error': 'Feature not found'}), 404
         
@@ -70,14 +246,16 @@ def delete_feature(feature_id):
 def upvote_feature(feature_id):
     """Upvote a feature"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({'error': 'No data provided'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
         
         vote_request = VoteRequest.from_dict(data)
         vote_request.validate()
         
-        feature = vote_service.upvote_feature(feature_id, vote_request.user_id)
+        feature = get_vote_service().upvote_feature(feature_id, vote_request.user_id, client_ip=request.remote_addr)
         return jsonify(feature), 200
     
     except ValueError as e:
@@ -89,14 +267,16 @@ def upvote_feature(feature_id):
 def remove_vote(feature_id):
     """Remove vote from a feature"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         if not data:
             return jsonify({'error': 'No data provided'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Request body must be a JSON object'}), 400
         
         vote_request = VoteRequest.from_dict(data)
         vote_request.validate()
         
-        feature = vote_service.remove_vote(feature_id, vote_request.user_id)
+        feature = get_vote_service().remove_vote(feature_id, vote_request.user_id)
         return jsonify(feature), 200
     
     except ValueError as e:
@@ -108,7 +288,7 @@ def remove_vote(feature_id):
 def get_user_votes(user_id):
     """Get user's votes"""
     try:
-        votes = vote_service.get_user_votes(user_id)
+        votes = get_vote_service().get_user_votes(user_id)
         return jsonify(votes), 200
     
     except Exception as e:
@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
 from datetime import datetime
 
 health_bp = Blueprint('health', __name__)
@@ -10,4 +10,22 @@ def health_check():
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat(),
         'service': 'feature-voting-api'
-    }), 200
\ No newline at end of file
+    }), 200
+
+@health_bp.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 503 until the warm-up step has finished"""
+    state = current_app.extensions['warmup_state']
+    if state.ready.is_set():
+        return jsonify({'status': 'ready', 'warmup': state.timings}), 200
+    if state.error:
+        return jsonify({'status': 'failed', 'error': state.error}), 503
+    return jsonify({'status': 'warming_up', 'warmup': state.timings}), 503
+
+
+@health_bp.route('/reconciliation', methods=['GET'])
+def reconciliation_report():
+    """Upvote drift found by the latest background reconciliation pass of each board"""
+    worker = current_app.extensions.get('reconciliation_worker')
+    reports = {} if worker is None else {board: report.to_dict() for board, report in worker.reports.items()}
+    return jsonify({'enabled': bool(current_app.config['RECONCILE_INTERVAL_SECONDS']), 'boards': reports}), 200
\ No newline at end of file
@@ -1,3 +1,9 @@
-from .feature_schemas import CreateFeatureRequest, VoteRequest
+from .feature_schemas import (
+    CreateFeatureRequest, VoteRequest, FeatureListRequest, BulkLookupRequest, DuplicateCheckRequest,
+    StatsRequest, TopMoversRequest, SearchRequest, RelatedRequest
+)
 
-__all__ = ['CreateFeatureRequest', 'VoteRequest']
+__all__ = [
+    'CreateFeatureRequest', 'VoteRequest', 'FeatureListRequest', 'BulkLookupRequest', 'DuplicateCheckRequest',
+    'StatsRequest', 'TopMoversRequest', 'SearchRequest', 'RelatedRequest'
+]
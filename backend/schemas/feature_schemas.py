@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
 
 class CreateFeatureRequest:
     def __init__(self, title: str, author: str, description: Optional[str] = None):
@@ -26,8 +27,199 @@ class VoteRequest:
     
     @classmethod
     def from_dict(cls, data: dict):
-        return cls(user_id=data.get('user_id', '').strip())
+        user_id = data.get('user_id')
+        return cls(user_id=user_id.strip() if isinstance(user_id, str) else '')
     
     def validate(self):
         if not self.user_id:
-            raise ValueError("User ID is required")
\ No newline at end of file
+            raise ValueError("User ID is required")
+
+def _parse_datetime(value: Optional[str], name: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO 8601 date or datetime")
+
+def _parse_utc_datetime(value: Optional[str], name: str) -> Optional[datetime]:
+    # Stored timestamps are naive UTC
+    parsed = _parse_datetime(value, name)
+    if parsed is not None and parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+class FeatureListRequest:
+    SORTS = ('votes', 'trending', 'newest', 'oldest')
+    MAX_LIMIT = 1000
+    
+    def __init__(self, sort: str = 'votes', limit: Optional[int] = None, user_id: Optional[str] = None,
+                 stream: bool = False, author: Optional[str] = None, created_after: Optional[datetime] = None,
+                 created_before: Optional[datetime] = None, min_upvotes: Optional[int] = None):
+        self.sort = sort
+        self.limit = limit
+        self.user_id = user_id
+        self.stream = stream
+        self.author = author
+        self.created_after = created_after
+        self.created_before = created_before
+        self.min_upvotes = min_upvotes
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        try:
+            limit = int(data['limit']) if data.get('limit') else None
+        except ValueError:
+            raise ValueError("Limit must be an integer")
+        try:
+            min_upvotes = int(data['min_upvotes']) if data.get('min_upvotes') else None
+        except ValueError:
+            raise ValueError("min_upvotes must be an integer")
+        user_id = (data.get('user_id') or '').strip() or None
+        stream = (data.get('stream') or '').strip().lower() in ('1', 'true', 'yes')
+        return cls(sort=(data.get('sort') or 'votes').strip().lower(), limit=limit, user_id=user_id, stream=stream,
+                   author=(data.get('author') or '').strip() or None,
+                   created_after=_parse_utc_datetime(data.get('created_after'), 'created_after'),
+                   created_before=_parse_utc_datetime(data.get('created_before'), 'created_before'),
+                   min_upvotes=min_upvotes)
+    
+    @property
+    def filters(self) -> Dict[str, Any]:
+        """The filters that were given, by name"""
+        filters = {'author': self.author, 'created_after': self.created_after,
+                   'created_before': self.created_before, 'min_upvotes': self.min_upvotes}
+        return {name: value for name, value in filters.items() if value is not None}
+    
+    def validate(self):
+        if self.sort not in self.SORTS:
+            raise ValueError(f"Sort must be one of: {', '.join(self.SORTS)}")
+        if self.limit is not None and not 1 <= self.limit <= self.MAX_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {self.MAX_LIMIT}")
+        if self.min_upvotes is not None and self.min_upvotes < 0:
+            raise ValueError("min_upvotes must not be negative")
+        if self.created_after and self.created_before and self.created_after >= self.created_before:
+            raise ValueError("created_after must be before created_before")
+
+class BulkLookupRequest:
+    def __init__(self, ids: list):
+        self.ids = ids
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        ids = data.get('ids') or []
+        if isinstance(ids, str):
+            ids = [value for value in ids.split(',') if value.strip()]
+        if not isinstance(ids, list):
+            raise ValueError("IDs must be a list of integers")
+        try:
+            return cls(ids=[int(value) for value in ids])
+        except (TypeError, ValueError):
+            raise ValueError("IDs must be a list of integers")
+    
+    def validate(self, max_ids: int):
+        if not self.ids:
+            raise ValueError("At least one ID is required")
+        if len(self.ids) > max_ids:
+            raise ValueError(f"At most {max_ids} IDs can be requested at once")
+
+class DuplicateCheckRequest:
+    def __init__(self, title: str, description: Optional[str] = None):
+        self.title = title
+        self.description = description
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            title=(data.get('title') or '').strip(),
+            description=(data.get('description') or '').strip() or None
+        )
+    
+    def validate(self):
+        if not self.title:
+            raise ValueError("Title is required")
+
+class StatsRequest:
+    GRANULARITIES = ('hour', 'day')
+    
+    def __init__(self, granularity: str = 'hour', since: Optional[datetime] = None,
+                 until: Optional[datetime] = None):
+        self.granularity = granularity
+        self.since = since
+        self.until = until
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(
+            granularity=(data.get('granularity') or 'hour').strip().lower(),
+            since=_parse_utc_datetime(data.get('since'), 'since'),
+            until=_parse_utc_datetime(data.get('until'), 'until')
+        )
+    
+    def validate(self):
+        if self.granularity not in self.GRANULARITIES:
+            raise ValueError(f"Granularity must be one of: {', '.join(self.GRANULARITIES)}")
+        if self.since and self.until and self.since >= self.until:
+            raise ValueError("since must be before until")
+
+class TopMoversRequest:
+    MAX_WINDOW = 365
+    MAX_LIMIT = 100
+    
+    def __init__(self, granularity: str = 'day', window: int = 7, limit: int = 10):
+        self.granularity = granularity
+        self.window = window
+        self.limit = limit
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        try:
+            window = int(data.get('window', 7))
+            limit = int(data.get('limit', 10))
+        except (TypeError, ValueError):
+            raise ValueError("Window and limit must be integers")
+        return cls(granularity=(data.get('granularity') or 'day').strip().lower(), window=window, limit=limit)
+    
+    def validate(self):
+        if self.granularity not in StatsRequest.GRANULARITIES:
+            raise ValueError(f"Granularity must be one of: {', '.join(StatsRequest.GRANULARITIES)}")
+        if not 1 <= self.window <= self.MAX_WINDOW:
+            raise ValueError(f"Window must be between 1 and {self.MAX_WINDOW}")
+        if not 1 <= self.limit <= self.MAX_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {self.MAX_LIMIT}")
+
+class SearchRequest:
+    MAX_LIMIT = 100
+    
+    def __init__(self, query: str, limit: int = 20):
+        self.query = query
+        self.limit = limit
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        try:
+            limit = int(data.get('limit', 20))
+        except (TypeError, ValueError):
+            raise ValueError("Limit must be an integer")
+        return cls(query=(data.get('q') or '').strip(), limit=limit)
+    
+    def validate(self):
+        if not self.query:
+            raise ValueError("Search query is required")
+        if not 1 <= self.limit <= self.MAX_LIMIT:
+            raise ValueError(f"Limit must be between 1 and {self.MAX_LIMIT}")
+
+class RelatedRequest:
+    def __init__(self, limit: int = 10):
+        self.limit = limit
+    
+    @classmethod
+    def from_dict(cls, data: dict):
+        try:
+            limit = int(data.get('limit', 10))
+        except (TypeError, ValueError):
+            raise ValueError("Limit must be an integer")
+        return cls(limit=limit)
+    
+    def validate(self, max_limit: int):
+        if not 1 <= self.limit <= max_limit:
+            raise ValueError(f"Limit must be between 1 and {max_limit}")
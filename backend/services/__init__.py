@@ -1,4 +1,7 @@
+from .analytics_service import AnalyticsService
 from .feature_service import FeatureService
+from .purge_service import PurgeService
+from .trending_service import TrendingService
 from .vote_service import VoteService
 
-__all__ = ['FeatureService', 'VoteService']
\ No newline at end of file
+__all__ = ['AnalyticsService', 'FeatureService', 'PurgeService', 'TrendingService', 'VoteService']
\ No newline at end of file
@@ -0,0 +1,128 @@
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from repositories.analytics_repository import AnalyticsRepository
+from repositories.feature_repository import FeatureRepository
+from repositories.setting_repository import SettingRepository
+from transactions import transactional
+
+GRANULARITIES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+# Setting holding the progress of a running backfill
+BACKFILL_KEY = 'rollup_backfill'
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """Round a timestamp down to the start of its bucket"""
+    if granularity == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class AnalyticsService:
+    def __init__(self):
+        self.analytics_repo = AnalyticsRepository()
+        self.feature_repo = FeatureRepository()
+        self.setting_repo = SettingRepository()
+    
+    def record_vote(self, feature_id: int, at: Optional[datetime] = None, delta: int = 1, commit: bool = True):
+        """Add a vote (or, with delta=-1, a removal) to every rollup granularity"""
+        at = at or datetime.utcnow()
+        deltas = {(feature_id, granularity, truncate(at, granularity)): delta for granularity in GRANULARITIES}
+        self.analytics_repo.add_deltas(deltas, commit=commit)
+    
+    def get_feature_stats(self, feature_id: int, granularity: str, since: Optional[datetime] = None,
+                          until: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Get a feature's net votes per bucket; defaults to the last 48 buckets"""
+        if not self.feature_repo.get_by_id(feature_id):
+            return None
+        since = truncate(since or datetime.utcnow() - 47 * GRANULARITIES[granularity], granularity)
+        rollups = self.analytics_repo.get_series(feature_id, granularity, since, until)
+        return {
+            'feature_id': feature_id,
+            'granularity': granularity,
+            'since': since.isoformat(),
+            'total': sum(rollup.delta for rollup in rollups),
+            'buckets': [{'bucket': rollup.bucket.isoformat(), 'delta': rollup.delta} for rollup in rollups]
+        }
+    
+    def get_top_movers(self, granularity: str, window: int, limit: int) -> List[Dict[str, Any]]:
+        """Get the features that gained the most votes over the last `window` buckets"""
+        since = truncate(datetime.utcnow() - (window - 1) * GRANULARITIES[granularity], granularity)
+        movers = self.analytics_repo.get_top_movers(granularity, since, limit)
+        features = {feature.id: feature for feature in self.feature_repo.get_by_ids([m[0] for m in movers])}
+        
+        results = []
+        for feature_id, delta in movers:
+            if feature_id in features:
+                data = features[feature_id].to_dict()
+                data['delta'] = delta
+                results.append(data)
+        return results
+    
+    def record_removal(self, vote, at: Optional[datetime] = None):
+        """Take a vote out of the rollups (counted at its removal unless `at` is given), without committing.
+        
+        A running backfill has not counted a vote it has yet to reach, and will find it gone or
+        quarantined, so such a vote is left out of the rollups altogether.
+        """
+        progress = self.backfill_progress()
+        if progress is not None:
+            cursor, max_id = progress[vote.__tablename__]
+            if cursor < vote.id <= max_id:
+                return
+        self.record_vote(vote.feature_id, at, delta=-1, commit=False)
+    
+    def backfill_progress(self) -> Optional[Dict[str, List[int]]]:
+        """[last counted ID, highest ID to count] per votes table of the running backfill, or None"""
+        value = self.setting_repo.get_value(BACKFILL_KEY)
+        return json.loads(value) if value else None
+    
+    def backfill(self, chunk_size: int = 5000) -> int:
+        """Rebuild every rollup from the votes (archived ones included), one short transaction per chunk.
+        
+        The rollups are cleared in the transaction that records how far each votes table reaches,
+        so a vote committed afterwards is only counted live, and every chunk moves the recorded
+        progress in the transaction that counts it.
+        """
+        tables = self._start_backfill()
+        processed = 0
+        try:
+            for table in tables:
+                done = False
+                while not done:
+                    counted, done = self._backfill_chunk(table, chunk_size)
+                    processed += counted
+        finally:
+            self._finish_backfill()
+        return processed
+    
+    @transactional
+    def _start_backfill(self) -> List[str]:
+        self.analytics_repo.delete_all(commit=False)
+        progress = {table: [0, max_id] for table, max_id in self.analytics_repo.get_vote_high_water_marks().items()}
+        self.setting_repo.set_value(BACKFILL_KEY, json.dumps(progress), commit=False)
+        return list(progress)
+    
+    @transactional
+    def _backfill_chunk(self, table: str, chunk_size: int) -> Tuple[int, bool]:
+        progress = self.backfill_progress()
+        cursor, max_id = progress[table]
+        rows = self.analytics_repo.get_vote_chunk(table, cursor, max_id, chunk_size)
+        deltas = defaultdict(int)
+        counted = 0
+        for _, feature_id, created_at, quarantined_at in rows:
+            if quarantined_at is None:
+                counted += 1
+                for granularity in GRANULARITIES:
+                    deltas[(feature_id, granularity, truncate(created_at, granularity))] += 1
+        self.analytics_repo.add_deltas(deltas, commit=False)
+        done = len(rows) < chunk_size
+        progress[table][0] = max_id if done else rows[-1][0]
+        self.setting_repo.set_value(BACKFILL_KEY, json.dumps(progress), commit=False)
+        return counted, done
+    
+    @transactional
+    def _finish_backfill(self):
+        self.setting_repo.delete_value(BACKFILL_KEY)
@@ -0,0 +1,76 @@
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from flask import current_app
+from boards import current_board
+from repositories.feature_repository import FeatureRepository
+from repositories.vote_repository import VoteRepository
+from services.analytics_service import AnalyticsService
+from services.board_worker import PeriodicBoardWorker
+from transactions import transactional
+
+class VoteArchiveService:
+    def __init__(self):
+        self.feature_repo = FeatureRepository()
+        self.vote_repo = VoteRepository()
+        self.analytics_service = AnalyticsService()
+    
+    def archive(self, older_than_days: Optional[float] = None, chunk_size: Optional[int] = None,
+                batch_size: int = 100, apply: bool = True) -> Dict[str, Any]:
+        """Move the votes of features nobody voted for in older_than_days into the archive.
+        
+        Features are taken batch_size at a time and their votes moved chunk_size at a time, each chunk
+        in one short transaction together with the flag that sends the features' lookups to the archive.
+        Upvote counters are left untouched. The pass stops early while a rollup backfill runs.
+        """
+        config = current_app.config
+        days = config['VOTE_ARCHIVE_AFTER_DAYS'] if older_than_days is None else older_than_days
+        chunk_size = chunk_size or config['VOTE_ARCHIVE_CHUNK_SIZE']
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        report = {'board_id': current_board(), 'features': 0, 'votes': 0, 'deferred': False}
+        started = time.perf_counter()
+        last_id = 0
+        while True:
+            if apply and self.analytics_service.backfill_progress() is not None:
+                report['deferred'] = True
+                break
+            features = self.vote_repo.get_archivable_features(cutoff, last_id, batch_size)
+            report['features'] += len(features)
+            if apply and features:
+                report['votes'] += self.archive_features([feature_id for feature_id, _ in features], chunk_size)
+            elif features:
+                report['votes'] += sum(votes for _, votes in features)
+            if len(features) < batch_size:
+                break
+            last_id = features[-1][0]
+        report['duration_seconds'] = round(time.perf_counter() - started, 4)
+        return report
+    
+    def archive_features(self, feature_ids: List[int], chunk_size: int) -> int:
+        """Move all votes of the given features into the archive; returns the number moved"""
+        moved = 0
+        while True:
+            count = self._move_chunk(feature_ids, chunk_size)
+            moved += count
+            if count < chunk_size:
+                return moved
+    
+    @transactional
+    def _move_chunk(self, feature_ids: List[int], chunk_size: int) -> int:
+        # Moved votes get new IDs, which a running rollup backfill would miss or count twice
+        if self.analytics_service.backfill_progress() is not None:
+            return 0
+        # Flagged in the same transaction, so no reader misses a vote that has just moved
+        self.feature_repo.mark_votes_archived(feature_ids)
+        return self.vote_repo.archive_votes_chunk(feature_ids, chunk_size)
+
+class VoteArchiveWorker(PeriodicBoardWorker):
+    """Archives the served boards' quiet votes periodically on a background thread"""
+    
+    extension_key = 'vote_archive_worker'
+    thread_name = 'vote-archive'
+    interval_setting = 'VOTE_ARCHIVE_INTERVAL_SECONDS'
+    description = 'Vote archival'
+    
+    def run_board(self) -> Dict[str, Any]:
+        return VoteArchiveService().archive()
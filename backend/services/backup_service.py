@@ -0,0 +1,140 @@
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from flask import current_app
+from boards import DEFAULT_BOARD, board_engine, current_board
+from cache.coherence import coherence, DATABASE_RESTORED
+from database import db
+
+logger = logging.getLogger(__name__)
+
+BACKUP_NAME_RE = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}-\d{8}T\d{12}\.db$')
+
+class _Restarted(Exception):
+    pass
+
+class BackupService:
+    """Consistent snapshots of the current board's SQLite database, taken while it keeps serving writes.
+    
+    The default board's database is the shared one, which also holds every board without a database of its own.
+    """
+    
+    @property
+    def directory(self) -> str:
+        return current_app.config['BACKUP_DIR']
+    
+    def _check_board(self):
+        # Backing up or restoring the shared database for one of the boards in it would cover, and roll back,
+        # all the others
+        board_id = current_board()
+        if board_id != DEFAULT_BOARD and board_engine(board_id) is None:
+            raise ValueError(f"Board {board_id} has no database of its own; back up the shared database instead")
+    
+    def _engine(self):
+        self._check_board()
+        engine = db.session.get_bind()
+        if engine.dialect.name != 'sqlite':
+            raise ValueError("Online backup requires a SQLite database")
+        return engine
+    
+    def backup(self, destination: Optional[str] = None) -> Dict[str, Any]:
+        """Copy the database to destination (a new file in BACKUP_DIR by default) with the online backup API.
+        
+        Pages are copied a few at a time and the source is unlocked between steps, so writers keep going.
+        A write makes SQLite start the copy over; each restart quadruples the pages per step, and after
+        BACKUP_MAX_RESTARTS the rest is copied in one step, holding a read lock for its duration.
+        """
+        config = current_app.config
+        if destination is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+            destination = os.path.join(self.directory, f'{current_board()}-{stamp}.db')
+        partial = destination + '.partial'
+        pause = config['BACKUP_STEP_SLEEP_SECONDS']
+        progress = {'steps': 0, 'restarts': 0, 'remaining': None}
+        
+        def step(status, remaining, total):
+            progress['steps'] += 1
+            if progress['remaining'] is not None and remaining > progress['remaining']:
+                # Another connection wrote to the database, so copying started over
+                raise _Restarted()
+            progress['remaining'] = remaining
+            if remaining:
+                # Nothing is locked between steps: give writers the database
+                time.sleep(pause)
+        
+        started = time.perf_counter()
+        source = self._engine().raw_connection()
+        target = sqlite3.connect(partial)
+        try:
+            pages = config['BACKUP_PAGES_PER_STEP']
+            while True:
+                last_attempt = progress['restarts'] >= config['BACKUP_MAX_RESTARTS']
+                progress['remaining'] = None
+                try:
+                    source.driver_connection.backup(target, pages=-1 if last_attempt else pages, progress=step)
+                    break
+                except _Restarted:
+                    progress['restarts'] += 1
+                    pages *= 4
+            status = target.execute('PRAGMA quick_check').fetchone()[0]
+            if status != 'ok':
+                raise RuntimeError(f"Backup failed its integrity check: {status}")
+        except BaseException:
+            target.close()
+            os.remove(partial)
+            raise
+        finally:
+            target.close()
+            source.close()
+        # Only complete snapshots ever carry a backup name
+        os.replace(partial, destination)
+        if progress['restarts']:
+            logger.info("Backup restarted %s times by concurrent writes", progress['restarts'])
+        return {
+            'name': os.path.basename(destination), 'path': destination, 'size': os.path.getsize(destination),
+            'steps': progress['steps'], 'restarts': progress['restarts'],
+            'duration_seconds': round(time.perf_counter() - started, 4)
+        }
+    
+    def list_backups(self) -> List[Dict[str, Any]]:
+        """Backups of the current board in BACKUP_DIR, newest first"""
+        self._check_board()
+        if not os.path.isdir(self.directory):
+            return []
+        prefix = f'{current_board()}-'
+        names = sorted((name for name in os.listdir(self.directory)
+                        if name.startswith(prefix) and BACKUP_NAME_RE.match(name)), reverse=True)
+        return [{'name': name, 'size': os.path.getsize(os.path.join(self.directory, name))} for name in names]
+    
+    def backup_path(self, name: str) -> str:
+        """Resolve the name of a backup in BACKUP_DIR, rejecting anything else"""
+        self._check_board()
+        if not BACKUP_NAME_RE.match(name or '') or not name.startswith(f'{current_board()}-'):
+            raise ValueError("Invalid backup name")
+        path = os.path.join(self.directory, name)
+        if not os.path.isfile(path):
+            raise ValueError("Backup not found")
+        return path
+    
+    def restore(self, source_path: str) -> Dict[str, Any]:
+        """Replace the board's database contents with a backup, then make every worker drop what it derived from them"""
+        started = time.perf_counter()
+        source = sqlite3.connect(f'file:{source_path}?mode=ro', uri=True)
+        engine = self._engine()
+        target = engine.raw_connection()
+        try:
+            status = source.execute('PRAGMA quick_check').fetchone()[0]
+            if status != 'ok':
+                raise ValueError(f"Backup failed its integrity check: {status}")
+            # One step: the restore holds the write lock until the whole database is replaced
+            source.backup(target.driver_connection)
+        finally:
+            target.close()
+            source.close()
+        coherence.publish(DATABASE_RESTORED, board_id=None)
+        return {'path': source_path, 'duration_seconds': round(time.perf_counter() - started, 4)}
@@ -0,0 +1,64 @@
+import logging
+import threading
+from typing import Any, Dict, Optional
+from boards import DEFAULT_BOARD, use_board
+
+logger = logging.getLogger(__name__)
+
+class PeriodicBoardWorker:
+    """Runs a pass over every served board periodically on a background thread and keeps the latest reports.
+    
+    Subclasses name their app extension, thread and interval setting, and implement run_board().
+    """
+    
+    extension_key = ''
+    thread_name = ''
+    interval_setting = ''
+    # Name of the pass in log messages
+    description = ''
+    
+    def __init__(self, app):
+        self.app = app
+        self.reports: Dict[str, Any] = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    @classmethod
+    def for_app(cls, app) -> 'PeriodicBoardWorker':
+        worker = app.extensions.get(cls.extension_key)
+        if worker is None:
+            worker = app.extensions.setdefault(cls.extension_key, cls(app))
+        return worker
+    
+    def run_board(self) -> Any:
+        """One pass over the current board; returns its report"""
+        raise NotImplementedError
+    
+    def start(self):
+        """Start the periodic passes unless they are already running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Stop after the current pass"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def run_once(self):
+        """Run the pass on every served board once"""
+        for board_id in self.app.config['SERVED_BOARDS'] or [DEFAULT_BOARD]:
+            with self.app.app_context(), use_board(board_id):
+                try:
+                    self.reports[board_id] = self.run_board()
+                except Exception:
+                    logger.exception("%s of board %s failed", self.description, board_id)
+    
+    def _run(self):
+        while not self._stop.wait(self.app.config[self.interval_setting]):
+            self.run_once()
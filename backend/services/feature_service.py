@@ -1,39 +1,191 @@
-from typing import List, Optional, Dict, Any
+import math
+from typing import Iterator, List, Optional, Dict, Any
+from flask import current_app
+from boards import current_board
+from cache.coherence import coherence, FEATURE_CREATED, FEATURE_DELETED
+from cache.read_model import read_model
+from repositories.duplicate_repository import DuplicateRepository
 from repositories.feature_repository import FeatureRepository
+from repositories.recommendation_repository import RecommendationRepository
+from repositories.search_repository import SearchRepository
 from repositories.vote_repository import VoteRepository
+from services.purge_service import PurgeWorker
+from transactions import after_commit, transactional
+
+# Search ranking: BM25 relevance scaled by a log-damped popularity boost
+SEARCH_CANDIDATE_FACTOR = 5
+SEARCH_UPVOTE_WEIGHT = 0.1
 
 class FeatureService:
     def __init__(self):
         self.feature_repo = FeatureRepository()
         self.vote_repo = VoteRepository()
+        self.search_repo = SearchRepository()
+        self.duplicate_repo = DuplicateRepository()
+        self.recommendation_repo = RecommendationRepository()
+    
+    def get_all_features(self, sort: str = 'votes', limit: Optional[int] = None, user_id: Optional[str] = None,
+                         filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Get all features ordered by votes, trending score or creation date, optionally filtered.
+        
+        With a user_id each feature carries a `voted` flag, looked up in the user's cached
+        voted-ID set so the shared list stays cached across users.
+        """
+        if filters:
+            # Too many combinations to cache: read from the database, one load per set of identical reads
+            key = (sort, limit, tuple(sorted(filters.items())))
+            features = coherence.coalesced('features', key, lambda: self._load_features(sort, limit, filters))
+        else:
+            # Served from the read model shared by all workers when enabled, else from this worker's cache
+            features = None
+            if sort in ('votes', 'trending'):
+                features = read_model.features(current_board(), sort, limit,
+                                               self.feature_repo.iter_ordered_with_vote_counts)
+            if features is None:
+                features = coherence.cached('features', (sort, limit), lambda: self._load_features(sort, limit))
+        if user_id is None:
+            return [dict(feature) for feature in features]
+        
+        voted = set(coherence.cached('votes', (user_id,), lambda: self.vote_repo.get_user_voted_feature_ids(user_id)))
+        return [dict(feature, voted=feature['id'] in voted) for feature in features]
+    
+    def stream_features(self, sort: str = 'votes', limit: Optional[int] = None, user_id: Optional[str] = None,
+                        filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield features in list order one at a time, for exports too large to build as one list"""
+        voted = set(self.vote_repo.get_user_voted_feature_ids(user_id)) if user_id else None
+        chunk_size = current_app.config['STREAM_CHUNK_SIZE']
+        for feature in self.feature_repo.iter_ordered_with_vote_counts(sort, limit, chunk_size, filters):
+            if voted is not None:
+                feature['voted'] = feature['id'] in voted
+            yield feature
     
-    def get_all_features(self) -> List[Dict[str, Any]]:
-        """Get all features ordered by votes"""
-        features = self.feature_repo.get_all_ordered_by_votes()
-        return [feature.to_dict() for feature in features]
+    def _load_features(self, sort: str, limit: Optional[int],
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        # Same rows as the stream, with vote counts from one query instead of a COUNT per feature
+        return list(self.feature_repo.iter_ordered_with_vote_counts(sort, limit, filters=filters))
     
+    @transactional
     def create_feature(self, title: str, author: str, description: str = None) -> Dict[str, Any]:
         """Create a new feature"""
         if not title or not author:
             raise ValueError("Title and author are required")
         
+        title = title.strip()
+        description = description.strip() if description else None
+        
+        reject_threshold = current_app.config.get('DUPLICATE_REJECT_THRESHOLD')
+        if reject_threshold:
+            matches = self.duplicate_repo.find_similar(title, description, reject_threshold)
+            if matches:
+                raise ValueError(f"Feature looks like a duplicate of feature {matches[0][0]}")
+        
         feature = self.feature_repo.create(
-            title=title.strip(),
+            title=title,
             author=author.strip(),
-            description=description.strip() if description else None
+            description=description
         )
-        return feature.to_dict()
+        self.search_repo.add(feature)
+        data = feature.to_dict()
+        after_commit(lambda: self.duplicate_repo.add(feature))
+        coherence.publish(FEATURE_CREATED, feature_id=feature.id, title=feature.title,
+                          description=feature.description)
+        return data
+    
+    def find_duplicates(self, title: str, description: str = None, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find existing features that look like near-duplicates of the given text"""
+        threshold = current_app.config.get('DUPLICATE_CANDIDATE_THRESHOLD', 0.5)
+        matches = self.duplicate_repo.find_similar(title, description, threshold)[:limit]
+        features = {feature.id: feature for feature in self.feature_repo.get_by_ids([m[0] for m in matches])}
+        
+        results = []
+        for feature_id, similarity in matches:
+            if feature_id in features:
+                data = features[feature_id].to_dict()
+                data['similarity'] = similarity
+                results.append(data)
+        return results
+    
+    def cluster_duplicates(self, threshold: float = None) -> List[List[int]]:
+        """Group the existing features into clusters of near-duplicates"""
+        if threshold is None:
+            threshold = current_app.config.get('DUPLICATE_CANDIDATE_THRESHOLD', 0.5)
+        return self.duplicate_repo.clusters(threshold)
+    
+    def get_features_by_ids(self, feature_ids: List[int]) -> Dict[str, Any]:
+        """Get many features at once, in the requested order, reporting IDs that were not found"""
+        feature_ids = list(dict.fromkeys(feature_ids))
+        found = {
+            feature.id: feature.to_dict(votes_count=votes_count)
+            for feature, votes_count in self.feature_repo.get_by_ids_with_vote_counts(feature_ids)
+        }
+        return {
+            'features': [found[feature_id] for feature_id in feature_ids if feature_id in found],
+            'missing': [feature_id for feature_id in feature_ids if feature_id not in found]
+        }
+    
+    def get_related_features(self, feature_id: int, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """Get the features most often co-voted with a feature, from its precomputed neighbor list"""
+        if not self.feature_repo.get_by_id(feature_id):
+            return None
+        
+        # The whole list is fetched so neighbors deleted since the last update can be skipped
+        neighbors = self.recommendation_repo.related(feature_id, current_app.config['RECOMMENDATIONS_NEIGHBORS'])
+        neighbor_ids = [neighbor[0] for neighbor in neighbors]
+        # Vote counts come from the index too, rather than counting every neighbor's vote rows
+        votes_counts = self.recommendation_repo.vote_counts(neighbor_ids)
+        found = {feature.id: feature.to_dict(votes_count=votes_counts[feature.id])
+                 for feature in self.feature_repo.get_by_ids(neighbor_ids)}
+        related = [dict(found[neighbor_id], co_votes=co_votes, score=score)
+                   for neighbor_id, co_votes, score in neighbors if neighbor_id in found]
+        return related[:limit]
     
     def get_feature_by_id(self, feature_id: int) -> Optional[Dict[str, Any]]:
-        """Get a feature by ID"""
-        feature = self.feature_repo.get_by_id(feature_id)
-        return feature.to_dict() if feature else None
+        """Get a feature by ID (concurrent requests for the same feature share one query)"""
+        def load():
+            feature = self.feature_repo.get_by_id(feature_id)
+            return feature.to_dict() if feature else None
+        
+        feature = coherence.coalesced('feature', (feature_id,), load)
+        return dict(feature) if feature else None
     
+    @transactional
     def delete_feature(self, feature_id: int) -> bool:
         """Delete a feature"""
         feature = self.feature_repo.get_by_id(feature_id)
         if not feature:
             return False
         
-        self.feature_repo.delete(feature)
-        return True
\ No newline at end of file
+        # Soft delete keeps the request cheap; votes are purged in bounded chunks afterwards
+        self.feature_repo.soft_delete(feature)
+        self.search_repo.remove(feature_id)
+        after_commit(lambda: self.duplicate_repo.remove(feature_id))
+        coherence.publish(FEATURE_DELETED, feature_id=feature_id)
+        if current_app.config['PURGE_IN_BACKGROUND']:
+            worker = PurgeWorker.for_app(current_app._get_current_object())
+            after_commit(worker.schedule)
+        return True
+    
+    def search_features(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over titles and descriptions, blended with upvotes"""
+        matches = self.search_repo.search(query, limit * SEARCH_CANDIDATE_FACTOR)
+        if not matches:
+            return []
+        
+        # Vote counts come with the features, instead of a COUNT per hit
+        features = {feature.id: (feature, votes_count) for feature, votes_count
+                    in self.feature_repo.get_by_ids_with_vote_counts([m[0] for m in matches])}
+        ranked = []
+        for feature_id, relevance in matches:
+            if feature_id not in features:
+                continue
+            feature, votes_count = features[feature_id]
+            score = relevance * (1 + SEARCH_UPVOTE_WEIGHT * math.log1p(feature.upvotes))
+            ranked.append((score, feature, votes_count))
+        
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        results = []
+        for score, feature, votes_count in ranked[:limit]:
+            data = feature.to_dict(votes_count=votes_count)
+            data['score'] = score
+            results.append(data)
+        return results
\ No newline at end of file
@@ -0,0 +1,116 @@
+import logging
+import queue
+import threading
+from collections import Counter
+from typing import Dict, Optional
+from flask import current_app
+from boards import current_board, use_board
+from cache.coherence import coherence, VOTE_QUARANTINED
+from fraud.detector import VoteAnomalyDetector, VoteEvent
+from repositories.feature_repository import FeatureRepository
+from repositories.recommendation_repository import RecommendationRepository
+from repositories.vote_repository import VoteRepository
+from services.analytics_service import AnalyticsService
+from services.trending_service import TrendingService
+from transactions import after_commit, transactional
+
+logger = logging.getLogger(__name__)
+
+class FraudService:
+    def __init__(self):
+        self.feature_repo = FeatureRepository()
+        self.vote_repo = VoteRepository()
+        self.recommendation_repo = RecommendationRepository()
+        self.trending_service = TrendingService()
+        self.analytics_service = AnalyticsService()
+    
+    @transactional
+    def quarantine_vote(self, vote_id: int, reason: str) -> bool:
+        """Take a vote out of its feature's upvotes, trending score and rollups; the row is kept"""
+        vote = self.vote_repo.get_by_id(vote_id)
+        if vote is None or not self.vote_repo.quarantine(vote_id, reason):
+            return False
+        
+        self.analytics_service.record_removal(vote, vote.created_at)
+        feature = self.feature_repo.get_by_id(vote.feature_id)
+        if feature:
+            self.feature_repo.decrement_upvotes(feature, self.trending_service.vote_weight(vote.created_at))
+        coherence.publish(VOTE_QUARANTINED, feature_id=vote.feature_id, user_id=vote.user_id)
+        feature_id, user_id = vote.feature_id, vote.user_id
+        after_commit(lambda: self.recommendation_repo.remove_vote(feature_id, user_id))
+        logger.info("Quarantined vote %s on feature %s (%s)", vote_id, vote.feature_id, reason)
+        return True
+    
+    def replay(self, chunk_size: int = 1000, apply: bool = False) -> Dict[str, int]:
+        """Run a fresh detector over the board's historical votes; returns flagged votes per reason.
+        
+        With apply=True flagged votes are quarantined, otherwise nothing is changed.
+        """
+        detector = VoteAnomalyDetector.from_config(current_app.config)
+        board_id = current_board()
+        flagged: Counter = Counter()
+        for chunk in self.vote_repo.iter_board_vote_chunks(chunk_size):
+            for vote in chunk:
+                reason = detector.observe(VoteEvent.from_vote(vote, board_id))
+                if reason is None:
+                    continue
+                flagged[reason] += 1
+                if apply and vote.quarantined_at is None:
+                    self.quarantine_vote(vote.id, reason)
+        return dict(flagged)
+
+class FraudWorker:
+    """Feeds committed votes to the anomaly detector on a background thread, off the request path"""
+    
+    def __init__(self, app):
+        self.app = app
+        self.detector = VoteAnomalyDetector.from_config(app.config)
+        self.queue: 'queue.Queue[VoteEvent]' = queue.Queue(maxsize=app.config['FRAUD_QUEUE_SIZE'])
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    @classmethod
+    def for_app(cls, app) -> 'FraudWorker':
+        worker = app.extensions.get('fraud_worker')
+        if worker is None:
+            worker = app.extensions.setdefault('fraud_worker', cls(app))
+        return worker
+    
+    def submit(self, event: VoteEvent):
+        """Queue a vote for inspection; never blocks (votes are dropped from detection when the queue is full)"""
+        if not self.app.config['FRAUD_IN_BACKGROUND']:
+            self.process(event)
+            return
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Fraud detection queue full, %s votes not inspected", self.dropped)
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='fraud-detector', daemon=True)
+                self._thread.start()
+    
+    def join(self):
+        """Wait until every queued vote has been inspected"""
+        self.queue.join()
+    
+    def process(self, event: VoteEvent) -> Optional[str]:
+        """Inspect one vote and quarantine it if it is part of a burst"""
+        reason = self.detector.observe(event)
+        if reason:
+            with self.app.app_context(), use_board(event.board_id):
+                FraudService().quarantine_vote(event.vote_id, reason)
+        return reason
+    
+    def _run(self):
+        while True:
+            event = self.queue.get()
+            try:
+                self.process(event)
+            except Exception:
+                logger.exception("Fraud detection failed for vote %s", event.vote_id)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,87 @@
+import logging
+import threading
+from typing import Optional
+from flask import current_app
+from boards import current_board, use_board
+from repositories.analytics_repository import AnalyticsRepository
+from repositories.feature_repository import FeatureRepository
+from repositories.vote_repository import VoteRepository
+
+logger = logging.getLogger(__name__)
+
+class PurgeService:
+    def __init__(self):
+        self.feature_repo = FeatureRepository()
+        self.vote_repo = VoteRepository()
+        self.analytics_repo = AnalyticsRepository()
+    
+    def purge_feature(self, feature_id: int, chunk_size: Optional[int] = None) -> int:
+        """Delete a soft-deleted feature's votes (archived ones too) in bounded chunks, then the feature row"""
+        chunk_size = chunk_size or current_app.config['PURGE_CHUNK_SIZE']
+        purged = 0
+        for archived in (False, True):
+            while True:
+                deleted = self.vote_repo.delete_feature_votes_chunk(feature_id, chunk_size, archived)
+                purged += deleted
+                if deleted < chunk_size:
+                    break
+        self.analytics_repo.delete_for_feature(feature_id)
+        self.feature_repo.purge(feature_id)
+        return purged
+    
+    def purge_deleted(self, chunk_size: Optional[int] = None, batch_size: int = 100) -> int:
+        """Purge every soft-deleted feature; returns the number of features removed"""
+        purged = 0
+        while True:
+            feature_ids = self.feature_repo.get_deleted_ids(batch_size)
+            for feature_id in feature_ids:
+                self.purge_feature(feature_id, chunk_size)
+            purged += len(feature_ids)
+            if len(feature_ids) < batch_size:
+                return purged
+
+class PurgeWorker:
+    """Runs purge_deleted on a background thread; schedules while it runs are coalesced"""
+    
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._pending = set()
+        # Cleared under the lock when the thread decides to exit, unlike is_alive() which lags behind
+        self._running = False
+        self._thread = None
+    
+    @classmethod
+    def for_app(cls, app) -> 'PurgeWorker':
+        worker = app.extensions.get('purge_worker')
+        if worker is None:
+            worker = app.extensions.setdefault('purge_worker', cls(app))
+        return worker
+    
+    def schedule(self, board_id: Optional[str] = None):
+        """Request a purge pass of a board, starting the worker thread if it is idle"""
+        with self._lock:
+            self._pending.add(board_id or current_board())
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name='feature-purge', daemon=True)
+                self._thread.start()
+    
+    def join(self, timeout: Optional[float] = None):
+        """Wait for the worker thread to finish"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                board_id = self._pending.pop()
+            with self.app.app_context(), use_board(board_id):
+                try:
+                    PurgeService().purge_deleted()
+                except Exception:
+                    logger.exception("Background purge of deleted features failed")
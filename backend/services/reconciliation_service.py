@@ -0,0 +1,88 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from flask import current_app
+from boards import current_board
+from cache.coherence import coherence, FEATURES_RECOUNTED
+from repositories.feature_repository import FeatureRepository
+from services.board_worker import PeriodicBoardWorker
+from transactions import transactional
+
+logger = logging.getLogger(__name__)
+
+class ReconciliationReport:
+    """Drift between stored upvotes and counted votes found by one reconciliation pass"""
+    
+    def __init__(self, board_id: str):
+        self.board_id = board_id
+        self.checked = 0
+        self.drifted = 0
+        self.fixed = 0
+        # Changed by a live vote between the count and the update; left for the next pass
+        self.conflicts = 0
+        self.total_drift = 0
+        self.max_drift = 0
+        self.duration_seconds = 0.0
+        self.finished_at: Optional[float] = None
+    
+    def record(self, upvotes: int, votes_count: int):
+        self.checked += 1
+        drift = abs(upvotes - votes_count)
+        if drift:
+            self.drifted += 1
+            self.total_drift += drift
+            self.max_drift = max(self.max_drift, drift)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+class ReconciliationService:
+    def __init__(self):
+        self.feature_repo = FeatureRepository()
+    
+    def reconcile(self, chunk_size: Optional[int] = None, apply: bool = True) -> ReconciliationReport:
+        """Recount every feature's votes in id-ordered chunks and repair drifted upvotes.
+        
+        Each chunk is one grouped aggregate and one short write transaction, and every repair is a
+        compare-and-set on the counter that was read, so concurrent votes are never overwritten or blocked.
+        """
+        chunk_size = chunk_size or current_app.config['RECONCILE_CHUNK_SIZE']
+        report = ReconciliationReport(current_board())
+        started = time.perf_counter()
+        last_id = 0
+        while True:
+            rows = self.feature_repo.get_upvote_drift_chunk(last_id, chunk_size)
+            for _, upvotes, votes_count in rows:
+                report.record(upvotes, votes_count)
+            drifted = [row for row in rows if row[1] != row[2]]
+            if drifted and apply:
+                fixed = self._repair(drifted)
+                report.fixed += fixed
+                report.conflicts += len(drifted) - fixed
+            if len(rows) < chunk_size:
+                break
+            last_id = rows[-1][0]
+        report.duration_seconds = round(time.perf_counter() - started, 4)
+        report.finished_at = time.time()
+        if report.drifted:
+            logger.warning("Upvote drift on board %s: %s of %s features off by %s votes in total (%s fixed)",
+                           report.board_id, report.drifted, report.checked, report.total_drift, report.fixed)
+        return report
+    
+    @transactional
+    def _repair(self, drifted: List[Tuple[int, int, int]]) -> int:
+        fixed = self.feature_repo.compare_and_set_upvotes(drifted)
+        if fixed:
+            coherence.publish(FEATURES_RECOUNTED)
+        return fixed
+
+class ReconciliationWorker(PeriodicBoardWorker):
+    """Reconciles the served boards periodically on a background thread and keeps the latest reports"""
+    
+    extension_key = 'reconciliation_worker'
+    thread_name = 'vote-reconciliation'
+    interval_setting = 'RECONCILE_INTERVAL_SECONDS'
+    description = 'Upvote reconciliation'
+    
+    def run_board(self) -> ReconciliationReport:
+        return ReconciliationService().reconcile()
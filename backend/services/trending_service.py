@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Dict, Optional
+from flask import current_app
+from cache.coherence import coherence, FEATURES_RESCORED
+from database import db
+from models.vote import Vote
+from repositories.feature_repository import FeatureRepository
+from repositories.setting_repository import SettingRepository
+from sqlalchemy.exc import IntegrityError
+from transactions import save_changes, savepoint, transactional
+
+EPOCH_KEY = 'trending_epoch'
+# Votes rebase the scores once their weight passes 2 ** this, far below float overflow (2 ** 1024)
+REBASE_HALF_LIVES = 64
+
+class TrendingService:
+    """Time-decayed ranking where each vote adds 2 ** ((voted_at - epoch) / half_life).
+    
+    All scores share one epoch, so the stored column orders exactly like the
+    score decayed to "now" and can be indexed; rebase() moves the epoch forward
+    to keep the values from growing without bound.
+    """
+    
+    def __init__(self):
+        self.feature_repo = FeatureRepository()
+        self.setting_repo = SettingRepository()
+    
+    @property
+    def half_life_seconds(self) -> float:
+        return current_app.config.get('TRENDING_HALF_LIFE_HOURS', 24) * 3600
+    
+    def get_epoch(self) -> datetime:
+        """Get the reference time of stored trending scores (init_db creates it; created here if missing)"""
+        value = self.setting_repo.get_value(EPOCH_KEY)
+        if value is None:
+            epoch = datetime.utcnow()
+            try:
+                # Concurrent first votes race on the unique key; the losers use the winner's epoch
+                with savepoint():
+                    self.setting_repo.create_value(EPOCH_KEY, epoch.isoformat())
+                save_changes()
+                return epoch
+            except IntegrityError:
+                value = self.setting_repo.get_value(EPOCH_KEY)
+        return datetime.fromisoformat(value)
+    
+    def vote_weight(self, voted_at: Optional[datetime] = None, epoch: Optional[datetime] = None) -> float:
+        """Weight of a vote cast at the given time, relative to the epoch (rebased first when it grows too far)"""
+        voted_at = voted_at or datetime.utcnow()
+        if epoch is None:
+            epoch = self.get_epoch()
+            if (voted_at - epoch).total_seconds() / self.half_life_seconds > REBASE_HALF_LIVES:
+                self.rebase(voted_at)
+                epoch = voted_at
+        return 2 ** ((voted_at - epoch).total_seconds() / self.half_life_seconds)
+    
+    def decayed_score(self, trending_score: float, now: Optional[datetime] = None) -> float:
+        """Convert a stored score into its value decayed to the given time"""
+        now = now or datetime.utcnow()
+        return trending_score * 2 ** ((self.get_epoch() - now).total_seconds() / self.half_life_seconds)
+    
+    @transactional
+    def rebase(self, now: Optional[datetime] = None) -> float:
+        """Re-decay every stored score to a new epoch; returns the factor applied"""
+        now = now or datetime.utcnow()
+        factor = 2 ** ((self.get_epoch() - now).total_seconds() / self.half_life_seconds)
+        self.feature_repo.scale_trending_scores(factor)
+        self.setting_repo.set_value(EPOCH_KEY, now.isoformat())
+        coherence.publish(FEATURES_RESCORED, board_id=None)
+        return factor
+    
+    @transactional
+    def rebuild(self, chunk_size: int = 1000, now: Optional[datetime] = None) -> int:
+        """Recompute every score from vote timestamps, streaming votes in chunks"""
+        epoch = now or datetime.utcnow()
+        scores: Dict[int, float] = {}
+        votes = db.session.query(Vote.feature_id, Vote.created_at).filter(
+            Vote.quarantined_at.is_(None)
+        ).yield_per(chunk_size)
+        for feature_id, created_at in votes:
+            scores[feature_id] = scores.get(feature_id, 0.0) + self.vote_weight(created_at, epoch)
+        
+        self.feature_repo.replace_trending_scores(scores)
+        self.setting_repo.set_value(EPOCH_KEY, epoch.isoformat())
+        coherence.publish(FEATURES_RESCORED, board_id=None)
+        return len(scores)
@@ -1,14 +1,27 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from flask import current_app
+from boards import current_board
+from cache.coherence import coherence, VOTE_CREATED, VOTE_REMOVED
 from repositories.feature_repository import FeatureRepository
+from repositories.recommendation_repository import RecommendationRepository
 from repositories.vote_repository import VoteRepository
+from fraud.detector import VoteEvent
+from services.analytics_service import AnalyticsService
+from services.fraud_service import FraudWorker
+from services.trending_service import TrendingService
 from sqlalchemy.exc import IntegrityError
+from transactions import after_commit, transactional
 
 class VoteService:
     def __init__(self):
         self.feature_repo = FeatureRepository()
         self.vote_repo = VoteRepository()
+        self.recommendation_repo = RecommendationRepository()
+        self.trending_service = TrendingService()
+        self.analytics_service = AnalyticsService()
     
-    def upvote_feature(self, feature_id: int, user_id: str) -> Dict[str, Any]:
+    @transactional
+    def upvote_feature(self, feature_id: int, user_id: str, client_ip: Optional[str] = None) -> Dict[str, Any]:
         """Upvote a feature"""
         if not user_id:
             raise ValueError("User ID is required")
@@ -25,14 +38,26 @@ class VoteService:
         
         try:
             # Create vote
-            self.vote_repo.create(feature_id=feature_id, user_id=user_id)
-            # Increment feature upvotes
-            feature = self.feature_repo.increment_upvotes(feature)
+            vote = self.vote_repo.create(feature_id=feature_id, user_id=user_id, client_ip=client_ip)
+            # Count it in the time-bucketed rollups
+            self.analytics_service.record_vote(feature_id, vote.created_at, commit=False)
+            # Increment feature upvotes and its trending score
+            weight = self.trending_service.vote_weight(vote.created_at)
+            feature = self.feature_repo.increment_upvotes(feature, weight)
+            vote_id = vote.id
+            coherence.publish(VOTE_CREATED, feature_id=feature_id, user_id=user_id, vote_id=vote_id)
+            after_commit(lambda: self.recommendation_repo.add_vote(feature_id, user_id, vote_id))
+            if current_app.config['FRAUD_DETECTION_ENABLED']:
+                # Inspected once committed, asynchronously unless FRAUD_IN_BACKGROUND is off
+                worker = FraudWorker.for_app(current_app._get_current_object())
+                event = VoteEvent.from_vote(vote, current_board())
+                after_commit(lambda: worker.submit(event))
             return feature.to_dict()
         
         except IntegrityError:
             raise ValueError("User already voted for this feature")
     
+    @transactional
     def remove_vote(self, feature_id: int, user_id: str) -> Dict[str, Any]:
         """Remove a user's vote from a feature"""
         if not user_id:
@@ -49,11 +74,21 @@ class VoteService:
             raise ValueError("Vote not found")
         
         # Remove vote
+        if vote.quarantined_at is not None:
+            # A quarantined vote was already taken out of the counts
+            self.vote_repo.delete(vote)
+            coherence.publish(VOTE_REMOVED, feature_id=feature_id, user_id=user_id, quarantined=True)
+            return feature.to_dict()
+        weight = self.trending_service.vote_weight(vote.created_at)
+        self.analytics_service.record_removal(vote)
         self.vote_repo.delete(vote)
-        # Decrement feature upvotes
-        feature = self.feature_repo.decrement_upvotes(feature)
+        # Decrement feature upvotes and take the vote's weight back out of the trending score
+        feature = self.feature_repo.decrement_upvotes(feature, weight)
+        coherence.publish(VOTE_REMOVED, feature_id=feature_id, user_id=user_id)
+        after_commit(lambda: self.recommendation_repo.remove_vote(feature_id, user_id))
         return feature.to_dict()
     
     def get_user_votes(self, user_id: str) -> List[int]:
         """Get list of feature IDs that user has voted for"""
-        return self.vote_repo.get_user_voted_feature_ids(user_id)
\ No newline at end of file
+        voted = coherence.cached('votes', (user_id,), lambda: self.vote_repo.get_user_voted_feature_ids(user_id))
+        return list(voted)
\ No newline at end of file
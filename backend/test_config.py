@@ -3,7 +3,7 @@
 import os
 import tempfile
 from app import create_app
-from database import db
+from database import init_db
 
 class TestConfig:
     """Test configuration class"""
@@ -22,8 +22,7 @@ def create_test_app():
     # Create temporary database
     db_fd, db_path = tempfile.mkstemp()
     
-    app = create_app()
-    app.config.update({
+    app = create_app({
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
@@ -32,7 +31,8 @@ def create_test_app():
     })
     
     with app.app_context():
-        db.create_all()
+        # Imports the models (otherwise loaded on first use) so every table is created
+        init_db()
     
     return app, db_fd, db_path
 
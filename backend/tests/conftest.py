@@ -1,33 +1,73 @@
 import pytest
 import os
-import tempfile
+import sqlite3
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
 from app import create_app
-from database import db
+from database import db, reset_engine_state
 from models.feature import Feature
 from models.vote import Vote
 
-@pytest.fixture
-def app():
-    """Create application for testing"""
-    # Create a temporary file for the test database
-    db_fd, db_path = tempfile.mkstemp()
+# How each test gets an empty database: 'template' copies a schema built once per test process into it
+# with the SQLite backup API, 'fresh' creates and drops every table around each test
+DB_MODE = os.environ.get('TEST_DB_MODE', 'template')
+
+@pytest.fixture(scope='session')
+def database_path(tmp_path_factory):
+    """The database file of this test process (pytest-xdist workers each get their own)"""
+    return str(tmp_path_factory.mktemp('db') / 'features.db')
+
+@pytest.fixture(scope='session')
+def schema_template():
+    """An in-memory database holding the empty schema, built once per test process"""
+    if DB_MODE != 'template':
+        yield None
+        return
+    import models
     
-    app = create_app()
-    app.config.update({
+    engine = create_engine('sqlite://', poolclass=StaticPool)
+    db.metadata.create_all(engine)
+    connection = engine.raw_connection()
+    yield connection.driver_connection
+    connection.close()
+    engine.dispose()
+
+@pytest.fixture
+def app_config(database_path):
+    """Configuration of the test app, for tests that start a second worker on the same database"""
+    return {
         'TESTING': True,
-        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{database_path}',
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'SECRET_KEY': 'test-secret-key',
-        'WTF_CSRF_ENABLED': False
-    })
+        'WTF_CSRF_ENABLED': False,
+        'PURGE_IN_BACKGROUND': False,
+        'FRAUD_IN_BACKGROUND': False
+    }
+
+@pytest.fixture
+def app(app_config, database_path, schema_template):
+    """Create application for testing"""
+    if schema_template is not None:
+        # Replaces whatever the previous test left with the empty schema in one step
+        target = sqlite3.connect(database_path)
+        try:
+            schema_template.backup(target)
+        finally:
+            target.close()
+    
+    app = create_app(app_config)
     
     with app.app_context():
-        db.create_all()
+        if schema_template is None:
+            db.create_all()
         yield app
-        db.drop_all()
-    
-    os.close(db_fd)
-    os.unlink(db_path)
+        if schema_template is None:
+            db.drop_all()
+        db.session.remove()
+        for engine in list(db.engines.values()) + list(app.extensions.get('board_engines', {}).values()):
+            engine.dispose()
+    reset_engine_state()
 
 @pytest.fixture
 def client(app):
@@ -51,13 +91,13 @@ def sample_feature_data():
 @pytest.fixture
 def sample_feature(app):
     """Create a sample feature in the database"""
-    with app.app_context():
-        feature = Feature(
-            title='Sample Feature',
-            description='Sample description',
-            author='Sample Author',
-            upvotes=5
-        )
-        db.session.add(feature)
-        db.session.commit()
-        return feature
\ No newline at end of file
+    # In the app fixture's context, so the feature stays attached to a live session for the test
+    feature = Feature(
+        title='Sample Feature',
+        description='Sample description',
+        author='Sample Author',
+        upvotes=5
+    )
+    db.session.add(feature)
+    db.session.commit()
+    return feature
@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+import pytest
+from database import db
+from models.feature import Feature
+from services.backup_service import BackupService
+from services.feature_service import FeatureService
+from services.vote_service import VoteService
+
+@pytest.fixture
+def backup_dir(app, tmp_path):
+    app.config.update({'BACKUP_DIR': str(tmp_path), 'ADMIN_TOKEN': 'secret', 'RATELIMIT_ENABLED': False})
+    return tmp_path
+
+def rows(path, query):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(query).fetchall()
+    finally:
+        connection.close()
+
+class TestBackupService:
+    """Test online snapshots and restores of the SQLite database"""
+    
+    def test_snapshot_taken_during_votes_is_consistent(self, app, backup_dir):
+        """Test a backup copied a page at a time under concurrent votes matches counters to vote rows"""
+        app.config.update({'BACKUP_PAGES_PER_STEP': 1, 'BACKUP_STEP_SLEEP_SECONDS': 0.001,
+                           'BACKUP_MAX_RESTARTS': 3})
+        with app.app_context():
+            ids = [FeatureService().create_feature(f'Feature {i}', 'Author', 'x' * 2000)['id'] for i in range(50)]
+        stop = threading.Event()
+        voted = []
+        
+        def vote():
+            with app.app_context():
+                while not stop.is_set():
+                    VoteService().upvote_feature(ids[len(voted) % len(ids)], f'user{len(voted)}')
+                    voted.append(1)
+        
+        voter = threading.Thread(target=vote)
+        voter.start()
+        try:
+            with app.app_context():
+                backup = BackupService().backup()
+        finally:
+            stop.set()
+            voter.join()
+        
+        assert voted
+        assert backup['steps'] > 1
+        counts = rows(backup['path'], 'SELECT f.upvotes, (SELECT COUNT(*) FROM votes v WHERE v.feature_id = f.id) '
+                                      'FROM features f')
+        assert len(counts) == 50
+        assert all(upvotes == votes for upvotes, votes in counts)
+    
+    def test_restore_replaces_contents_and_caches(self, app, backup_dir):
+        """Test a restore brings back the snapshot and lists stop serving the replaced contents"""
+        with app.app_context():
+            service = FeatureService()
+            kept_id = service.create_feature('Kept', 'Author')['id']
+            backup = BackupService().backup()
+            service.create_feature('Lost', 'Author')
+            assert len(service.get_all_features()) == 2
+            
+            BackupService().restore(backup['path'])
+            
+            assert [feature['id'] for feature in service.get_all_features()] == [kept_id]
+            assert db.session.query(Feature).count() == 1
+
+class TestAdminRoutes:
+    """Test the admin backup endpoints"""
+    
+    def test_disabled_without_token(self, app, client, backup_dir):
+        """Test the endpoints do not exist unless ADMIN_TOKEN is configured"""
+        app.config['ADMIN_TOKEN'] = ''
+        
+        response = client.post('/api/admin/backups', headers={'Authorization': 'Bearer '})
+        
+        assert response.status_code == 404
+    
+    def test_requires_token(self, client, backup_dir):
+        """Test a missing or wrong bearer token is rejected"""
+        assert client.get('/api/admin/backups').status_code == 401
+        assert client.get('/api/admin/backups', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    
+    def test_backup_and_restore(self, client, backup_dir):
+        """Test creating, listing and restoring a backup"""
+        headers = {'Authorization': 'Bearer secret'}
+        client.post('/api/features', json={'title': 'Kept', 'author': 'Author'})
+        
+        created = client.post('/api/admin/backups', headers=headers)
+        client.post('/api/features', json={'title': 'Lost', 'author': 'Author'})
+        listed = client.get('/api/admin/backups', headers=headers)
+        restored = client.post(f"/api/admin/backups/{created.get_json()['name']}/restore", headers=headers)
+        
+        assert created.status_code == 201
+        assert 'path' not in created.get_json()
+        assert listed.get_json()[0]['name'] == created.get_json()['name']
+        assert restored.status_code == 200
+        assert [feature['title'] for feature in client.get('/api/features').get_json()] == ['Kept']
+    
+    def test_restore_rejects_other_files(self, app, client, backup_dir, tmp_path):
+        """Test only backup names of the board in BACKUP_DIR can be restored"""
+        app.config['BOARD_DATABASES'] = {'mobile': f"sqlite:///{tmp_path / 'mobile.db'}"}
+        headers = {'Authorization': 'Bearer secret'}
+        
+        invalid = client.post('/api/admin/backups/features.db/restore', headers=headers)
+        missing = client.post('/api/admin/backups/default-20260101T000000000000.db/restore', headers=headers)
+        other_board = client.post('/api/boards/mobile/admin/backups/default-20260101T000000000000.db/restore',
+                                  headers=headers)
+        
+        assert invalid.status_code == 400
+        assert missing.get_json() == {'error': 'Backup not found'}
+        assert other_board.get_json() == {'error': 'Invalid backup name'}
+    
+    def test_board_in_the_shared_database(self, client, backup_dir):
+        """Test a board without its own database cannot back up or restore the shared one"""
+        headers = {'Authorization': 'Bearer secret'}
+        
+        created = client.post('/api/boards/mobile/admin/backups', headers=headers)
+        listed = client.get('/api/boards/mobile/admin/backups', headers=headers)
+        restored = client.post('/api/boards/mobile/admin/backups/mobile-20260101T000000000000.db/restore',
+                               headers=headers)
+        
+        assert [created.status_code, listed.status_code, restored.status_code] == [400, 400, 400]
+        assert 'no database of its own' in restored.get_json()['error']
+        assert list(backup_dir.iterdir()) == []
+    
+    def test_board_with_its_own_database(self, app, client, backup_dir, tmp_path):
+        """Test a board with its own database backs up and restores only that database"""
+        app.config['BOARD_DATABASES'] = {'mobile': f"sqlite:///{tmp_path / 'mobile.db'}"}
+        headers = {'Authorization': 'Bearer secret'}
+        client.post('/api/boards/mobile/features', json={'title': 'Kept', 'author': 'Author'})
+        
+        created = client.post('/api/boards/mobile/admin/backups', headers=headers)
+        client.post('/api/boards/mobile/features', json={'title': 'Lost', 'author': 'Author'})
+        client.post('/api/features', json={'title': 'Shared', 'author': 'Author'})
+        restored = client.post(f"/api/boards/mobile/admin/backups/{created.get_json()['name']}/restore",
+                               headers=headers)
+        
+        assert restored.status_code == 200
+        assert [f['title'] for f in client.get('/api/boards/mobile/features').get_json()] == ['Kept']
+        assert [f['title'] for f in client.get('/api/features').get_json()] == ['Shared']
@@ -0,0 +1,527 @@
+import pytest
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from app import create_app
+from cache.bus import LocalEventBus, UnixSocketEventBus, create_bus
+from cache.coherence import coherence
+from cache.feature_cache import FeatureCache
+from cache.read_model import read_model, ReadModelFile
+from cache.single_flight import SingleFlight
+from database import db
+from repositories.feature_repository import FeatureRepository
+from sqlalchemy import event
+from services.feature_service import FeatureService
+from services.vote_service import VoteService
+
+CONVERGENCE_TIMEOUT = 5.0
+
+def wait_for(condition, timeout=CONVERGENCE_TIMEOUT):
+    """Poll until condition() is true or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+def _echo_worker(directory, ready):
+    """Join the bus and answer the first ping from another process with a pong"""
+    bus = UnixSocketEventBus(directory)
+    answered = threading.Event()
+    
+    def handle(event):
+        if event['type'] == 'ping' and event['origin'] != bus.origin:
+            bus.publish('pong', pid=os.getpid())
+            answered.set()
+    
+    bus.subscribe(handle)
+    ready.set()
+    answered.wait(CONVERGENCE_TIMEOUT)
+    bus.close()
+
+def snapshot(version, size=200):
+    """A feature list whose every field encodes its version, so torn reads are detectable.
+    
+    Strings keep the same length across versions, so a torn read decodes cleanly instead of failing.
+    """
+    return [{'id': i + 1, 'title': f'v{version:06d} feature {i:04d}', 'description': None if i % 2 else 'Ñoño ✓',
+             'author': f'v{version:06d}', 'upvotes': version, 'votes_count': version, 'trending_score': float(i),
+             'created_at': datetime(2024, 1, 1, 0, 0, i % 60), 'updated_at': datetime(2024, 1, 1)}
+            for i in range(size)]
+
+def _rewrite_worker(path, stop):
+    """Keep rewriting the read model with alternating snapshots until told to stop"""
+    model = ReadModelFile(path, 'default')
+    version = 0
+    # No change is announced, so readers keep reading while the records are rewritten under them
+    while not stop.is_set():
+        version += 1
+        model.rebuild(lambda: snapshot(version))
+    model.close()
+
+@pytest.fixture
+def bus_dir():
+    """A short socket directory (AF_UNIX paths are limited to ~108 bytes)"""
+    directory = tempfile.mkdtemp(prefix='bus-')
+    yield directory
+    for name in os.listdir(directory):
+        os.unlink(os.path.join(directory, name))
+    os.rmdir(directory)
+
+class TestFeatureCache:
+    """Test the TTL feature cache"""
+    
+    def test_hit_then_expire(self):
+        """Test values are reused until the TTL passes"""
+        now = [0.0]
+        cache = FeatureCache(ttl=10, clock=lambda: now[0])
+        loads = []
+        load = lambda: loads.append(1) or len(loads)
+        
+        assert cache.get_or_load(('features', 'default'), load) == 1
+        assert cache.get_or_load(('features', 'default'), load) == 1
+        now[0] += 11
+        assert cache.get_or_load(('features', 'default'), load) == 2
+    
+    def test_invalidate_is_scoped(self):
+        """Test invalidation drops only matching board and user entries"""
+        cache = FeatureCache()
+        for key in [('votes', 'default', 'u1'), ('votes', 'default', 'u2'), ('votes', 'other', 'u1')]:
+            cache.get_or_load(key, lambda: [])
+        
+        cache.invalidate('votes', 'default', 'u1')
+        assert set(cache.entries) == {('votes', 'default', 'u2'), ('votes', 'other', 'u1')}
+        
+        cache.invalidate('votes', None)
+        assert cache.entries == {}
+    
+    def test_load_racing_an_invalidation_is_not_stored(self):
+        """Test a value loaded before an invalidation is not cached"""
+        cache = FeatureCache()
+        
+        def load():
+            cache.invalidate('features', 'default')
+            return 'stale'
+        
+        assert cache.get_or_load(('features', 'default'), load) == 'stale'
+        assert cache.entries == {}
+    
+    def test_max_entries(self):
+        """Test the oldest entries are evicted beyond max_entries"""
+        cache = FeatureCache(max_entries=2)
+        for user_id in ('a', 'b', 'c'):
+            cache.get_or_load(('votes', 'default', user_id), lambda: [])
+        
+        assert list(cache.entries) == [('votes', 'default', 'b'), ('votes', 'default', 'c')]
+
+def burst(app, call, size=20):
+    """Run call() from `size` threads at once, each in its own app context; returns results or exceptions"""
+    barrier = threading.Barrier(size)
+    results = [None] * size
+    
+    def run(index):
+        with app.app_context():
+            barrier.wait()
+            try:
+                results[index] = call()
+            except Exception as e:
+                results[index] = e
+    
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(size)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class TestSingleFlight:
+    """Test coalescing of identical concurrent calls"""
+    
+    def run_while_blocked(self, flights, key, callers, **kwargs):
+        """Start a leader that blocks until released, then the callers; returns their outcomes"""
+        release, calls, results = threading.Event(), [], {}
+        
+        def slow():
+            calls.append(1)
+            release.wait(CONVERGENCE_TIMEOUT)
+            return kwargs.get('value', 'shared')
+        
+        def call(name, func):
+            try:
+                results[name] = flights.do(key, func, kwargs.get('timeout'))
+            except Exception as e:
+                results[name] = e
+        
+        leader = threading.Thread(target=call, args=('leader', kwargs.get('func', slow)))
+        leader.start()
+        assert wait_for(lambda: flights.in_flight() == 1)
+        threads = [threading.Thread(target=call, args=(name, func)) for name, func in callers]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads + [leader]:
+            thread.join()
+        return calls, results
+    
+    def test_concurrent_calls_share_one_execution(self):
+        """Test callers arriving mid-flight get the leader's value without running their own"""
+        flights = SingleFlight()
+        own = lambda: 'own'
+        calls, results = self.run_while_blocked(flights, 'key', [(i, own) for i in range(5)])
+        
+        assert calls == [1]
+        assert set(results.values()) == {'shared'}
+        assert flights.in_flight() == 0
+        assert flights.do('key', own) == 'own'
+    
+    def test_errors_reach_every_waiter(self):
+        """Test the leader's exception is raised in each waiting caller"""
+        flights = SingleFlight()
+        release = threading.Event()
+        
+        def failing():
+            release.wait(CONVERGENCE_TIMEOUT)
+            raise RuntimeError('database down')
+        
+        threading.Timer(0.2, release.set).start()
+        _, results = self.run_while_blocked(flights, 'key', [(i, lambda: 'own') for i in range(3)], func=failing)
+        
+        assert all(isinstance(result, RuntimeError) for result in results.values())
+    
+    def test_waiters_time_out(self):
+        """Test a waiter gives up after its timeout while the leader keeps running"""
+        flights = SingleFlight()
+        _, results = self.run_while_blocked(flights, 'key', [('waiter', lambda: 'own')], timeout=0.01)
+        
+        assert isinstance(results['waiter'], TimeoutError)
+        assert results['leader'] == 'shared'
+    
+    def test_reads_after_an_invalidation_start_a_new_load(self):
+        """Test a read following a change does not join a load that started before it"""
+        cache = FeatureCache()
+        release, loads = threading.Event(), []
+        
+        def slow():
+            loads.append('old')
+            release.wait(CONVERGENCE_TIMEOUT)
+            return 'old'
+        
+        leader = threading.Thread(target=cache.get_or_load, args=(('features', 'default'), slow))
+        leader.start()
+        assert wait_for(lambda: cache.flights.in_flight() == 1)
+        cache.invalidate('features', 'default')
+        
+        assert cache.get_or_load(('features', 'default'), lambda: 'new') == 'new'
+        release.set()
+        leader.join()
+        assert cache.get_or_load(('features', 'default'), lambda: 'newer') == 'new'
+
+class TestCoalescedReads:
+    """Test bursts of identical reads reach the database once"""
+    
+    @pytest.fixture
+    def queries(self, app):
+        """Record SELECTs, each held for a moment so a burst piles up behind the first one"""
+        statements = []
+        
+        def listener(connection, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT'):
+                statements.append(statement)
+                time.sleep(0.2)
+        
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            yield statements
+            event.remove(db.engine, 'before_cursor_execute', listener)
+    
+    @pytest.fixture
+    def feature_id(self, app):
+        with app.app_context():
+            feature_id = FeatureService().create_feature(title='Coalesced feature', author='Author')['id']
+            VoteService().upvote_feature(feature_id, 'voter')
+            return feature_id
+    
+    def test_list_burst_runs_one_query(self, app, feature_id, queries):
+        """Test a burst of feature list reads on a cold cache shares one list query"""
+        results = burst(app, lambda: FeatureService().get_all_features())
+        
+        assert len(queries) == 1
+        assert all(result == results[0] for result in results)
+        assert results[0][0]['id'] == feature_id
+    
+    def test_feature_and_user_vote_bursts_run_one_query(self, app, feature_id, queries):
+        """Test bursts for one feature by ID, and for one user's votes, each share one query"""
+        features = burst(app, lambda: FeatureService().get_feature_by_id(feature_id))
+        assert len(queries) == 2  # the feature row, then its votes_count
+        assert all(feature['upvotes'] == 1 for feature in features)
+        
+        votes = burst(app, lambda: VoteService().get_user_votes('voter'))
+        assert len(queries) == 3
+        assert all(result == [feature_id] for result in votes)
+    
+    def test_errors_propagate_to_the_burst(self, app, feature_id, queries, monkeypatch):
+        """Test a failing load fails every coalesced caller, and the next read retries"""
+        calls = []
+        
+        def failing(self, *args, **kwargs):
+            calls.append(1)
+            time.sleep(0.2)
+            raise RuntimeError('database down')
+        
+        monkeypatch.setattr(FeatureService, '_load_features', failing)
+        results = burst(app, lambda: FeatureService().get_all_features())
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) for result in results)
+        
+        monkeypatch.undo()
+        with app.app_context():
+            assert FeatureService().get_all_features()[0]['id'] == feature_id
+
+class TestEventBus:
+    """Test the event bus implementations"""
+    
+    def test_local_bus_delivers_synchronously(self):
+        """Test the local bus calls subscribers before publish returns"""
+        bus = LocalEventBus()
+        received = []
+        bus.subscribe(received.append)
+        
+        bus.publish('vote.created', feature_id=1)
+        assert received == [{'type': 'vote.created', 'feature_id': 1, 'origin': bus.origin}]
+    
+    def test_create_bus_rejects_unknown_url(self):
+        """Test unsupported bus URLs are rejected"""
+        assert isinstance(create_bus('local://'), LocalEventBus)
+        with pytest.raises(ValueError, match="Unsupported event bus"):
+            create_bus('kafka://nowhere')
+    
+    def test_unix_bus_across_processes(self, bus_dir):
+        """Test an event published in one process reaches every other process"""
+        context = multiprocessing.get_context('fork')
+        workers = []
+        for _ in range(3):
+            ready = context.Event()
+            process = context.Process(target=_echo_worker, args=(bus_dir, ready))
+            process.start()
+            workers.append((process, ready))
+        for _, ready in workers:
+            assert ready.wait(CONVERGENCE_TIMEOUT)
+        
+        bus = UnixSocketEventBus(bus_dir)
+        pongs = set()
+        bus.subscribe(lambda event: event['type'] == 'pong' and pongs.add(event['pid']))
+        try:
+            bus.publish('ping')
+            assert wait_for(lambda: len(pongs) == 3)
+            assert pongs == {process.pid for process, _ in workers}
+        finally:
+            bus.close()
+            for process, _ in workers:
+                process.join(CONVERGENCE_TIMEOUT)
+        assert all(process.exitcode == 0 for process, _ in workers)
+    
+    def test_unix_bus_skips_dead_peers(self, bus_dir):
+        """Test sockets left behind by exited processes are cleaned up"""
+        stale = os.path.join(bus_dir, 'stale.sock')
+        dead = UnixSocketEventBus(bus_dir)
+        os.rename(dead.path, stale)
+        dead.close()
+        
+        bus = UnixSocketEventBus(bus_dir)
+        try:
+            bus.publish('ping')
+            assert not os.path.exists(stale)
+        finally:
+            bus.close()
+
+class TestCacheCoherence:
+    """Test two workers sharing a database keep their caches coherent"""
+    
+    @pytest.fixture
+    def workers(self, app, app_config, bus_dir):
+        apps = [app, create_app(app_config)]
+        for worker in apps:
+            worker.config.update({
+                'EVENT_BUS_URL': f'unix://{bus_dir}',
+                'CACHE_TTL_SECONDS': 300,
+                'PURGE_IN_BACKGROUND': False
+            })
+        yield apps
+        for worker in apps:
+            coherence.close(worker)
+    
+    def test_vote_invalidates_other_worker(self, workers):
+        """Test a vote in one worker refreshes the other worker's cached lists"""
+        first, second = workers
+        feature_service = FeatureService()
+        vote_service = VoteService()
+        with first.app_context():
+            coherence.connect()
+            feature_id = feature_service.create_feature(title='Shared feature', author='Author')['id']
+        
+        with second.app_context():
+            coherence.connect()
+            assert feature_service.get_all_features()[0]['upvotes'] == 0
+            assert vote_service.get_user_votes('user1') == []
+        
+        with first.app_context():
+            vote_service.upvote_feature(feature_id, 'user1')
+        
+        def converged():
+            with second.app_context():
+                return (feature_service.get_all_features()[0]['upvotes'] == 1
+                        and vote_service.get_user_votes('user1') == [feature_id])
+        
+        assert wait_for(converged)
+    
+    def test_feature_events_update_memory_indexes(self, workers):
+        """Test features created and deleted elsewhere reach this worker's in-memory indexes"""
+        first, second = workers
+        second.config['SEARCH_BACKEND'] = 'memory'
+        feature_service = FeatureService()
+        with second.app_context():
+            coherence.connect()
+            assert feature_service.search_features('telescope') == []
+            assert feature_service.find_duplicates('Telescope mount support') == []
+        
+        with first.app_context():
+            coherence.connect()
+            feature_id = feature_service.create_feature(title='Telescope mount support', author='Author')['id']
+        
+        def indexed():
+            with second.app_context():
+                return ([f['id'] for f in feature_service.search_features('telescope')] == [feature_id]
+                        and [f['id'] for f in feature_service.find_duplicates('Telescope mount support')] == [feature_id])
+        
+        assert wait_for(indexed)
+        
+        with first.app_context():
+            feature_service.delete_feature(feature_id)
+        
+        def removed():
+            with second.app_context():
+                return feature_service.search_features('telescope') == []
+        
+        assert wait_for(removed)
+
+class TestReadModel:
+    """Test the feature list read model shared through a mapped file"""
+    
+    @pytest.fixture
+    def model_dir(self):
+        with tempfile.TemporaryDirectory() as directory:
+            yield directory
+    
+    def test_round_trip(self, model_dir):
+        """Test records decode to the rows they were built from, in both orders"""
+        model = ReadModelFile(os.path.join(model_dir, 'features-default.bin'), 'default')
+        rows = snapshot(3, size=5)
+        assert model.read('votes') is None
+        
+        assert model.rebuild(lambda: rows)
+        assert model.read('votes') == [dict(row, board_id='default', deleted_at=None) for row in rows]
+        assert [row['id'] for row in model.read('trending', limit=3)] == [5, 4, 3]
+        
+        model.mark_changed()
+        assert model.read('votes') is None
+        model.close()
+    
+    def test_grows_past_its_initial_size(self, model_dir):
+        """Test a list larger than the initial mapping is readable through another mapping"""
+        path = os.path.join(model_dir, 'features-default.bin')
+        writer, reader = ReadModelFile(path, 'default'), ReadModelFile(path, 'default')
+        writer.rebuild(lambda: snapshot(1, size=5000))
+        
+        assert len(reader.read('votes')) == 5000
+        writer.close()
+        reader.close()
+    
+    def test_readers_never_see_a_torn_list(self, model_dir):
+        """Test lists read while another process keeps rewriting them are each one consistent snapshot"""
+        path = os.path.join(model_dir, 'features-default.bin')
+        model = ReadModelFile(path, 'default')
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        writer = context.Process(target=_rewrite_worker, args=(path, stop))
+        writer.start()
+        consistent = 0
+        try:
+            deadline = time.monotonic() + 2
+            while time.monotonic() < deadline:
+                features = model.read('votes')
+                if features is None:
+                    continue
+                version = features[0]['upvotes']
+                assert features == [dict(row, board_id='default', deleted_at=None) for row in snapshot(version)]
+                consistent += 1
+        finally:
+            stop.set()
+            writer.join()
+            model.close()
+        assert consistent > 0
+    
+    def test_change_on_every_board_stales_every_file(self, app, model_dir):
+        """Test an announcement without a board (trending rebase) stales the list of every board"""
+        app.config['READ_MODEL_DIR'] = model_dir
+        try:
+            for board_id in ('default', 'mobile'):
+                read_model.file(app, board_id).rebuild(lambda: snapshot(1, size=3))
+            
+            read_model.mark_changed(app, None)
+            
+            assert sorted(os.listdir(model_dir)) == ['features-default.bin', 'features-mobile.bin']
+            assert all(read_model.file(app, board_id).is_stale() for board_id in ('default', 'mobile'))
+        finally:
+            read_model.close(app)
+    
+    def test_same_fields_as_the_database(self, app, client, model_dir):
+        """Test features served from the read model have the keys of those read from the database"""
+        app.config.update({'READ_MODEL_DIR': model_dir, 'CACHE_TTL_SECONDS': 0})
+        feature_id = FeatureService().create_feature(title='Shaped feature', author='Author')['id']
+        FeatureRepository().mark_votes_archived([feature_id])
+        db.session.commit()
+        try:
+            from_model = client.get('/api/features').get_json()[0]
+            from_database = client.get('/api/features?sort=newest').get_json()[0]
+            single = client.get(f'/api/features/{feature_id}').get_json()
+            
+            assert read_model.file(app, 'default').read('votes') is not None
+            assert set(from_model) == set(from_database) == set(single)
+            assert 'votes_archived_at' not in from_model
+        finally:
+            read_model.close(app)
+    
+    def test_workers_share_one_list(self, app, app_config, model_dir):
+        """Test a second worker serves the list built by the first without querying, until a change"""
+        second = create_app(app_config)
+        for worker in (app, second):
+            worker.config.update({'READ_MODEL_DIR': model_dir, 'CACHE_TTL_SECONDS': 0})
+        service = FeatureService()
+        with app.app_context():
+            feature_id = service.create_feature(title='Shared feature', author='Author')['id']
+            assert service.get_all_features()[0]['upvotes'] == 0
+        
+        queries = []
+        listener = lambda *args: queries.append(args[2])
+        try:
+            with second.app_context():
+                event.listen(db.engine, 'before_cursor_execute', listener)
+                assert service.get_all_features()[0]['id'] == feature_id
+                assert service.get_all_features(sort='trending', limit=1)[0]['id'] == feature_id
+                assert queries == []
+            
+            with app.app_context():
+                VoteService().upvote_feature(feature_id, 'user1')
+            with second.app_context():
+                assert service.get_all_features()[0]['upvotes'] == 1
+                assert len(queries) == 1
+        finally:
+            with second.app_context():
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            read_model.close(app)
+            read_model.close(second)
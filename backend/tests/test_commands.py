@@ -0,0 +1,125 @@
+import pytest
+from datetime import datetime
+from boards import use_board
+from models.feature import Feature
+from models.vote import Vote
+from services.feature_service import FeatureService
+from database import db
+
+# The schema of the first release, with the search table of the release before boards
+OLD_SCHEMA = [
+    'CREATE TABLE features (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, description TEXT, '
+    'author VARCHAR(100) NOT NULL, upvotes INTEGER NOT NULL, created_at DATETIME NOT NULL, '
+    'updated_at DATETIME NOT NULL)',
+    'CREATE TABLE votes (id INTEGER PRIMARY KEY, feature_id INTEGER NOT NULL REFERENCES features (id), '
+    'user_id VARCHAR(100) NOT NULL, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL, '
+    'CONSTRAINT unique_user_feature_vote UNIQUE (feature_id, user_id))',
+    "INSERT INTO features VALUES (1, 'Dark mode', NULL, 'Author', 1, '2024-01-01 00:00:00', '2024-01-01 00:00:00')",
+    "INSERT INTO votes VALUES (1, 1, 'user1', '2024-01-02 00:00:00', '2024-01-02 00:00:00')",
+    'CREATE VIRTUAL TABLE features_fts USING fts5(title, description)',
+    "INSERT INTO features_fts (rowid, title, description) VALUES (1, 'Dark mode', '')",
+]
+
+class TestCommands:
+    """Test CLI maintenance commands"""
+    
+    def test_upgrade_db(self, app, client, runner):
+        """Test a database of an older version is upgraded in place, once"""
+        db.drop_all()
+        with db.engine.begin() as connection:
+            for statement in OLD_SCHEMA:
+                connection.exec_driver_sql(statement)
+        
+        result = runner.invoke(args=['upgrade-db'])
+        again = runner.invoke(args=['upgrade-db'])
+        
+        assert result.exit_code == 0
+        assert 'added column features.board_id' in result.output
+        assert 'created table archived_votes' in result.output
+        assert 'dropped outdated features_fts' in result.output
+        assert 'created setting trending_epoch' in result.output
+        assert again.output == '0 schema changes\n'
+        features = client.get('/api/features').get_json()
+        assert [(feature['title'], feature['board_id'], feature['votes_count']) for feature in features] == [
+            ('Dark mode', 'default', 1)
+        ]
+        # The search index is rebuilt with its prefix indexes, which the next upgrade keeps
+        assert [f['title'] for f in client.get('/api/features/search?q=da').get_json()] == ['Dark mode']
+        assert runner.invoke(args=['upgrade-db']).output == '0 schema changes\n'
+        assert client.post('/api/features/1/upvote', json={'user_id': 'user2'}).status_code == 200
+        assert [feature['id'] for feature in client.get('/api/features/search?q=dark').get_json()] == [1]
+    
+    def test_cluster_duplicates(self, app, runner):
+        """Test the backlog clustering command prints one cluster per line"""
+        with app.app_context():
+            db.session.add_all([Feature(title=title, author='Author') for title in ('Dark mode', 'dark mode!', 'SSO')])
+            db.session.commit()
+        
+        result = runner.invoke(args=['cluster-duplicates'])
+        
+        assert result.exit_code == 0
+        assert result.output.splitlines()[0] == '1 2'
+    
+    def test_purge_deleted_is_board_scoped(self, app, runner):
+        """Test --board limits maintenance commands to one board"""
+        with app.app_context():
+            with use_board('mobile'):
+                mobile_id = FeatureService().create_feature('Mobile feature', 'Author')['id']
+                FeatureService().delete_feature(mobile_id)
+            default_id = FeatureService().create_feature('Default feature', 'Author')['id']
+            FeatureService().delete_feature(default_id)
+        
+        result = runner.invoke(args=['purge-deleted', '--board', 'mobile'])
+        
+        assert result.exit_code == 0
+        assert 'Purged 1 deleted features' in result.output
+        with app.app_context():
+            assert db.session.get(Feature, mobile_id) is None
+            assert db.session.get(Feature, default_id) is not None
+    
+    def test_reconcile_votes_repairs_drifted_counters(self, app, runner):
+        """Test upvotes are recounted from active votes and a dry run changes nothing"""
+        with app.app_context():
+            features = [Feature(title=f'Feature {i}', author='Author') for i in range(5)]
+            db.session.add_all(features)
+            db.session.commit()
+            db.session.add_all([Vote(feature_id=features[0].id, user_id=f'user{i}') for i in range(3)])
+            db.session.add(Vote(feature_id=features[1].id, user_id='flagged', quarantined_at=datetime.utcnow()))
+            features[0].upvotes = 1
+            features[1].upvotes = 1
+            features[2].upvotes = 4
+            db.session.commit()
+            ids = [feature.id for feature in features]
+        
+        dry_run = runner.invoke(args=['reconcile-votes', '--dry-run', '--chunk-size', '2'])
+        result = runner.invoke(args=['reconcile-votes', '--chunk-size', '2'])
+        again = runner.invoke(args=['reconcile-votes'])
+        
+        assert dry_run.exit_code == 0
+        assert 'fixed 0' in dry_run.output
+        assert result.exit_code == 0
+        assert 'checked 5\ndrifted 3\ntotal_drift 7\nmax_drift 4\nfixed 3\nconflicts 0' in result.output
+        assert 'drifted 0' in again.output
+        with app.app_context():
+            assert [db.session.get(Feature, feature_id).upvotes for feature_id in ids] == [3, 0, 0, 0, 0]
+    
+    def test_archive_votes(self, app, runner):
+        """Test votes of quiet features are archived, after a dry run that moves nothing"""
+        with app.app_context():
+            feature = Feature(title='Old', author='Author', upvotes=2, created_at=datetime(2020, 1, 1))
+            db.session.add(feature)
+            db.session.commit()
+            db.session.add_all([Vote(feature_id=feature.id, user_id=f'user{i}', created_at=datetime(2020, 1, 2))
+                                for i in range(2)])
+            db.session.commit()
+        
+        dry_run = runner.invoke(args=['archive-votes', '--dry-run'])
+        result = runner.invoke(args=['archive-votes', '--chunk-size', '1'])
+        again = runner.invoke(args=['archive-votes'])
+        
+        assert 'features 1\nvotes 2' in dry_run.output
+        assert result.exit_code == 0
+        assert 'features 1\nvotes 2' in result.output
+        assert 'features 0\nvotes 0' in again.output
+        with app.app_context():
+            assert Vote.query.count() == 0
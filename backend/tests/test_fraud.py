@@ -0,0 +1,154 @@
+import pytest
+from datetime import datetime, timedelta
+from app import create_app
+from database import db
+from fraud.detector import FEATURE_BURST, IP_BURST, USER_PREFIX_BURST, VoteAnomalyDetector, VoteEvent, user_prefix
+from fraud.sketches import CountMinSketch, HyperLogLog, WindowedCountMinSketch
+from models.feature import Feature
+from models.vote import Vote
+from services.feature_service import FeatureService
+from services.fraud_service import FraudWorker
+from services.vote_service import VoteService
+
+def event(vote_id, feature_id=1, user_id='user', client_ip='10.0.0.1', at=0.0):
+    return VoteEvent(vote_id, feature_id, user_id, client_ip, at, 'default')
+
+class TestSketches:
+    """Test the compact counting structures"""
+    
+    def test_count_min_never_undercounts(self):
+        """Test count-min estimates are upper bounds close to the true counts"""
+        sketch = CountMinSketch(width=256, depth=4)
+        for i in range(2000):
+            sketch.add(f'key{i % 200}')
+        
+        estimates = [sketch.estimate(f'key{i}') for i in range(200)]
+        assert all(estimate >= 10 for estimate in estimates)
+        assert sum(estimates) / len(estimates) < 15
+    
+    def test_hyperloglog_distinct_count(self):
+        """Test HyperLogLog estimates distinct values within a few percent and ignores repeats"""
+        hll = HyperLogLog(precision=12)
+        for i in range(20000):
+            hll.add(f'10.0.{i % 10000 // 256}.{i % 256}')
+        
+        assert hll.count() == pytest.approx(10000, rel=0.05)
+    
+    def test_window_forgets_old_counts(self):
+        """Test windowed counts drop votes older than the window"""
+        window = WindowedCountMinSketch(window_seconds=60, buckets=6)
+        for second in range(0, 60, 2):
+            window.add('ip', at=second)
+        
+        # At t=60 the first 10s bucket (5 votes) has left the window
+        assert window.add('ip', at=60) == 30 - 5 + 1
+        assert window.add('ip', at=200) == 1
+
+class TestVoteAnomalyDetector:
+    """Test burst detection rules"""
+    
+    def test_ip_burst(self):
+        """Test votes from one IP beyond the threshold are flagged"""
+        detector = VoteAnomalyDetector(ip_threshold=5, prefix_threshold=1000, feature_threshold=1000)
+        reasons = [detector.observe(event(i, feature_id=i, user_id=f'u{i}x', at=i)) for i in range(8)]
+        
+        assert reasons == [None] * 5 + [IP_BURST] * 3
+    
+    def test_minted_user_ids(self):
+        """Test IDs sharing a prefix are flagged across many IPs"""
+        detector = VoteAnomalyDetector(ip_threshold=1000, prefix_threshold=3, feature_threshold=1000)
+        reasons = [detector.observe(event(i, feature_id=i, user_id=f'bot-{i:04d}', client_ip=f'10.0.0.{i}', at=i))
+                   for i in range(5)]
+        
+        assert user_prefix('bot-0042') == 'bot'
+        assert reasons == [None, None, None, USER_PREFIX_BURST, USER_PREFIX_BURST]
+    
+    def test_feature_burst_needs_low_ip_diversity(self):
+        """Test a feature's burst is flagged from a few IPs but not from many"""
+        detector = VoteAnomalyDetector(ip_threshold=1000, prefix_threshold=1000, feature_threshold=10)
+        few = [detector.observe(event(i, feature_id=1, user_id=f'{i}a', client_ip=f'10.0.0.{i % 2}', at=i))
+               for i in range(12)]
+        many = [detector.observe(event(i, feature_id=2, user_id=f'{i}b', client_ip=f'10.1.0.{i}', at=i))
+                for i in range(12)]
+        
+        assert few[-1] == FEATURE_BURST
+        assert many == [None] * 12
+
+class TestFraudPipeline:
+    """Test quarantining votes flagged by the detector"""
+    
+    @pytest.fixture
+    def features(self, app):
+        app.config.update({'FRAUD_DETECTION_ENABLED': True, 'FRAUD_IP_THRESHOLD': 3})
+        with app.app_context():
+            return [FeatureService().create_feature(title=f'Idea number {i}', author='Author')['id']
+                    for i in range(5)]
+    
+    def test_burst_is_quarantined_out_of_upvotes(self, app, features):
+        """Test votes past the IP threshold are kept but no longer counted"""
+        with app.app_context():
+            service = VoteService()
+            for i, feature_id in enumerate(features):
+                service.upvote_feature(feature_id, f'voter{i}x', client_ip='10.9.9.9')
+            
+            quarantined = Vote.query.filter(Vote.quarantined_at.isnot(None)).all()
+            assert [(vote.feature_id, vote.quarantine_reason) for vote in quarantined] == [
+                (features[3], IP_BURST), (features[4], IP_BURST)
+            ]
+            counted = {f['id']: (f['upvotes'], f['votes_count']) for f in FeatureService().get_all_features()}
+            assert counted == {feature_id: (1 if i < 3 else 0, 1 if i < 3 else 0)
+                               for i, feature_id in enumerate(features)}
+            
+            # Removing a quarantined vote does not take it out of the counts a second time
+            service.remove_vote(features[4], 'voter4x')
+            assert db.session.get(Feature, features[4]).upvotes == 0
+    
+    def test_client_address_from_trusted_proxy(self, app_config, features):
+        """Test votes behind a trusted proxy are attributed to the forwarded client address"""
+        proxied = create_app(dict(app_config, PROXY_FIX_X_FOR=1, FRAUD_DETECTION_ENABLED=True,
+                                  FRAUD_IN_BACKGROUND=False, FRAUD_IP_THRESHOLD=3))
+        client = proxied.test_client()
+        
+        for i, feature_id in enumerate(features):
+            client.post(f'/api/features/{feature_id}/upvote', json={'user_id': f'voter{i}x'},
+                        headers={'X-Forwarded-For': f'203.0.113.{i}'}, environ_base={'REMOTE_ADDR': '10.0.0.1'})
+        
+        with proxied.app_context():
+            assert [vote.client_ip for vote in Vote.query.order_by(Vote.id)] == [f'203.0.113.{i}' for i in range(5)]
+            assert Vote.query.filter(Vote.quarantined_at.isnot(None)).count() == 0
+    
+    def test_detection_runs_in_the_background(self, app, features):
+        """Test votes are inspected on the worker thread when FRAUD_IN_BACKGROUND is on"""
+        app.config['FRAUD_IN_BACKGROUND'] = True
+        with app.app_context():
+            service = VoteService()
+            for i, feature_id in enumerate(features):
+                service.upvote_feature(feature_id, f'voter{i}x', client_ip='10.9.9.9')
+            FraudWorker.for_app(app).join()
+            
+            assert Vote.query.filter(Vote.quarantined_at.isnot(None)).count() == 2
+    
+    def test_replay_command(self, app, runner):
+        """Test replaying historical votes reports, then quarantines, a burst"""
+        app.config.update({'FRAUD_IP_THRESHOLD': 3, 'FRAUD_DETECTION_ENABLED': False})
+        with app.app_context():
+            feature = Feature(title='Old feature', author='Author', upvotes=6)
+            db.session.add(feature)
+            db.session.flush()
+            start = datetime.utcnow() - timedelta(days=30)
+            db.session.add_all([Vote(feature_id=feature.id, user_id=f'old{i}x', client_ip='10.1.1.1',
+                                     created_at=start + timedelta(seconds=i)) for i in range(6)])
+            db.session.commit()
+            feature_id = feature.id
+        
+        result = runner.invoke(args=['fraud', 'replay'])
+        assert result.exit_code == 0
+        assert 'ip_burst 3' in result.output
+        with app.app_context():
+            assert Vote.query.filter(Vote.quarantined_at.isnot(None)).count() == 0
+        
+        result = runner.invoke(args=['fraud', 'replay', '--apply'])
+        assert result.exit_code == 0
+        with app.app_context():
+            assert Vote.query.filter(Vote.quarantined_at.isnot(None)).count() == 3
+            assert db.session.get(Feature, feature_id).upvotes == 3
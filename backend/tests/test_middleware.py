@@ -0,0 +1,414 @@
+import pytest
+import json
+from datetime import datetime, timedelta
+from app import create_app
+from middleware.admission import AdmissionState
+from middleware.idempotency import DatabaseIdempotencyStore, IdempotencyStore, StoredResponse
+from middleware.profiling import profiler
+from middleware.rate_limit import MemoryRateLimitStore, create_store
+from models.feature import Feature
+from database import db
+
+class FakeClock:
+    """Manually advanced clock for deterministic bucket refills"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+class TestMemoryRateLimitStore:
+    """Test the in-process token bucket store"""
+    
+    def test_burst_then_refill(self):
+        """Test a bucket allows its burst, then refills at the configured rate"""
+        clock = FakeClock()
+        store = MemoryRateLimitStore(clock=clock)
+        
+        assert [store.consume('k', rate=1, capacity=3)[0] for _ in range(3)] == [True, True, True]
+        allowed, retry_after = store.consume('k', rate=1, capacity=3)
+        assert allowed is False
+        assert retry_after == pytest.approx(1.0)
+        
+        clock.now += 1
+        assert store.consume('k', rate=1, capacity=3)[0] is True
+    
+    def test_refund_is_capped(self):
+        """Test refunded tokens return to the bucket without exceeding its capacity"""
+        store = MemoryRateLimitStore(clock=FakeClock())
+        
+        store.consume('k', rate=1, capacity=2)
+        store.consume('k', rate=1, capacity=2)
+        store.refund('k', rate=1, capacity=2)
+        store.refund('k', rate=1, capacity=2)
+        store.refund('k', rate=1, capacity=2)
+        
+        assert [store.consume('k', rate=1, capacity=2)[0] for _ in range(3)] == [True, True, False]
+    
+    def test_idle_keys_are_evicted(self):
+        """Test idle buckets are dropped once their timeout passes"""
+        clock = FakeClock()
+        store = MemoryRateLimitStore(idle_timeout=10, clock=clock)
+        store.consume('idle', rate=1, capacity=1)
+        
+        clock.now += 11
+        store.consume('active', rate=1, capacity=1)
+        
+        assert list(store.buckets) == ['active']
+    
+    def test_max_keys_bounds_memory(self):
+        """Test the least recently used key is evicted beyond max_keys"""
+        store = MemoryRateLimitStore(max_keys=2, clock=FakeClock())
+        for key in ('a', 'b', 'c'):
+            store.consume(key, rate=1, capacity=1)
+        
+        assert list(store.buckets) == ['b', 'c']
+    
+    def test_create_store_rejects_unknown_url(self):
+        """Test unsupported storage URLs are rejected"""
+        assert isinstance(create_store('memory://'), MemoryRateLimitStore)
+        with pytest.raises(ValueError, match="Unsupported rate limit storage"):
+            create_store('ftp://nowhere')
+
+class TestRateLimitMiddleware:
+    """Test throttling of write endpoints"""
+    
+    def test_vote_toggling_is_throttled_per_user(self, client, app):
+        """Test a user exceeding their burst gets 429 with Retry-After"""
+        app.config.update({'RATELIMIT_USER_BURST': 2, 'RATELIMIT_USER_RATE': 0.1})
+        with app.app_context():
+            feature = Feature(title='Feature', author='Author')
+            db.session.add(feature)
+            db.session.commit()
+            feature_id = feature.id
+        
+        vote_data = json.dumps({'user_id': 'script'})
+        client.post(f'/api/features/{feature_id}/upvote', data=vote_data, content_type='application/json')
+        client.delete(f'/api/features/{feature_id}/remove-vote', data=vote_data, content_type='application/json')
+        response = client.post(f'/api/features/{feature_id}/upvote', data=vote_data, content_type='application/json')
+        
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '10'
+        
+        other = client.post(f'/api/features/{feature_id}/upvote',
+                            data=json.dumps({'user_id': 'someone_else'}),
+                            content_type='application/json')
+        assert other.status_code == 200
+    
+    def test_user_rejection_spends_no_ip_tokens(self, client, app):
+        """Test a request rejected by the user bucket leaves the IP bucket untouched"""
+        app.config.update({'RATELIMIT_IP_BURST': 3, 'RATELIMIT_IP_RATE': 0.001,
+                           'RATELIMIT_USER_BURST': 1, 'RATELIMIT_USER_RATE': 0.001})
+        with app.app_context():
+            feature = Feature(title='Feature', author='Author')
+            db.session.add(feature)
+            db.session.commit()
+            feature_id = feature.id
+        
+        def upvote(user_id):
+            return client.post(f'/api/features/{feature_id}/upvote', data=json.dumps({'user_id': user_id}),
+                               content_type='application/json').status_code
+        
+        assert [upvote('script') for _ in range(4)] == [200, 429, 429, 429]
+        assert [upvote('someone_else'), upvote('third')] == [200, 200]
+    
+    @pytest.mark.parametrize('body', [[1, 2], {'user_id': 123}])
+    def test_malformed_vote_bodies_are_keyed_by_ip(self, client, app, body):
+        """Test a vote body without a string user_id reaches the view's 400 and is throttled per IP"""
+        app.config.update({'RATELIMIT_IP_BURST': 2, 'RATELIMIT_IP_RATE': 0.001})
+        
+        statuses = [client.post('/api/features/1/upvote', json=body).status_code for _ in range(3)]
+        
+        assert statuses == [400, 400, 429]
+    
+    def test_create_is_throttled_per_ip(self, client, app):
+        """Test feature creation is limited by client IP"""
+        app.config.update({'RATELIMIT_IP_BURST': 1})
+        
+        first = client.post('/api/features', data=json.dumps({'title': 'One', 'author': 'A'}),
+                            content_type='application/json')
+        second = client.post('/api/features', data=json.dumps({'title': 'Two', 'author': 'A'}),
+                             content_type='application/json')
+        
+        assert first.status_code == 201
+        assert second.status_code == 429
+        assert 'Retry-After' in second.headers
+    
+    def test_reads_are_not_throttled(self, client, app):
+        """Test read endpoints bypass the limiter"""
+        app.config.update({'RATELIMIT_IP_BURST': 1})
+        
+        statuses = [client.get('/api/features').status_code for _ in range(3)]
+        
+        assert statuses == [200, 200, 200]
+    
+    def test_disabled_limiter(self, client, app):
+        """Test RATELIMIT_ENABLED switches throttling off"""
+        app.config.update({'RATELIMIT_ENABLED': False, 'RATELIMIT_IP_BURST': 1})
+        
+        statuses = [client.post('/api/features', data=json.dumps({'title': f'Feature {i}', 'author': 'A'}),
+                                content_type='application/json').status_code for i in range(3)]
+        
+        assert statuses == [201, 201, 201]
+
+class TestIdempotencyStore:
+    """Test the bounded TTL response store"""
+    
+    def test_reserve_complete_and_expire(self):
+        """Test a key is reserved once, replayed while fresh and forgotten after its TTL"""
+        clock = FakeClock()
+        store = IdempotencyStore(ttl=60, clock=clock)
+        
+        assert store.reserve('k', 'fp') is None
+        assert store.reserve('k', 'fp').in_flight
+        
+        store.complete('k', StoredResponse('fp', 201, b'{}', 'application/json'))
+        assert store.reserve('k', 'fp').status == 201
+        
+        clock.now += 61
+        assert store.reserve('k', 'fp') is None
+    
+    def test_max_keys_bounds_memory(self):
+        """Test the oldest key is dropped beyond max_keys"""
+        store = IdempotencyStore(max_keys=2, clock=FakeClock())
+        for key in ('a', 'b', 'c'):
+            store.reserve(key, 'fp')
+        
+        assert list(store.entries) == ['b', 'c']
+
+    def test_database_store(self, app):
+        """Test the shared store reserves a key once, replays it while fresh and forgets it after its TTL"""
+        now = [datetime(2026, 1, 1)]
+        with app.app_context():
+            store = DatabaseIdempotencyStore(db.engine, ttl=60, clock=lambda: now[0])
+            
+            assert store.reserve('k', 'fp') is None
+            assert store.reserve('k', 'fp').in_flight
+            
+            store.complete('k', StoredResponse('fp', 201, b'{}', 'application/json'))
+            assert store.reserve('k', 'fp') == StoredResponse('fp', 201, b'{}', 'application/json')
+            
+            store.release('k')
+            assert store.reserve('k', 'fp') is None
+            now[0] += timedelta(seconds=61)
+            assert store.reserve('k', 'other') is None
+
+class TestIdempotencyMiddleware:
+    """Test replay of retried mutating requests"""
+    
+    def test_retried_create_is_replayed(self, client, app):
+        """Test a retried POST with the same key returns the first response without a duplicate"""
+        body = json.dumps({'title': 'Retry me', 'author': 'Mobile'})
+        headers = {'Idempotency-Key': 'abc-123'}
+        
+        first = client.post('/api/features', data=body, content_type='application/json', headers=headers)
+        second = client.post('/api/features', data=body, content_type='application/json', headers=headers)
+        
+        assert first.status_code == second.status_code == 201
+        assert second.data == first.data
+        assert second.headers['Idempotent-Replayed'] == 'true'
+        with app.app_context():
+            assert Feature.query.count() == 1
+    
+    def test_retry_on_another_worker_is_replayed(self, client, app, app_config):
+        """Test a retry reaching another worker replays the first response instead of creating a duplicate"""
+        other = create_app(app_config).test_client()
+        body = json.dumps({'title': 'Retry me', 'author': 'Mobile'})
+        headers = {'Idempotency-Key': 'abc-123'}
+        
+        first = client.post('/api/features', data=body, content_type='application/json', headers=headers)
+        second = other.post('/api/features', data=body, content_type='application/json', headers=headers)
+        
+        assert second.status_code == 201
+        assert second.data == first.data
+        assert second.headers['Idempotent-Replayed'] == 'true'
+        with app.app_context():
+            assert Feature.query.count() == 1
+    
+    def test_retried_upvote_is_replayed(self, client, app):
+        """Test a retried upvote returns the original success instead of 'already voted'"""
+        with app.app_context():
+            feature = Feature(title='Feature', author='Author')
+            db.session.add(feature)
+            db.session.commit()
+            feature_id = feature.id
+        
+        body = json.dumps({'user_id': 'mobile_user'})
+        headers = {'Idempotency-Key': 'vote-1'}
+        first = client.post(f'/api/features/{feature_id}/upvote', data=body,
+                            content_type='application/json', headers=headers)
+        retry = client.post(f'/api/features/{feature_id}/upvote', data=body,
+                            content_type='application/json', headers=headers)
+        
+        assert first.status_code == retry.status_code == 200
+        assert json.loads(retry.data)['upvotes'] == 1
+    
+    def test_key_reused_with_different_body(self, client):
+        """Test reusing a key for a different payload is rejected"""
+        headers = {'Idempotency-Key': 'reused'}
+        client.post('/api/features', data=json.dumps({'title': 'One', 'author': 'A'}),
+                    content_type='application/json', headers=headers)
+        
+        response = client.post('/api/features', data=json.dumps({'title': 'Two', 'author': 'A'}),
+                               content_type='application/json', headers=headers)
+        
+        assert response.status_code == 422
+    
+    def test_throttled_request_is_not_stored(self, client, app):
+        """Test a 429 is not replayed, so the retry runs once tokens are available"""
+        app.config.update({'RATELIMIT_IP_BURST': 1})
+        client.post('/api/features', data=json.dumps({'title': 'First', 'author': 'A'}),
+                    content_type='application/json')
+        body = json.dumps({'title': 'Second', 'author': 'A'})
+        headers = {'Idempotency-Key': 'throttled'}
+        
+        throttled = client.post('/api/features', data=body, content_type='application/json', headers=headers)
+        app.config.update({'RATELIMIT_ENABLED': False})
+        retry = client.post('/api/features', data=body, content_type='application/json', headers=headers)
+        
+        assert throttled.status_code == 429
+        assert retry.status_code == 201
+
+class TestProfilingMiddleware:
+    """Test on-demand profiling of allowlisted requests"""
+    
+    @pytest.fixture
+    def profiled_app(self, app, tmp_path):
+        app.config.update({'PROFILE_ENDPOINTS': ['get_features'], 'PROFILE_DIR': str(tmp_path),
+                           'ADMIN_TOKEN': 'secret', 'RATELIMIT_ENABLED': False})
+        profiler.init_app(app)
+        return app
+    
+    def test_disabled_installs_no_hooks(self, app):
+        """Test an app without PROFILE_ENDPOINTS runs no profiling code on any request"""
+        hooks = [hook for hooks in app.before_request_funcs.values() for hook in hooks]
+        
+        assert profiler.start not in hooks
+        assert app.test_client().get('/api/features', headers={'X-Profile': ''}).headers.get('X-Profile-Id') is None
+    
+    def test_profile_separates_sql_time(self, profiled_app, tmp_path):
+        """Test a profiled request reports its SQL time and application functions and can be downloaded"""
+        client = profiled_app.test_client()
+        client.post('/api/features', json={'title': 'Profiled', 'author': 'Author'})
+        
+        response = client.get('/api/features', headers={'X-Profile': 'secret'})
+        profile_id = response.headers['X-Profile-Id']
+        admin = {'Authorization': 'Bearer secret'}
+        summary = client.get(f'/api/admin/profiles/{profile_id}', headers=admin).get_json()
+        download = client.get(f'/api/admin/profiles/{profile_id}/download', headers=admin)
+        
+        assert response.status_code == 200
+        assert response.headers['Server-Timing'].startswith('total;dur=')
+        assert 'sql;dur=' in response.headers['Server-Timing']
+        assert summary['sql_queries'] == 1
+        assert 0 < summary['sql_ms'] < summary['wall_ms']
+        assert 'SELECT' in summary['statements'][0]['statement']
+        assert any(row['function'].startswith('services/feature_service.py') for row in summary['app_functions'])
+        assert download.status_code == 200
+        assert download.data == (tmp_path / f'{profile_id}.prof').read_bytes()
+    
+    def test_only_allowlisted_requests_with_the_token(self, profiled_app):
+        """Test other endpoints, a wrong token or no header leave requests unprofiled"""
+        client = profiled_app.test_client()
+        
+        responses = [
+            client.get('/api/features'),
+            client.get('/api/features', headers={'X-Profile': 'wrong'}),
+            client.get('/api/health', headers={'X-Profile': 'secret'}),
+        ]
+        
+        assert all('X-Profile-Id' not in response.headers for response in responses)
+        assert client.get('/api/admin/profiles', headers={'Authorization': 'Bearer secret'}).get_json() == []
+
+class TestAdmissionState:
+    """Test slot accounting and the latency-scaled writer limit"""
+    
+    def make_state(self, clock=None):
+        return AdmissionState(max_in_flight=4, max_writers=2, min_writers=1, reserved_reads=1,
+                              latency_target=0.1, clock=clock or FakeClock())
+    
+    def test_writers_capped_and_reads_reserved(self):
+        """Test writers stop at their cap while reads still get the remaining slots"""
+        state = self.make_state()
+        
+        writers = [state.admit(True), state.admit(True), state.admit(True)]
+        reads = [state.admit(False), state.admit(False), state.admit(False)]
+        
+        assert writers[2] is None
+        assert reads[2] is None
+        assert state.snapshot()['in_flight'] == 4
+        assert state.shed == 2
+    
+    def test_writers_never_take_reserved_slots(self):
+        """Test a write is shed when only the reserved read slot is left"""
+        state = self.make_state()
+        state.admit(False)
+        state.admit(False)
+        state.admit(True)
+        
+        assert state.admit(True) is None
+        assert state.admit(False) is not None
+    
+    def test_slow_writes_lower_the_writer_limit(self):
+        """Test write latency above the target scales the writer limit down and lengthens Retry-After"""
+        clock = FakeClock()
+        state = self.make_state(clock)
+        
+        for _ in range(20):
+            started = state.admit(True)
+            clock.now += 2.0
+            state.release(True, started)
+        
+        assert state.writer_limit == 1
+        assert state.retry_after() == 2
+        assert state.admit(True) is not None
+        assert state.admit(True) is None
+
+class TestAdmissionMiddleware:
+    """Test requests are admitted or shed before any work is done"""
+    
+    def test_write_shed_with_retry_after(self, app, client):
+        """Test a vote beyond the writer cap gets a fast 503 with Retry-After while reads are served"""
+        app.config.update({'ADMISSION_MAX_WRITERS': 0, 'ADMISSION_MIN_WRITERS': 0, 'RATELIMIT_ENABLED': False})
+        
+        vote = client.post('/api/features/1/upvote', json={'user_id': 'user1'})
+        read = client.get('/api/features')
+        
+        assert vote.status_code == 503
+        assert vote.headers['Retry-After'] == '1'
+        assert vote.get_json() == {'error': 'Service overloaded, retry later'}
+        assert read.status_code == 200
+    
+    def test_probes_and_admin_never_shed(self, app, client):
+        """Test health checks and admin endpoints are answered even with every slot taken"""
+        app.config.update({'ADMISSION_MAX_IN_FLIGHT': 0, 'ADMIN_TOKEN': 'secret', 'RATELIMIT_ENABLED': False})
+        
+        assert client.get('/api/features').status_code == 503
+        assert client.get('/api/health').status_code == 200
+        assert client.get('/api/admin/profiles', headers={'Authorization': 'Bearer secret'}).status_code == 200
+    
+    def test_delete_is_a_write(self, app, client, sample_feature):
+        """Test deleting a feature takes a writer slot, not a slot kept for reads"""
+        app.config.update({'ADMISSION_MAX_WRITERS': 0, 'ADMISSION_MIN_WRITERS': 0, 'RATELIMIT_ENABLED': False})
+        
+        assert client.delete(f'/api/features/{sample_feature.id}').status_code == 503
+    
+    def test_slots_released_after_errors(self, app, client):
+        """Test every request gives its slot back, including failed writes"""
+        client.post('/api/features/999/upvote', json={'user_id': 'user1'})
+        client.post('/api/features', json={})
+        client.get('/api/features')
+        
+        snapshot = app.extensions['admission_state'].snapshot()
+        
+        assert snapshot['in_flight'] == 0
+        assert snapshot['writers'] == 0
+    
+    def test_disabled(self, app, client):
+        """Test nothing is shed when admission control is off"""
+        app.config.update({'ADMISSION_ENABLED': False, 'ADMISSION_MAX_WRITERS': 0, 'RATELIMIT_ENABLED': False})
+        
+        response = client.post('/api/features', json={'title': 'Admitted', 'author': 'Author'})
+        
+        assert response.status_code == 201
@@ -0,0 +1,128 @@
+import pytest
+import threading
+from database import db
+from recommendations.covote import CoVoteMatrix
+from repositories.recommendation_repository import RecommendationRepository
+from services.feature_service import FeatureService
+from services.vote_service import VoteService
+
+# (user, feature) votes: features 1 and 2 share three voters, 1 and 3 share two
+VOTES = [('a', 1), ('a', 2), ('a', 3), ('b', 1), ('b', 2), ('c', 1), ('c', 2), ('c', 3), ('d', 4)]
+
+def build(votes, **kwargs):
+    users = {}
+    matrix = CoVoteMatrix(**kwargs)
+    matrix.build([feature for _, feature in votes], [users.setdefault(user, len(users)) for user, _ in votes])
+    return matrix
+
+class TestCoVoteMatrix:
+    """Test the co-vote matrix and its neighbor lists"""
+    
+    def test_build_ranks_neighbors(self):
+        """Test neighbors are ranked by co-votes normalised by popularity"""
+        matrix = build(VOTES, min_co_votes=1)
+        
+        assert matrix.related(1, 10) == [(2, 3, 1.0), (3, 2, 0.8165)]
+        assert matrix.related(4, 10) == []
+        assert matrix.related(99, 10) == []
+    
+    def test_min_co_votes(self):
+        """Test pairs with too few co-votes are not related"""
+        matrix = build(VOTES, min_co_votes=3)
+        
+        assert matrix.related(1, 10) == [(2, 3, 1.0)]
+    
+    @pytest.mark.parametrize('compact_threshold', [1, 1000])
+    def test_incremental_updates_match_rebuild(self, compact_threshold):
+        """Test adding and removing votes gives the same lists as building from scratch"""
+        matrix = build(VOTES, min_co_votes=1, compact_threshold=compact_threshold)
+        # User d votes for 1 and 5 (a new feature), then takes back their vote on 4
+        matrix.add_vote(1, [4])
+        matrix.add_vote(5, [1, 4])
+        matrix.remove_vote(4, [1, 5])
+        
+        expected = build(VOTES[:-1] + [('d', 1), ('d', 5)], min_co_votes=1)
+        for feature_id in (1, 2, 3, 4, 5):
+            assert matrix.related(feature_id, 10) == expected.related(feature_id, 10)
+    
+    def test_neighbor_limit(self):
+        """Test only the top neighbors are kept"""
+        votes = [(f'u{user}', feature) for user in range(10) for feature in range(1, 11) if feature <= user + 1]
+        matrix = build(votes, neighbors=3, min_co_votes=1)
+        
+        assert [neighbor[0] for neighbor in matrix.related(1, 10)] == [2, 3, 4]
+
+class TestRelatedFeatures:
+    """Test related features served through the services"""
+    
+    @pytest.fixture
+    def features(self, app):
+        app.config.update({'DUPLICATE_REJECT_THRESHOLD': 0, 'FRAUD_DETECTION_ENABLED': False})
+        with app.app_context():
+            return [FeatureService().create_feature(title=f'Idea number {i}', author='Author')['id']
+                    for i in range(4)]
+    
+    def test_related_follows_votes(self, app, features):
+        """Test votes cast after the index is built show up in the related lists"""
+        with app.app_context():
+            votes, service = VoteService(), FeatureService()
+            for user in ('a', 'b'):
+                votes.upvote_feature(features[0], user)
+                votes.upvote_feature(features[1], user)
+            
+            related = service.get_related_features(features[0])
+            assert [(f['id'], f['co_votes']) for f in related] == [(features[1], 2)]
+            
+            for user in ('a', 'b', 'c'):
+                votes.upvote_feature(features[2], user)
+            votes.upvote_feature(features[0], 'c')
+            votes.remove_vote(features[1], 'a')
+            related = service.get_related_features(features[0])
+            assert [(f['id'], f['co_votes']) for f in related] == [(features[2], 3)]
+            
+            service.delete_feature(features[2])
+            assert service.get_related_features(features[0]) == []
+            assert service.get_related_features(999) is None
+    
+    def test_votes_during_the_build_are_counted(self, app, features):
+        """Test a vote committed while the matrix is read is queued without waiting, then counted"""
+        with app.app_context():
+            votes = VoteService()
+            votes.upvote_feature(features[0], 'a')
+            votes.upvote_feature(features[1], 'a')
+            index = RecommendationRepository().index
+            build = index._build
+            
+            def vote_while_building(matrix_class):
+                result = build(matrix_class)
+                # Ends the read, so the other thread's vote can commit
+                db.session.rollback()
+                
+                def vote():
+                    with app.app_context():
+                        VoteService().upvote_feature(features[1], 'b')
+                        VoteService().upvote_feature(features[0], 'b')
+                
+                thread = threading.Thread(target=vote)
+                thread.start()
+                thread.join(timeout=10)
+                assert not thread.is_alive()
+                return result
+            
+            index._build = vote_while_building
+            related = FeatureService().get_related_features(features[0])
+            
+            assert [(f['id'], f['co_votes']) for f in related] == [(features[1], 2)]
+    
+    def test_related_route(self, app, client, features):
+        """Test GET /api/features/<id>/related"""
+        with app.app_context():
+            for user in ('a', 'b'):
+                VoteService().upvote_feature(features[0], user)
+                VoteService().upvote_feature(features[3], user)
+        
+        response = client.get(f'/api/features/{features[3]}/related?limit=5')
+        assert response.status_code == 200
+        assert [(f['id'], f['co_votes'], f['score']) for f in response.get_json()] == [(features[0], 2, 1.0)]
+        assert client.get('/api/features/999/related').status_code == 404
+        assert client.get(f'/api/features/{features[3]}/related?limit=500').status_code == 400
@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime
 from repositories.feature_repository import FeatureRepository
 from repositories.vote_repository import VoteRepository
 from models.feature import Feature
@@ -80,6 +81,69 @@ class TestFeatureRepository:
             updated_feature = repo.decrement_upvotes(feature)
             
             assert updated_feature.upvotes == 0  # Should stay at 0
+    
+    def test_compare_and_set_upvotes(self, app):
+        """Test a counter repair is skipped once a concurrent vote has changed the counter"""
+        with app.app_context():
+            repo = FeatureRepository()
+            feature = repo.create(title='Test Feature', author='Test Author')
+            feature_id = feature.id
+            repo.increment_upvotes(feature)
+            
+            stale = repo.compare_and_set_upvotes([(feature_id, 0, 5)])
+            current = repo.compare_and_set_upvotes([(feature_id, 1, 5)])
+            db.session.commit()
+            
+            assert stale == 0
+            assert current == 1
+            assert db.session.get(Feature, feature_id).upvotes == 5
+    
+    def test_filtered_list(self, app):
+        """Test list filters combine and a date range includes its start but not its end"""
+        with app.app_context():
+            db.session.add_all([
+                Feature(title='Old', author='Ada', upvotes=9, created_at=datetime(2026, 1, 1)),
+                Feature(title='Start', author='Ada', upvotes=1, created_at=datetime(2026, 2, 1)),
+                Feature(title='Popular', author='Ada', upvotes=7, created_at=datetime(2026, 2, 2)),
+                Feature(title='Other author', author='Bob', upvotes=8, created_at=datetime(2026, 2, 2)),
+                Feature(title='End', author='Ada', upvotes=5, created_at=datetime(2026, 3, 1)),
+            ])
+            db.session.commit()
+            repo = FeatureRepository()
+            
+            february = {'author': 'Ada', 'created_after': datetime(2026, 2, 1), 'created_before': datetime(2026, 3, 1)}
+            by_votes = repo.iter_ordered_with_vote_counts('votes', filters=february)
+            oldest = repo.iter_ordered_with_vote_counts('oldest', filters=dict(february, min_upvotes=0))
+            popular = repo.iter_ordered_with_vote_counts('newest', filters={'min_upvotes': 7})
+            
+            assert [row['title'] for row in by_votes] == ['Popular', 'Start']
+            assert [row['title'] for row in oldest] == ['Start', 'Popular']
+            # Ties are broken by id, in the direction of the sort
+            assert [row['title'] for row in popular] == ['Other author', 'Popular', 'Old']
+    
+    def test_chunked_list_matches_one_read(self, app):
+        """Test reading the list chunk by chunk, resuming after each chunk's last row, skips or repeats nothing"""
+        with app.app_context():
+            db.session.add_all([Feature(title=f'Feature {i}', author='Author', upvotes=i % 3, trending_score=i % 2,
+                                        created_at=datetime(2026, 1, 1 + i % 4)) for i in range(11)])
+            db.session.commit()
+            repo = FeatureRepository()
+            
+            for sort in ('votes', 'trending', 'newest', 'oldest'):
+                whole = list(repo.iter_ordered_with_vote_counts(sort))
+                assert list(repo.iter_ordered_with_vote_counts(sort, chunk_size=2)) == whole
+                assert list(repo.iter_ordered_with_vote_counts(sort, limit=5, chunk_size=2)) == whole[:5]
+                assert len({row['id'] for row in whole}) == 11
+    
+    def test_list_rejects_unknown_sort_and_filters(self, app):
+        """Test only named orders and filters reach the query"""
+        with app.app_context():
+            repo = FeatureRepository()
+            
+            with pytest.raises(ValueError, match="Unknown sort"):
+                repo.list_statement(Feature.id, sort='title; DROP TABLE features')
+            with pytest.raises(ValueError, match="Unknown filters: title"):
+                repo.list_statement(Feature.id, filters={'title': 'x'})
 
 class TestVoteRepository:
     """Test Vote repository"""
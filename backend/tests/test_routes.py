@@ -1,5 +1,7 @@
 import pytest
 import json
+import threading
+from datetime import datetime
 from models.feature import Feature
 from models.vote import Vote
 from database import db
@@ -33,6 +35,100 @@ class TestFeatureRoutes:
         assert data[0]['upvotes'] == 10
         assert data[1]['upvotes'] == 5
     
+    def test_get_features_invalid_sort(self, client):
+        """Test listing features with an unknown sort order"""
+        response = client.get('/api/features?sort=random')
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert 'Sort must be one of' in data['error']
+    
+    def test_get_features_trending_with_limit(self, client, app):
+        """Test listing the top trending features"""
+        with app.app_context():
+            db.session.add_all([Feature(title=f'Feature {i}', author='Author', trending_score=i) for i in range(5)])
+            db.session.commit()
+        
+        response = client.get('/api/features?sort=trending&limit=2')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [f['title'] for f in data] == ['Feature 4', 'Feature 3']
+    
+    def test_get_features_with_voted_flags(self, client):
+        """Test listing features flagged with whether a user voted for them"""
+        first = json.loads(client.post('/api/features', json={'title': 'First idea', 'author': 'A'}).data)
+        second = json.loads(client.post('/api/features', json={'title': 'Other plan', 'author': 'A'}).data)
+        
+        response = client.get('/api/features?user_id=user1')
+        assert {f['id']: f['voted'] for f in json.loads(response.data)} == {first['id']: False, second['id']: False}
+        
+        client.post(f"/api/features/{second['id']}/upvote", json={'user_id': 'user1'})
+        
+        response = client.get('/api/features?user_id=user1')
+        assert response.status_code == 200
+        assert {f['id']: f['voted'] for f in json.loads(response.data)} == {first['id']: False, second['id']: True}
+        assert all('voted' not in f for f in json.loads(client.get('/api/features').data))
+    
+    def test_get_features_streamed(self, client, app):
+        """Test the streamed list matches the buffered one"""
+        with app.app_context():
+            db.session.add_all([Feature(title=f'Feature {i}', author='Author', upvotes=i % 7) for i in range(50)])
+            db.session.commit()
+        client.post('/api/features/3/upvote', json={'user_id': 'user1'})
+        
+        for query in ('', '&sort=trending&limit=10', '&user_id=user1'):
+            response = client.get(f'/api/features?stream=true{query}', buffered=False)
+            assert response.status_code == 200
+            assert response.is_streamed
+            assert json.loads(response.get_data()) == json.loads(client.get(f'/api/features?{query}').data)
+    
+    def test_writes_commit_while_a_stream_is_paused(self, client, app):
+        """Test a slow stream reader holds no read lock between chunks, so votes still commit"""
+        app.config['STREAM_CHUNK_SIZE'] = 100
+        with app.app_context():
+            db.session.add_all([Feature(title=f'Feature {i}', author='Author', description='x' * 1000, upvotes=i)
+                                for i in range(300)])
+            db.session.commit()
+        
+        response = client.get('/api/features?stream=true', buffered=False)
+        pieces = iter(response.response)
+        first = next(pieces)
+        
+        statuses = []
+        voter = threading.Thread(target=lambda: statuses.append(
+            client.post('/api/features/1/upvote', json={'user_id': 'user1'}).status_code
+        ))
+        voter.start()
+        voter.join()
+        body = first + b''.join(pieces)
+        response.close()
+        
+        assert statuses == [200]
+        assert [f['upvotes'] for f in json.loads(body)][:3] == [299, 298, 297]
+        assert len(json.loads(body)) == 300
+    
+    def test_get_features_filtered_and_sorted(self, client, app):
+        """Test filtering the list by author, date range and votes, newest first, buffered or streamed"""
+        with app.app_context():
+            db.session.add_all([
+                Feature(title='January', author='Ada', upvotes=4, created_at=datetime(2026, 1, 15)),
+                Feature(title='February', author='Ada', upvotes=2, created_at=datetime(2026, 2, 15)),
+                Feature(title='March', author='Ada', upvotes=0, created_at=datetime(2026, 3, 15)),
+                Feature(title='By Bob', author='Bob', upvotes=9, created_at=datetime(2026, 2, 20)),
+            ])
+            db.session.commit()
+        query = 'author=Ada&created_after=2026-01-01&created_before=2026-03-01&sort=newest'
+        
+        filtered = client.get(f'/api/features?{query}')
+        streamed = client.get(f'/api/features?{query}&stream=true')
+        popular = client.get('/api/features?min_upvotes=3&sort=oldest')
+        
+        assert [f['title'] for f in json.loads(filtered.data)] == ['February', 'January']
+        assert json.loads(streamed.get_data()) == json.loads(filtered.data)
+        assert [f['title'] for f in json.loads(popular.data)] == ['January', 'By Bob']
+        assert client.get('/api/features?min_upvotes=-1').status_code == 400
+    
     def test_create_feature_success(self, client):
         """Test successful feature creation"""
         feature_data = {
@@ -73,6 +169,13 @@ class TestFeatureRoutes:
         data = json.loads(response.data)
         assert data['error'] == 'No data provided'
     
+    def test_create_feature_malformed_json(self, client):
+        """Test feature creation with a body that is not valid JSON"""
+        response = client.post('/api/features', data='{"title": ', content_type='application/json')
+        
+        assert response.status_code == 400
+        assert json.loads(response.data)['error'] == 'No data provided'
+    
     def test_get_feature_success(self, client, app):
         """Test getting specific feature"""
         with app.app_context():
@@ -179,6 +282,8 @@ class TestFeatureRoutes:
             db.session.add_all([feature1, feature2])
             db.session.commit()
             
+            feature_ids = [feature1.id, feature2.id]
+            
             vote1 = Vote(feature_id=feature1.id, user_id='test_user')
             vote2 = Vote(feature_id=feature2.id, user_id='test_user')
             db.session.add_all([vote1, vote2])
@@ -189,8 +294,176 @@ class TestFeatureRoutes:
         assert response.status_code == 200
         data = json.loads(response.data)
         assert len(data) == 2
-        assert feature1.id in data
-        assert feature2.id in data
+        assert feature_ids[0] in data
+        assert feature_ids[1] in data
+    
+    def test_search_features(self, client):
+        """Test searching features by text"""
+        client.post('/api/features',
+                    data=json.dumps({'title': 'Dark mode', 'author': 'Author'}),
+                    content_type='application/json')
+        
+        response = client.get('/api/features/search?q=dark')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data) == 1
+        assert data[0]['title'] == 'Dark mode'
+    
+    def test_search_features_missing_query(self, client):
+        """Test searching without a query"""
+        response = client.get('/api/features/search')
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data['error'] == 'Search query is required'
+    
+    def test_get_features_by_ids(self, client, app):
+        """Test bulk lookup returns requested features with counts and reports missing IDs"""
+        with app.app_context():
+            feature1 = Feature(title='Feature 1', author='Author 1')
+            feature2 = Feature(title='Feature 2', author='Author 2')
+            db.session.add_all([feature1, feature2])
+            db.session.commit()
+            db.session.add(Vote(feature_id=feature2.id, user_id='test_user'))
+            db.session.commit()
+            ids = [feature2.id, 999, feature1.id]
+        
+        response = client.get(f'/api/features?ids={ids[0]},{ids[1]},{ids[2]}')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [f['id'] for f in data['features']] == [ids[0], ids[2]]
+        assert [f['votes_count'] for f in data['features']] == [1, 0]
+        assert data['missing'] == [999]
+    
+    def test_get_features_batch_post(self, client, app):
+        """Test the POST variant chunks large ID lists"""
+        with app.app_context():
+            db.session.add_all([Feature(title=f'Feature {i}', author='Author') for i in range(3)])
+            db.session.commit()
+        
+        response = client.post('/api/features/batch',
+                               data=json.dumps({'ids': list(range(1, 1001))}),
+                               content_type='application/json')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [f['id'] for f in data['features']] == [1, 2, 3]
+        assert len(data['missing']) == 997
+    
+    def test_get_features_batch_post_not_an_object(self, client):
+        """Test the POST variant rejects a body that is not a JSON object"""
+        response = client.post('/api/features/batch', data=json.dumps([1, 2]), content_type='application/json')
+        
+        assert response.status_code == 400
+    
+    def test_get_features_by_ids_over_cap(self, client, app):
+        """Test bulk lookup enforces the hard cap"""
+        app.config['BULK_LOOKUP_MAX_IDS'] = 2
+        
+        response = client.get('/api/features?ids=1,2,3')
+        
+        assert response.status_code == 400
+        data = json.loads(response.data)
+        assert data['error'] == 'At most 2 IDs can be requested at once'
+    
+    def test_get_feature_stats(self, client, app):
+        """Test per-feature vote history"""
+        with app.app_context():
+            feature = Feature(title='Feature', author='Author')
+            db.session.add(feature)
+            db.session.commit()
+            feature_id = feature.id
+        client.post(f'/api/features/{feature_id}/upvote',
+                    data=json.dumps({'user_id': 'test_user'}),
+                    content_type='application/json')
+        
+        response = client.get(f'/api/features/{feature_id}/stats?granularity=day')
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['granularity'] == 'day'
+        assert data['total'] == 1
+    
+    def test_get_feature_stats_errors(self, client):
+        """Test stats for a missing feature or with a bad granularity"""
+        assert client.get('/api/features/999/stats').status_code == 404
+        
+        response = client.get('/api/features/999/stats?granularity=minute')
+        
+        assert response.status_code == 400
+        assert 'Granularity must be one of' in json.loads(response.data)['error']
+    
+    def test_get_top_movers(self, client):
+        """Test the top movers endpoint"""
+        response = client.get('/api/features/top-movers?granularity=hour&window=24')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data) == []
+
+class TestBoardRoutes:
+    """Test board-scoped feature routes"""
+    
+    def _create(self, client, prefix, title):
+        response = client.post(f'{prefix}/features',
+                               data=json.dumps({'title': title, 'author': 'Author'}),
+                               content_type='application/json')
+        assert response.status_code == 201
+        return json.loads(response.data)
+    
+    def test_boards_are_isolated(self, client):
+        """Test each board only sees its own features and votes"""
+        mobile = self._create(client, '/api/boards/mobile', 'Offline mode')
+        self._create(client, '/api', 'Dark mode')
+        
+        mobile_list = json.loads(client.get('/api/boards/mobile/features').data)
+        default_list = json.loads(client.get('/api/features').data)
+        
+        assert mobile['board_id'] == 'mobile'
+        assert [f['title'] for f in mobile_list] == ['Offline mode']
+        assert [f['title'] for f in default_list] == ['Dark mode']
+        assert client.get(f"/api/features/{mobile['id']}").status_code == 404
+        
+        client.post(f"/api/boards/mobile/features/{mobile['id']}/upvote",
+                    data=json.dumps({'user_id': 'test_user'}),
+                    content_type='application/json')
+        assert json.loads(client.get('/api/boards/mobile/user/test_user/votes').data) == [mobile['id']]
+        assert json.loads(client.get('/api/user/test_user/votes').data) == []
+    
+    def test_board_search_is_scoped(self, client):
+        """Test search only returns matches from the requested board"""
+        self._create(client, '/api/boards/web', 'Dark mode for web')
+        self._create(client, '/api/boards/mobile', 'Dark mode for mobile')
+        
+        results = json.loads(client.get('/api/boards/web/features/search?q=dark').data)
+        
+        assert [f['title'] for f in results] == ['Dark mode for web']
+    
+    def test_unserved_and_invalid_boards(self, client, app):
+        """Test boards outside SERVED_BOARDS or with malformed IDs are not found"""
+        app.config['SERVED_BOARDS'] = ['default', 'mobile']
+        
+        assert client.get('/api/boards/mobile/features').status_code == 200
+        assert client.get('/api/boards/web/features').status_code == 404
+        assert client.get('/api/boards/Not%20Valid/features').status_code == 404
+    
+    def test_board_with_its_own_database(self, client, app, tmp_path):
+        """Test a board listed in BOARD_DATABASES is stored in its own database file"""
+        board_db = tmp_path / 'huge.db'
+        app.config['BOARD_DATABASES'] = {'huge': f'sqlite:///{board_db}'}
+        
+        feature = self._create(client, '/api/boards/huge', 'Stored separately')
+        client.post(f"/api/boards/huge/features/{feature['id']}/upvote",
+                    data=json.dumps({'user_id': 'test_user'}),
+                    content_type='application/json')
+        
+        assert board_db.exists()
+        assert json.loads(client.get('/api/features').data) == []
+        with app.app_context():
+            assert Feature.query.count() == 0
+        data = json.loads(client.get('/api/boards/huge/features').data)
+        assert [(f['title'], f['upvotes']) for f in data] == [('Stored separately', 1)]
 
 class TestHealthRoutes:
     """Test Health check routes"""
@@ -203,4 +476,48 @@ class TestHealthRoutes:
         data = json.loads(response.data)
         assert data['status'] == 'healthy'
         assert 'timestamp' in data
-        assert data['service'] == 'feature-voting-api'
\ No newline at end of file
+        assert data['service'] == 'feature-voting-api'
+    
+    def test_ready_without_warmup(self, client):
+        """Test the readiness probe is green at once when warm-up is disabled"""
+        response = client.get('/api/ready')
+        
+        assert response.status_code == 200
+        assert json.loads(response.data)['status'] == 'ready'
+    
+    def test_ready_after_warmup(self, client, app):
+        """Test the readiness probe stays red until the warm-up step has run"""
+        from warmup import WarmupState, warmup
+        
+        app.config['WARMUP_ON_STARTUP'] = True
+        app.extensions['warmup_state'] = WarmupState()
+        with app.app_context():
+            db.session.add(Feature(title='Warm feature', author='Author'))
+            db.session.commit()
+        
+        response = client.get('/api/ready')
+        assert response.status_code == 503
+        assert json.loads(response.data)['status'] == 'warming_up'
+        
+        warmup.run(app)
+        
+        response = client.get('/api/ready')
+        assert response.status_code == 200
+        assert set(json.loads(response.data)['warmup']) == {'imports', 'connections', 'queries'}
+        cache = app.extensions['feature_cache']
+        assert ('features', 'default', 'votes', None) in cache.entries
+    
+    def test_ready_reports_failed_warmup(self, client, app, monkeypatch):
+        """Test a failed warm-up keeps the readiness probe red"""
+        from warmup import Warmup, WarmupState, warmup
+        
+        def fail(app):
+            raise RuntimeError('database unreachable')
+        
+        monkeypatch.setattr(Warmup, '_prime_pool', staticmethod(fail))
+        app.extensions['warmup_state'] = WarmupState()
+        warmup.run(app)
+        
+        response = client.get('/api/ready')
+        assert response.status_code == 503
+        assert json.loads(response.data) == {'status': 'failed', 'error': 'database unreachable'}
@@ -1,5 +1,8 @@
 import pytest
-from schemas.feature_schemas import CreateFeatureRequest, VoteRequest
+from datetime import datetime
+from schemas.feature_schemas import (
+    CreateFeatureRequest, VoteRequest, BulkLookupRequest, SearchRequest, FeatureListRequest, StatsRequest
+)
 
 class TestCreateFeatureRequest:
     """Test CreateFeatureRequest schema"""
@@ -83,4 +86,87 @@ class TestVoteRequest:
         request = VoteRequest.from_dict(data)
         
         with pytest.raises(ValueError, match="User ID is required"):
-            request.validate()
\ No newline at end of file
+            request.validate()
+
+class TestSearchRequest:
+    """Test SearchRequest schema"""
+    
+    def test_valid_request(self):
+        """Test valid search request"""
+        request = SearchRequest.from_dict({'q': ' dark mode ', 'limit': '5'})
+        request.validate()  # Should not raise
+        
+        assert request.query == 'dark mode'
+        assert request.limit == 5
+    
+    def test_missing_query(self):
+        """Test request without a query"""
+        request = SearchRequest.from_dict({})
+        
+        with pytest.raises(ValueError, match="Search query is required"):
+            request.validate()
+    
+    def test_invalid_limit(self):
+        """Test request with an out-of-range or malformed limit"""
+        with pytest.raises(ValueError, match="Limit must be between"):
+            SearchRequest.from_dict({'q': 'x', 'limit': '500'}).validate()
+        
+        with pytest.raises(ValueError, match="Limit must be an integer"):
+            SearchRequest.from_dict({'q': 'x', 'limit': 'abc'})
+
+class TestFeatureListRequest:
+    """Test FeatureListRequest schema"""
+    
+    def test_filters(self):
+        """Test only the given filters are passed on, with dates converted to naive UTC"""
+        request = FeatureListRequest.from_dict({'sort': 'Newest', 'author': ' Ada ', 'min_upvotes': '3',
+                                                'created_after': '2026-01-01T02:00:00+02:00'})
+        request.validate()  # Should not raise
+        
+        assert request.sort == 'newest'
+        assert request.filters == {'author': 'Ada', 'created_after': datetime(2026, 1, 1), 'min_upvotes': 3}
+    
+    def test_invalid_filters(self):
+        """Test malformed or contradictory filters are rejected"""
+        with pytest.raises(ValueError, match="min_upvotes must be an integer"):
+            FeatureListRequest.from_dict({'min_upvotes': 'many'})
+        
+        with pytest.raises(ValueError, match="created_before must be an ISO 8601"):
+            FeatureListRequest.from_dict({'created_before': 'yesterday'})
+        
+        with pytest.raises(ValueError, match="created_after must be before created_before"):
+            FeatureListRequest.from_dict({'created_after': '2026-02-01', 'created_before': '2026-01-01'}).validate()
+
+class TestStatsRequest:
+    """Test StatsRequest schema"""
+    
+    def test_range_converted_to_naive_utc(self):
+        """Test since/until with an offset are compared with the naive UTC buckets, and with each other"""
+        request = StatsRequest.from_dict({'since': '2024-01-01T00:00:00+02:00', 'until': '2024-01-01T12:00:00'})
+        request.validate()  # Should not raise
+        
+        assert request.since == datetime(2023, 12, 31, 22)
+        assert request.until == datetime(2024, 1, 1, 12)
+
+class TestBulkLookupRequest:
+    """Test BulkLookupRequest schema"""
+    
+    def test_comma_separated_ids(self):
+        """Test IDs from a query string"""
+        request = BulkLookupRequest.from_dict({'ids': '1, 2,,3'})
+        request.validate(max_ids=10)  # Should not raise
+        
+        assert request.ids == [1, 2, 3]
+    
+    def test_invalid_ids(self):
+        """Test non-integer IDs are rejected"""
+        with pytest.raises(ValueError, match="IDs must be a list of integers"):
+            BulkLookupRequest.from_dict({'ids': '1,two'})
+        
+        with pytest.raises(ValueError, match="IDs must be a list of integers"):
+            BulkLookupRequest.from_dict({'ids': {'a': 1}})
+    
+    def test_empty_ids(self):
+        """Test at least one ID is required"""
+        with pytest.raises(ValueError, match="At least one ID is required"):
+            BulkLookupRequest.from_dict({'ids': ''}).validate(max_ids=10)
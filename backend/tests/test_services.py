@@ -1,9 +1,22 @@
 import pytest
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from services.analytics_service import AnalyticsService
+from services.archive_service import VoteArchiveService, VoteArchiveWorker
 from services.feature_service import FeatureService
+from services.purge_service import PurgeService, PurgeWorker
+from services.trending_service import EPOCH_KEY, TrendingService
 from services.vote_service import VoteService
+from models.archived_vote import ArchivedVote
 from models.feature import Feature
+from models.setting import Setting
 from models.vote import Vote
+from models.vote_rollup import VoteRollup
 from database import db
+from repositories.duplicate_repository import MinHashLSHIndex
+from repositories.search_repository import InvertedIndex, SearchRepository
+from transactions import unit_of_work
 
 class TestFeatureService:
     """Test Feature service"""
@@ -191,4 +204,621 @@ class TestVoteService:
             
             assert len(user_votes) == 2
             assert feature1.id in user_votes
-            assert feature2.id in user_votes
\ No newline at end of file
+            assert feature2.id in user_votes
+
+class TestFeatureSearch:
+    """Test full-text feature search"""
+    
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_search_matches_title_and_description(self, app, backend):
+        """Test search finds features by title and description on both backends"""
+        app.config['SEARCH_BACKEND'] = backend
+        with app.app_context():
+            service = FeatureService()
+            dark = service.create_feature('Dark mode', 'Author', 'Add a dark theme')
+            export = service.create_feature('CSV export', 'Author', 'Export votes to a spreadsheet')
+            
+            results = service.search_features('dark')
+            assert [r['id'] for r in results] == [dark['id']]
+            
+            results = service.search_features('spreadsheet')
+            assert [r['id'] for r in results] == [export['id']]
+            assert results[0]['score'] > 0
+    
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_search_matches_the_last_word_as_a_prefix(self, app, backend):
+        """Test both backends complete the last query word, but only the last one"""
+        app.config['SEARCH_BACKEND'] = backend
+        with app.app_context():
+            service = FeatureService()
+            notifications = service.create_feature('Slack notifications', 'Author')
+            dark = service.create_feature('Dark mode', 'Author', 'Notify users of theme changes')
+            
+            assert {r['id'] for r in service.search_features('notif')} == {notifications['id'], dark['id']}
+            assert [r['id'] for r in service.search_features('sla')] == [notifications['id']]
+            assert [r['id'] for r in service.search_features('sla dark')] == [dark['id']]
+            
+            service.delete_feature(notifications['id'])
+            assert service.search_features('sla') == []
+    
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_one_letter_last_word_is_matched_whole(self, app, backend):
+        """Test a last word shorter than the minimum prefix length only matches itself"""
+        app.config['SEARCH_BACKEND'] = backend
+        with app.app_context():
+            service = FeatureService()
+            dark = service.create_feature('Dark mode', 'Author')
+            vitamin = service.create_feature('Vitamin D reminders', 'Author')
+            
+            assert [r['id'] for r in service.search_features('d')] == [vitamin['id']]
+            assert [r['id'] for r in service.search_features('da')] == [dark['id']]
+    
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_search_queries_do_not_grow_with_hits(self, app, backend):
+        """Test the hits are loaded with their vote counts at once, not with a COUNT each"""
+        app.config['SEARCH_BACKEND'] = backend
+        with app.app_context():
+            service = FeatureService()
+            for i in range(6):
+                service.create_feature(f'Calendar sync {i}', 'Author', 'Sync with a calendar' if i < 2 else None)
+            service.search_features('warm')
+            statements = []
+            
+            def listener(connection, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+            
+            event.listen(db.engine, 'before_cursor_execute', listener)
+            try:
+                few = len(service.search_features('with'))
+                few_queries, statements[:] = len(statements), []
+                many = len(service.search_features('sync'))
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', listener)
+            
+            assert (few, many) == (2, 6)
+            assert len(statements) == few_queries
+    
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_search_index_follows_deletes(self, app, backend):
+        """Test deleted features drop out of search results"""
+        app.config['SEARCH_BACKEND'] = backend
+        with app.app_context():
+            service = FeatureService()
+            feature = service.create_feature('Offline sync', 'Author')
+            assert len(service.search_features('offline')) == 1
+            
+            service.delete_feature(feature['id'])
+            
+            assert service.search_features('offline') == []
+    
+    @pytest.mark.parametrize('backend', ['fts5', 'memory'])
+    def test_search_index_follows_rollbacks(self, app, backend):
+        """Test a rolled-back create or delete leaves the index as it was"""
+        app.config['SEARCH_BACKEND'] = backend
+        with app.app_context():
+            service = FeatureService()
+            kept = service.create_feature('Kept feature', 'Author')
+            # Loads the in-memory index, which ignores changes until then
+            assert len(service.search_features('kept')) == 1
+            with pytest.raises(RuntimeError):
+                with unit_of_work():
+                    service.create_feature('Rolled back', 'Author')
+                    service.delete_feature(kept['id'])
+                    raise RuntimeError('rollback')
+            
+            assert SearchRepository().search('rolled', 10) == []
+            assert [match[0] for match in SearchRepository().search('kept', 10)] == [kept['id']]
+    
+    def test_changes_during_a_memory_index_build(self, app, monkeypatch):
+        """Test creates and deletes during a build neither wait for it nor get lost"""
+        app.config['SEARCH_BACKEND'] = 'memory'
+        building, release = threading.Event(), threading.Event()
+        add = InvertedIndex._add
+        
+        def slow_add(index, *args):
+            if threading.current_thread().name == 'builder':
+                building.set()
+                release.wait(5)
+            add(index, *args)
+        
+        monkeypatch.setattr(InvertedIndex, '_add', slow_add)
+        with app.app_context():
+            service = FeatureService()
+            deleted = service.create_feature('Offline mode', 'Author')
+            
+            def build():
+                with app.app_context():
+                    SearchRepository().index.ensure()
+            
+            builder = threading.Thread(target=build, name='builder')
+            builder.start()
+            assert building.wait(5)
+            created = service.create_feature('Offline maps', 'Author')
+            service.delete_feature(deleted['id'])
+            assert builder.is_alive()
+            release.set()
+            builder.join()
+            
+            assert [r['id'] for r in service.search_features('offline')] == [created['id']]
+    
+    def test_search_blends_upvotes(self, app):
+        """Test equally relevant features are ranked by upvotes"""
+        with app.app_context():
+            service = FeatureService()
+            quiet = service.create_feature('Slack integration', 'Author')
+            popular = service.create_feature('Slack notifications', 'Author')
+            Feature.query.get(popular['id']).upvotes = 50
+            db.session.commit()
+            
+            results = service.search_features('slack')
+            
+            assert [r['id'] for r in results] == [popular['id'], quiet['id']]
+    
+    def test_search_indexes_existing_features(self, app):
+        """Test the in-process index is built from features already stored"""
+        app.config['SEARCH_BACKEND'] = 'memory'
+        with app.app_context():
+            db.session.add(Feature(title='Keyboard shortcuts', author='Author'))
+            db.session.commit()
+            
+            results = FeatureService().search_features('keyboard')
+            
+            assert len(results) == 1
+
+
+class TestDuplicateDetection:
+    """Test near-duplicate detection"""
+    
+    def test_find_duplicates(self, app):
+        """Test similar features are returned as candidates"""
+        with app.app_context():
+            service = FeatureService()
+            service.duplicate_repo.index.ensure()
+            original = service.create_feature('Add dark mode to the dashboard', 'Author')
+            service.create_feature('Export votes as CSV', 'Author')
+            
+            candidates = service.find_duplicates('Add a dark mode to dashboard')
+            
+            assert [c['id'] for c in candidates] == [original['id']]
+            assert 0.5 <= candidates[0]['similarity'] <= 1
+    
+    def test_create_rejects_near_identical_feature(self, app):
+        """Test creation fails above the reject threshold"""
+        app.config['DUPLICATE_REJECT_THRESHOLD'] = 0.9
+        with app.app_context():
+            service = FeatureService()
+            service.duplicate_repo.index.ensure()
+            original = service.create_feature('Dark mode', 'Author')
+            
+            with pytest.raises(ValueError, match=f"duplicate of feature {original['id']}"):
+                service.create_feature('dark mode!', 'Someone else')
+    
+    def test_deleted_features_are_not_duplicates(self, app):
+        """Test the index forgets deleted features"""
+        with app.app_context():
+            service = FeatureService()
+            service.duplicate_repo.index.ensure()
+            original = service.create_feature('Dark mode', 'Author')
+            service.delete_feature(original['id'])
+            
+            assert service.find_duplicates('Dark mode') == []
+            service.create_feature('Dark mode', 'Author')
+    
+    def test_index_is_built_off_the_request(self, app):
+        """Test a lookup on an unbuilt index finds nothing and builds it in the background"""
+        with app.app_context():
+            service = FeatureService()
+            original = service.create_feature('Dark mode', 'Author')
+            
+            assert service.find_duplicates('Dark mode') == []
+            service.duplicate_repo.index.build_in_background(app).join()
+            
+            assert [c['id'] for c in service.find_duplicates('Dark mode')] == [original['id']]
+    
+    def test_changes_during_a_build(self, app, monkeypatch):
+        """Test creates and deletes during a background build neither wait for it nor get lost"""
+        building, release = threading.Event(), threading.Event()
+        signature = MinHashLSHIndex.signature
+        
+        def slow_signature(index, *args):
+            if threading.current_thread().name.startswith('duplicate-index-'):
+                building.set()
+                release.wait(5)
+            return signature(index, *args)
+        
+        monkeypatch.setattr(MinHashLSHIndex, 'signature', slow_signature)
+        with app.app_context():
+            service = FeatureService()
+            deleted = service.create_feature('Dark mode', 'Author')
+            builder = service.duplicate_repo.index.build_in_background(app)
+            assert building.wait(5)
+            
+            created = service.create_feature('Dark mode!', 'Author')
+            service.delete_feature(deleted['id'])
+            assert builder.is_alive()
+            release.set()
+            builder.join()
+            
+            assert [c['id'] for c in service.find_duplicates('Dark mode')] == [created['id']]
+    
+    def test_duplicates_are_not_rejected_by_default(self, app):
+        """Test near-identical features can be created unless a reject threshold is configured"""
+        with app.app_context():
+            service = FeatureService()
+            service.duplicate_repo.index.ensure()
+            service.create_feature('Dark mode', 'Author')
+            
+            assert service.create_feature('dark mode!', 'Someone else')['title'] == 'dark mode!'
+    
+    def test_cluster_duplicates(self, app):
+        """Test batch clustering of the existing backlog"""
+        with app.app_context():
+            titles = ['Dark mode', 'Dark mode please', 'dark mode!', 'CSV export', 'Export to CSV file', 'SSO login']
+            db.session.add_all([Feature(title=title, author='Author') for title in titles])
+            db.session.commit()
+            
+            clusters = FeatureService().cluster_duplicates(threshold=0.45)
+            
+            assert [1, 2, 3] in clusters
+            assert all(6 not in cluster for cluster in clusters)
+
+
+class TestTrendingService:
+    """Test time-decayed trending ranking"""
+    
+    def test_vote_weight_halves_every_half_life(self, app):
+        """Test vote weight decays by half per half-life"""
+        with app.app_context():
+            service = TrendingService()
+            epoch = datetime(2024, 1, 1)
+            
+            assert service.vote_weight(epoch, epoch) == 1
+            assert service.vote_weight(epoch + timedelta(hours=24), epoch) == 2
+            assert service.vote_weight(epoch - timedelta(hours=48), epoch) == 0.25
+    
+    def test_votes_update_trending_score(self, app):
+        """Test upvotes add to the stored score and removals take it back out"""
+        with app.app_context():
+            feature_id = FeatureService().create_feature('Trending', 'Author')['id']
+            vote_service = VoteService()
+            
+            vote_service.upvote_feature(feature_id, 'user_1')
+            after_one = Feature.query.get(feature_id).trending_score
+            vote_service.upvote_feature(feature_id, 'user_2')
+            after_two = Feature.query.get(feature_id).trending_score
+            vote_service.remove_vote(feature_id, 'user_2')
+            
+            assert after_one > 0
+            assert after_two == pytest.approx(2 * after_one, rel=1e-3)
+            assert Feature.query.get(feature_id).trending_score == pytest.approx(after_one, rel=1e-3)
+    
+    def test_recent_votes_outrank_old_votes(self, app):
+        """Test trending order prefers fresh votes over a larger stale total"""
+        with app.app_context():
+            old = Feature(title='Old favourite', author='Author', upvotes=3)
+            new = Feature(title='New hotness', author='Author', upvotes=1)
+            db.session.add_all([old, new])
+            db.session.commit()
+            long_ago = datetime.utcnow() - timedelta(days=30)
+            db.session.add_all([Vote(feature_id=old.id, user_id=f'user_{i}', created_at=long_ago) for i in range(3)])
+            db.session.add(Vote(feature_id=new.id, user_id='user_1'))
+            db.session.commit()
+            
+            TrendingService().rebuild()
+            
+            by_votes = FeatureService().get_all_features()
+            by_trending = FeatureService().get_all_features(sort='trending')
+            assert by_votes[0]['title'] == 'Old favourite'
+            assert by_trending[0]['title'] == 'New hotness'
+    
+    def test_rebase_preserves_decayed_scores(self, app):
+        """Test moving the epoch forward rescales stored scores without changing order or value"""
+        with app.app_context():
+            feature_id = FeatureService().create_feature('Rebased', 'Author')['id']
+            VoteService().upvote_feature(feature_id, 'user_1')
+            service = TrendingService()
+            now = datetime.utcnow()
+            before = service.decayed_score(Feature.query.get(feature_id).trending_score, now)
+            
+            service.rebase(now + timedelta(days=3))
+            
+            after = service.decayed_score(Feature.query.get(feature_id).trending_score, now)
+            assert after == pytest.approx(before, rel=1e-6)
+    
+    def test_epoch_created_once_under_a_race(self, app, monkeypatch):
+        """Test a vote that lost the race to create the epoch uses the one already stored"""
+        with app.app_context():
+            service = TrendingService()
+            stored = service.get_epoch()
+            get_value = service.setting_repo.get_value
+            reads = []
+            # The first read misses, as it would for a vote that read before another one committed the epoch
+            monkeypatch.setattr(service.setting_repo, 'get_value',
+                                lambda key: None if not reads and not reads.append(key) else get_value(key))
+            
+            assert service.get_epoch() == stored
+            assert Setting.query.filter_by(key=EPOCH_KEY).count() == 1
+    
+    def test_votes_rebase_a_distant_epoch(self, app):
+        """Test a vote long after the epoch rebases the scores instead of overflowing"""
+        with app.app_context():
+            feature_id = FeatureService().create_feature('Long lived', 'Author')['id']
+            service = TrendingService()
+            service.setting_repo.set_value(EPOCH_KEY, (datetime.utcnow() - timedelta(days=2000)).isoformat())
+            
+            VoteService().upvote_feature(feature_id, 'user_1')
+            
+            assert datetime.utcnow() - service.get_epoch() < timedelta(minutes=1)
+            assert Feature.query.get(feature_id).trending_score == pytest.approx(1.0, rel=1e-3)
+
+
+
+class TestSoftDeleteAndPurge:
+    """Test soft deletion and the chunked vote purge"""
+    
+    def _feature_with_votes(self, count):
+        feature = Feature(title='Popular', author='Author', upvotes=count)
+        db.session.add(feature)
+        db.session.commit()
+        db.session.add_all([Vote(feature_id=feature.id, user_id=f'user_{i}') for i in range(count)])
+        db.session.commit()
+        return feature.id
+    
+    def test_soft_delete_hides_feature_and_keeps_votes(self, app):
+        """Test deleting only flags the feature; reads stop returning it"""
+        with app.app_context():
+            feature_id = self._feature_with_votes(3)
+            
+            assert FeatureService().delete_feature(feature_id) is True
+            
+            assert Feature.query.get(feature_id).deleted_at is not None
+            assert Vote.query.filter_by(feature_id=feature_id).count() == 3
+            assert FeatureService().get_all_features() == []
+            assert VoteService().get_user_votes('user_0') == []
+            with pytest.raises(ValueError, match="Feature not found"):
+                VoteService().upvote_feature(feature_id, 'late_voter')
+    
+    def test_purge_removes_votes_in_chunks(self, app):
+        """Test the purge deletes votes in bounded chunks, then the feature row"""
+        with app.app_context():
+            feature_id = self._feature_with_votes(25)
+            kept_id = self._feature_with_votes(2)
+            FeatureService().delete_feature(feature_id)
+            
+            purged = PurgeService().purge_deleted(chunk_size=10)
+            
+            assert purged == 1
+            assert Feature.query.get(feature_id) is None
+            assert Vote.query.filter_by(feature_id=feature_id).count() == 0
+            assert Vote.query.filter_by(feature_id=kept_id).count() == 2
+    
+    def test_background_purge(self, app):
+        """Test deleting schedules a background purge when enabled"""
+        app.config['PURGE_IN_BACKGROUND'] = True
+        with app.app_context():
+            feature_id = self._feature_with_votes(5)
+            FeatureService().delete_feature(feature_id)
+            
+            PurgeWorker.for_app(app).join(timeout=10)
+            
+            db.session.expire_all()
+            assert Feature.query.get(feature_id) is None
+            assert Vote.query.count() == 0
+    
+    def test_schedule_while_the_worker_exits(self, app):
+        """Test a purge scheduled after the worker found nothing left, but before its thread ended, still runs"""
+        app.config['PURGE_IN_BACKGROUND'] = True
+        worker = PurgeWorker.for_app(app)
+        exiting = threading.Event()
+        # A thread that has left _run's loop but is still alive
+        worker._thread = threading.Thread(target=exiting.wait, args=(10,))
+        worker._thread.start()
+        try:
+            with app.app_context():
+                feature_id = self._feature_with_votes(2)
+                FeatureService().delete_feature(feature_id)
+                
+                assert worker._thread.is_alive()
+                worker.join(timeout=10)
+                
+                db.session.expire_all()
+                assert Feature.query.get(feature_id) is None
+        finally:
+            exiting.set()
+
+class TestVoteArchive:
+    """Test moving the votes of quiet features into the archive"""
+    
+    def _feature(self, title, days_ago, users):
+        voted_at = datetime.utcnow() - timedelta(days=days_ago)
+        feature = Feature(title=title, author='Author', upvotes=len(users), created_at=voted_at - timedelta(days=1))
+        db.session.add(feature)
+        db.session.commit()
+        db.session.add_all([Vote(feature_id=feature.id, user_id=user, created_at=voted_at) for user in users])
+        db.session.commit()
+        return feature.id
+    
+    def test_archive_moves_only_quiet_features(self, app):
+        """Test votes of features quiet past the cutoff move in chunks, counters and counts unchanged"""
+        with app.app_context():
+            old_id = self._feature('Old', 400, [f'user{i}' for i in range(7)])
+            recent_id = self._feature('Recent', 2, ['user0', 'user1'])
+            before = {feature['id']: feature for feature in FeatureService().get_all_features()}
+            
+            report = VoteArchiveService().archive(older_than_days=180, chunk_size=3)
+            
+            assert (report['features'], report['votes']) == (1, 7)
+            assert Vote.query.filter_by(feature_id=old_id).count() == 0
+            assert ArchivedVote.query.filter_by(feature_id=old_id).count() == 7
+            assert Vote.query.filter_by(feature_id=recent_id).count() == 2
+            db.session.expire_all()
+            assert db.session.get(Feature, recent_id).votes_archived_at is None
+            after = {feature['id']: feature for feature in FeatureService().get_all_features()}
+            for feature_id in (old_id, recent_id):
+                assert after[feature_id]['upvotes'] == before[feature_id]['upvotes']
+                assert after[feature_id]['votes_count'] == before[feature_id]['votes_count']
+            assert FeatureService().get_feature_by_id(old_id)['votes_count'] == 7
+    
+    def test_archived_votes_are_found_transparently(self, app):
+        """Test lookups, duplicate checks and vote removal see archived votes"""
+        with app.app_context():
+            old_id = self._feature('Old', 400, ['user0', 'user1'])
+            recent_id = self._feature('Recent', 2, ['user0'])
+            VoteArchiveService().archive(older_than_days=180)
+            service = VoteService()
+            
+            assert sorted(service.get_user_votes('user0')) == sorted([old_id, recent_id])
+            with pytest.raises(ValueError, match="User already voted"):
+                service.upvote_feature(old_id, 'user1')
+            removed = service.remove_vote(old_id, 'user1')
+            added = service.upvote_feature(old_id, 'user2')
+            
+            assert removed['upvotes'] == 1
+            assert added['upvotes'] == 2
+            assert added['votes_count'] == 2
+            assert ArchivedVote.query.filter_by(user_id='user1').count() == 0
+    
+    def test_recounts_and_purges_include_the_archive(self, app):
+        """Test reconciliation finds no drift after archiving, and purging a feature removes its archived votes"""
+        from services.reconciliation_service import ReconciliationService
+        
+        with app.app_context():
+            old_id = self._feature('Old', 400, ['user0', 'user1', 'user2'])
+            VoteArchiveService().archive(older_than_days=180)
+            
+            report = ReconciliationService().reconcile()
+            FeatureService().delete_feature(old_id)
+            PurgeService().purge_deleted(chunk_size=2)
+            
+            assert (report.checked, report.drifted) == (1, 0)
+            assert ArchivedVote.query.count() == 0
+            assert db.session.get(Feature, old_id) is None
+    
+    def test_related_features_count_archived_votes(self, app):
+        """Test co-votes moved to the archive still relate features"""
+        from database import reset_engine_state
+        
+        with app.app_context():
+            users = ['user0', 'user1', 'user2']
+            first_id = self._feature('First', 400, users)
+            second_id = self._feature('Second', 2, users)
+            before = FeatureService().get_related_features(first_id)
+            reset_engine_state()
+            
+            VoteArchiveService().archive(older_than_days=180)
+            after = FeatureService().get_related_features(first_id)
+            
+            assert [feature['id'] for feature in before] == [second_id]
+            assert after == before
+    
+    def test_dry_run_changes_nothing(self, app):
+        """Test a dry run reports what would move without moving it"""
+        with app.app_context():
+            self._feature('Old', 400, ['user0', 'user1'])
+            
+            report = VoteArchiveService().archive(older_than_days=180, apply=False)
+            
+            assert (report['features'], report['votes']) == (1, 2)
+            assert Vote.query.count() == 2
+            assert ArchivedVote.query.count() == 0
+    
+    def test_worker_reports_each_served_board(self, app):
+        """Test a worker pass archives every served board and keeps one report per board"""
+        app.config['SERVED_BOARDS'] = ['default', 'mobile']
+        with app.app_context():
+            self._feature('Old', 400, ['user0'])
+        worker = VoteArchiveWorker.for_app(app)
+        
+        worker.run_once()
+        
+        assert VoteArchiveWorker.for_app(app) is worker
+        assert worker.reports['default']['votes'] == 1
+        assert worker.reports['mobile']['votes'] == 0
+
+class TestAnalyticsService:
+    """Test pre-aggregated vote rollups"""
+    
+    def test_votes_update_rollups(self, app):
+        """Test votes and removals are counted in hourly and daily buckets"""
+        with app.app_context():
+            feature_id = FeatureService().create_feature('Tracked', 'Author')['id']
+            vote_service = VoteService()
+            vote_service.upvote_feature(feature_id, 'user_1')
+            vote_service.upvote_feature(feature_id, 'user_2')
+            vote_service.remove_vote(feature_id, 'user_2')
+            
+            service = AnalyticsService()
+            hourly = service.get_feature_stats(feature_id, 'hour')
+            daily = service.get_feature_stats(feature_id, 'day')
+            
+            assert hourly['total'] == daily['total'] == 1
+            assert len(hourly['buckets']) == 1
+            assert VoteRollup.query.count() == 2
+    
+    def test_backfill_from_existing_votes(self, app):
+        """Test the backfill rebuilds rollups from historical votes in chunks"""
+        with app.app_context():
+            feature = Feature(title='Historical', author='Author')
+            db.session.add(feature)
+            db.session.commit()
+            day_one = datetime(2024, 3, 1, 9, 30)
+            db.session.add_all([
+                Vote(feature_id=feature.id, user_id='a', created_at=day_one),
+                Vote(feature_id=feature.id, user_id='b', created_at=day_one + timedelta(minutes=10)),
+                Vote(feature_id=feature.id, user_id='c', created_at=day_one + timedelta(days=1)),
+            ])
+            db.session.commit()
+            
+            service = AnalyticsService()
+            assert service.backfill(chunk_size=2) == 3
+            
+            stats = service.get_feature_stats(feature.id, 'day', since=datetime(2024, 3, 1))
+            assert stats['buckets'] == [
+                {'bucket': '2024-03-01T00:00:00', 'delta': 2},
+                {'bucket': '2024-03-02T00:00:00', 'delta': 1},
+            ]
+            hourly = service.get_feature_stats(feature.id, 'hour', since=datetime(2024, 3, 1))
+            assert hourly['buckets'][0] == {'bucket': '2024-03-01T09:00:00', 'delta': 2}
+    
+    def test_backfill_with_live_votes(self, app):
+        """Test votes cast and removed while a backfill runs are each counted exactly once"""
+        with app.app_context():
+            feature_id = FeatureService().create_feature('Busy', 'Author')['id']
+            vote_service = VoteService()
+            for user in ('a', 'b', 'c'):
+                vote_service.upvote_feature(feature_id, user)
+            service = AnalyticsService()
+            backfill_chunk = service._backfill_chunk
+            live = []
+            
+            def chunk_with_live_votes(table, chunk_size):
+                # Before the votes table is read: one new vote and the removal of one not yet counted
+                if table == 'votes' and not live:
+                    live.append(vote_service.upvote_feature(feature_id, 'd'))
+                    live.append(vote_service.remove_vote(feature_id, 'c'))
+                    assert ArchivedVote.query.count() == 0
+                    assert VoteArchiveService().archive(older_than_days=0)['deferred']
+                return backfill_chunk(table, chunk_size)
+            
+            service._backfill_chunk = chunk_with_live_votes
+            assert service.backfill(chunk_size=1) == 2
+            
+            stats = service.get_feature_stats(feature_id, 'day')
+            assert stats['total'] == Vote.query.filter_by(feature_id=feature_id).count() == 3
+            assert all(bucket['delta'] > 0 for bucket in stats['buckets'])
+            assert service.backfill_progress() is None
+    
+    def test_top_movers(self, app):
+        """Test features are ranked by recent net votes"""
+        with app.app_context():
+            service = FeatureService()
+            slow = service.create_feature('Slow mover', 'Author')['id']
+            fast = service.create_feature('Fast mover', 'Author')['id']
+            vote_service = VoteService()
+            vote_service.upvote_feature(slow, 'user_1')
+            for user in ('user_1', 'user_2', 'user_3'):
+                vote_service.upvote_feature(fast, user)
+            
+            movers = AnalyticsService().get_top_movers('day', window=7, limit=10)
+            
+            assert [(m['id'], m['delta']) for m in movers] == [(fast, 3), (slow, 1)]
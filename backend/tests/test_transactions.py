@@ -0,0 +1,138 @@
+import pytest
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from database import db
+from models.feature import Feature
+from models.setting import Setting
+from repositories.setting_repository import SettingRepository
+from services.feature_service import FeatureService
+from services.vote_service import VoteService
+from transactions import after_commit, savepoint, transactional, unit_of_work
+
+def locked_error():
+    return OperationalError('UPDATE features', {}, sqlite3.OperationalError('database is locked'))
+
+@pytest.fixture
+def commits(app):
+    """Count COMMITs sent to the database"""
+    counter = []
+    listener = lambda connection: counter.append(1)
+    with app.app_context():
+        event.listen(db.engine, 'commit', listener)
+        yield counter
+        event.remove(db.engine, 'commit', listener)
+
+class TestUnitOfWork:
+    """Test grouping repository writes into one transaction"""
+    
+    def test_service_calls_commit_once(self, app, commits):
+        """Test each service operation spanning several repositories commits exactly once"""
+        with app.app_context():
+            feature_service = FeatureService()
+            vote_service = VoteService()
+            
+            counts = {}
+            for name, operation in [
+                ('create', lambda: feature_service.create_feature(title='Dark mode', author='Author')),
+                ('upvote', lambda: vote_service.upvote_feature(1, 'user1')),
+                ('remove_vote', lambda: vote_service.remove_vote(1, 'user1')),
+                ('delete', lambda: feature_service.delete_feature(1)),
+            ]:
+                commits.clear()
+                operation()
+                counts[name] = len(commits)
+            
+            assert counts == {'create': 1, 'upvote': 1, 'remove_vote': 1, 'delete': 1}
+    
+    def test_failure_rolls_back_every_repository(self, app):
+        """Test an error undoes all writes of the unit and skips its after-commit callbacks"""
+        with app.app_context():
+            called = []
+            with pytest.raises(RuntimeError):
+                with unit_of_work():
+                    SettingRepository().set_value('a', '1')
+                    db.session.add(Feature(title='Never saved', author='Author'))
+                    after_commit(lambda: called.append(1))
+                    raise RuntimeError
+            
+            assert Setting.query.count() == 0
+            assert Feature.query.count() == 0
+            assert called == []
+    
+    def test_nested_units_join_the_outer_one(self, app, commits):
+        """Test a nested unit of work commits with the outermost one"""
+        with app.app_context():
+            with unit_of_work():
+                with unit_of_work():
+                    SettingRepository().set_value('a', '1')
+                assert commits == []
+            
+            assert len(commits) == 1
+            assert SettingRepository().get_value('a') == '1'
+    
+    def test_savepoint_rolls_back_only_its_block(self, app):
+        """Test a failed savepoint keeps the rest of the unit"""
+        with app.app_context():
+            repo = SettingRepository()
+            with unit_of_work():
+                repo.set_value('kept', '1')
+                with pytest.raises(RuntimeError):
+                    with savepoint():
+                        repo.set_value('dropped', '1')
+                        raise RuntimeError
+            
+            assert [setting.key for setting in Setting.query.all()] == ['kept']
+
+class TestTransactionalRetry:
+    """Test retrying units of work on transient lock errors"""
+    
+    def test_retries_locked_database(self, app, monkeypatch):
+        """Test a locked database is retried with backoff until it succeeds"""
+        monkeypatch.setattr('transactions.time.sleep', lambda seconds: None)
+        attempts = []
+        
+        @transactional
+        def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise locked_error()
+            SettingRepository().set_value('done', '1')
+            return 'ok'
+        
+        with app.app_context():
+            assert flaky() == 'ok'
+            assert len(attempts) == 3
+            assert SettingRepository().get_value('done') == '1'
+    
+    def test_gives_up_after_configured_retries(self, app, monkeypatch):
+        """Test the error surfaces once retries are exhausted"""
+        delays = []
+        monkeypatch.setattr('transactions.time.sleep', delays.append)
+        app.config['TRANSACTION_RETRIES'] = 2
+        
+        @transactional
+        def always_locked():
+            raise locked_error()
+        
+        with app.app_context():
+            with pytest.raises(OperationalError):
+                always_locked()
+        
+        assert len(delays) == 2
+        assert all(0 <= delay <= app.config['TRANSACTION_RETRY_MAX_DELAY'] for delay in delays)
+    
+    def test_other_errors_are_not_retried(self, app):
+        """Test non-transient database errors fail at once"""
+        attempts = []
+        
+        @transactional
+        def broken():
+            attempts.append(1)
+            raise OperationalError('SELECT', {}, sqlite3.OperationalError('no such table: nope'))
+        
+        with app.app_context():
+            with pytest.raises(OperationalError):
+                broken()
+        
+        assert len(attempts) == 1
@@ -0,0 +1,111 @@
+import functools
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+from flask import current_app
+from sqlalchemy.exc import DBAPIError
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Lock and serialization errors that succeed when the whole transaction is run again
+RETRYABLE_MESSAGES = ('database is locked', 'database table is locked', 'could not serialize access',
+                      'deadlock detected')
+RETRYABLE_SQLSTATES = {'40001', '40P01'}
+
+class UnitOfWork:
+    """One transaction spanning several repository calls, committed once at its boundary"""
+    
+    def __init__(self):
+        self.after_commit_callbacks: List[Callable[[], None]] = []
+
+_current_unit: ContextVar[Optional[UnitOfWork]] = ContextVar('unit_of_work', default=None)
+
+def in_unit_of_work() -> bool:
+    """Check whether repository writes are currently deferred to a unit of work"""
+    return _current_unit.get() is not None
+
+def save_changes():
+    """Commit, or only flush when a surrounding unit of work will commit"""
+    if in_unit_of_work():
+        db.session.flush()
+    else:
+        db.session.commit()
+
+def after_commit(callback: Callable[[], None]):
+    """Run a side effect (events, in-process caches) once the current work is committed"""
+    unit = _current_unit.get()
+    if unit is None:
+        callback()
+    else:
+        unit.after_commit_callbacks.append(callback)
+
+@contextmanager
+def unit_of_work():
+    """Group repository writes into one transaction; nested blocks join the outermost one"""
+    if in_unit_of_work():
+        yield _current_unit.get()
+        return
+    
+    unit = UnitOfWork()
+    token = _current_unit.set(unit)
+    try:
+        yield unit
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        _current_unit.reset(token)
+    
+    for callback in unit.after_commit_callbacks:
+        try:
+            callback()
+        except Exception:
+            logger.exception("After-commit callback failed")
+
+@contextmanager
+def savepoint():
+    """Roll back only the writes of this block if it raises"""
+    with db.session.begin_nested():
+        yield
+
+def is_retryable(error: DBAPIError) -> bool:
+    """Check whether a database error is a transient lock or serialization failure"""
+    if getattr(error.orig, 'pgcode', None) in RETRYABLE_SQLSTATES:
+        return True
+    message = str(error.orig).lower()
+    return any(text in message for text in RETRYABLE_MESSAGES)
+
+def retry_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before the given retry attempt"""
+    base = current_app.config['TRANSACTION_RETRY_BASE_DELAY']
+    cap = current_app.config['TRANSACTION_RETRY_MAX_DELAY']
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def transactional(func: Callable) -> Callable:
+    """Run a service method as one unit of work, retrying it on transient lock errors"""
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # Only the outermost unit can be retried: inner calls share its transaction
+        if in_unit_of_work():
+            return func(*args, **kwargs)
+        
+        retries = current_app.config['TRANSACTION_RETRIES']
+        attempt = 0
+        while True:
+            try:
+                with unit_of_work():
+                    return func(*args, **kwargs)
+            except DBAPIError as e:
+                if attempt >= retries or not is_retryable(e):
+                    raise
+                logger.warning("Retrying %s after transient database error: %s", func.__qualname__, e.orig)
+                time.sleep(retry_delay(attempt))
+                attempt += 1
+    
+    return wrapper
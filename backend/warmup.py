@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import text
+from boards import DEFAULT_BOARD, use_board
+from database import db
+
+logger = logging.getLogger(__name__)
+
+class WarmupState:
+    """Progress of one app's warm-up, read by the readiness probe"""
+    
+    def __init__(self, ready: bool = False):
+        self.ready = threading.Event()
+        if ready:
+            self.ready.set()
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+
+class Warmup:
+    """Imports, connects and fills caches in the background; the app reports ready once it is done"""
+    
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+    
+    def init_app(self, app):
+        app.extensions['warmup'] = self
+        # Without a warm-up step the app is ready as soon as it serves requests
+        app.extensions['warmup_state'] = WarmupState(ready=not app.config['WARMUP_ON_STARTUP'])
+        if app.config['WARMUP_ON_STARTUP']:
+            self.start(app)
+    
+    def start(self, app) -> threading.Thread:
+        """Run the warm-up in a background thread so the server can start listening meanwhile"""
+        thread = threading.Thread(target=self.run, args=(app,), name='warmup', daemon=True)
+        thread.start()
+        return thread
+    
+    def run(self, app):
+        """Run every warm-up step and mark the app ready, or record why it failed"""
+        state = app.extensions['warmup_state']
+        try:
+            with app.app_context():
+                for name, step in [('imports', self._import_services),
+                                   ('connections', self._prime_pool),
+                                   ('queries', self._prime_queries)]:
+                    started = time.perf_counter()
+                    step(app)
+                    state.timings[name] = round(time.perf_counter() - started, 4)
+        except Exception as e:
+            logger.exception("Warm-up failed")
+            state.error = str(e)
+            return
+        state.ready.set()
+    
+    @staticmethod
+    def _import_services(app):
+        # Builds the lazily constructed route services, importing the modules behind them
+        from routes.feature_routes import get_analytics_service, get_feature_service, get_vote_service
+        
+        get_feature_service()
+        get_vote_service()
+        get_analytics_service()
+    
+    @staticmethod
+    def _prime_pool(app):
+        # Open the pool's connections up front instead of on the first requests
+        connections = []
+        try:
+            for _ in range(app.config['WARMUP_CONNECTIONS']):
+                connections.append(db.engine.connect())
+                connections[-1].execute(text('SELECT 1'))
+        finally:
+            for connection in connections:
+                connection.close()
+    
+    @staticmethod
+    def _prime_queries(app):
+        # Compiles the hot statements into SQLAlchemy's cache and fills the feature cache and indexes
+        from routes.feature_routes import get_feature_service
+        
+        service = get_feature_service()
+        for board_id in app.config['SERVED_BOARDS'] or [DEFAULT_BOARD]:
+            with use_board(board_id):
+                for sort in ('votes', 'trending'):
+                    service.get_all_features(sort=sort)
+                service.search_features('warmup')
+                service.duplicate_repo.index.ensure()
+                service.recommendation_repo.index.ensure()
+
+warmup = Warmup()